@@ -2,11 +2,62 @@ Module.register("MMM-NarcissusMirror", {
     defaults: {
         width: "100%",
         height: "100%",
-        opacity: 1.0
+        opacity: 1.0,
+        // Cursor push channel (SSE) served by the Python VideoServer
+        cursorStreamUrl: "http://localhost:5050/cursor_stream"
     },
 
     start: function () {
         Log.info("Starting module: " + this.name);
+        this.cursorLatencyMs = 0;
+        this.connectCursorStream();
+    },
+
+    connectCursorStream: function () {
+        var self = this;
+        if (!this.config.cursorStreamUrl || typeof EventSource === "undefined") return;
+
+        // EventSource reconnects on its own if the backend restarts
+        var source = new EventSource(this.config.cursorStreamUrl);
+        source.onmessage = function (event) {
+            var payload = JSON.parse(event.data);
+            // Smoothed publish -> receive latency (same machine, same clock)
+            self.cursorLatencyMs = 0.9 * self.cursorLatencyMs + 0.1 * (Date.now() - payload.t);
+            self.updateCursor(payload);
+        };
+        this.cursorSource = source;
+    },
+
+    updateCursor: function (payload) {
+        var cursor = document.getElementById("narcissus-cursor");
+        if (cursor) {
+            if (payload.x === -1) {
+                cursor.style.display = "none";
+            } else {
+                cursor.style.display = "block";
+                // payload.x and .y are 0.0-1.0 normalization
+                // User reports cursor moves opposite to finger.
+                // Reverting to mirror logic: Invert X.
+                var mirrorX = 1.0 - payload.x;
+                cursor.style.left = (mirrorX * 100) + "%";
+                cursor.style.top = (payload.y * 100) + "%";
+            }
+        }
+    },
+
+    setMode: function (mode) {
+        // "mirror": only this module, with video. "dashboard": every module, cursor only.
+        var mirror = mode === "mirror";
+        MM.getModules().exceptModule(this).enumerate(function (module) {
+            if (mirror) {
+                module.hide(1000);
+            } else {
+                module.show(1000);
+            }
+        });
+        this.show(1000);
+        var video = document.getElementById("narcissus-video");
+        if (video) video.style.display = mirror ? "block" : "none";
     },
 
     getStyles: function () {
@@ -51,6 +102,9 @@ Module.register("MMM-NarcissusMirror", {
             this.show(1000);
         } else if (notification === "NARCISSUS_HIDE") {
             this.hide(1000);
+        } else if (notification === "NARCISSUS_UI") {
+            // Whole mode switch in one notification (ui_control.py)
+            this.setMode(payload && payload.mode);
         } else if (notification === "NARCISSUS_SHOW_VIDEO") {
             // Show just the video feed
             var video = document.getElementById("narcissus-video");
@@ -60,21 +114,8 @@ Module.register("MMM-NarcissusMirror", {
             var video = document.getElementById("narcissus-video");
             if (video) video.style.display = "none";
         } else if (notification === "NARCISSUS_CURSOR") {
-            // Update Cursor Position
-            var cursor = document.getElementById("narcissus-cursor");
-            if (cursor) {
-                if (payload.x === -1) {
-                    cursor.style.display = "none";
-                } else {
-                    cursor.style.display = "block";
-                    // payload.x and .y are 0.0-1.0 normalization
-                    // User reports cursor moves opposite to finger.
-                    // Reverting to mirror logic: Invert X.
-                    var mirrorX = 1.0 - payload.x;
-                    cursor.style.left = (mirrorX * 100) + "%";
-                    cursor.style.top = (payload.y * 100) + "%";
-                }
-            }
+            // Legacy path (Remote-Control notification), cursor_stream is preferred
+            this.updateCursor(payload);
         }
     }
 });
@@ -1,32 +1,238 @@
 import cv2
-import mediapipe as mp
 import time
 import numpy as np
+from landmarks import (Landmarks, LIPS_OUTER, LIPS_INNER, lip_hit, CHEEK_LEFT, CHEEK_RIGHT,
+                       UPPER_LID_LEFT, UPPER_LID_RIGHT, EYESHADOW_LEFT, EYESHADOW_RIGHT)
+from perf import timings
+
+# MediaPipe is imported where it's used (see gesture_input.py)
+
+class Effect:
+    """
+    One makeup region, defined by landmark index sets:
+    - fills: polygons to fill (hull=True fills their convex hull instead)
+    - holes: polygons cut back out (the mouth for lipstick)
+    - lines: polylines stroked `line_width` x face width thick
+    blur: odd kernel in px (int) or a fraction of the face width (float).
+    """
+    def __init__(self, name, fills=(), holes=(), lines=(), hull=False, blur=7, line_width=0.0,
+                 color="red", opacity=0.5):
+        self.name = name
+        self.fills = list(fills)
+        self.holes = list(holes)
+        self.lines = list(lines)
+        self.hull = hull
+        self.blur = blur
+        self.line_width = line_width
+        self.indices = np.unique(np.concatenate(self.fills + self.holes + self.lines))
+        self.color = color # default shade
+        self.opacity = opacity
+
+    def kernel(self, face_w):
+        k = self.blur if isinstance(self.blur, int) else int(self.blur * face_w)
+        return max(k | 1, 1)
+
+    def thickness(self, face_w):
+        return max(int(round(self.line_width * face_w)), 1) if self.lines else 0
+
+    def box(self, pts, face_w, w, h):
+        """Padded (x0, y0, x1, y1) pixel bounding box clipped to the frame, None when off-frame."""
+        used = pts[self.indices]
+        pad = self.kernel(face_w) // 2 + self.thickness(face_w) + 1
+        x0, y0 = np.maximum(used.min(axis=0) - pad, 0)
+        x1, y1 = np.minimum(used.max(axis=0) + pad + 1, (w, h))
+        if x1 <= x0 or y1 <= y0: return None
+        return int(x0), int(y0), int(x1), int(y1)
+
+    def draw(self, mask, pts, thickness):
+        """Rasterize into `mask` (uint8) from pixel points already shifted to the mask origin."""
+        for idx in self.fills:
+            poly = pts[idx]
+            cv2.fillPoly(mask, [cv2.convexHull(poly) if self.hull else poly], 255)
+        for idx in self.holes:
+            cv2.fillPoly(mask, [pts[idx]], 0)
+        if self.lines:
+            cv2.polylines(mask, [pts[idx] for idx in self.lines], False, 255, thickness, cv2.LINE_AA)
+
+    def mask(self, pts, box, face_w):
+        """Blurred uint8 coverage over `box`. Wide blurs (blush) are done at 1/2 or 1/4 scale and upsampled."""
+        x0, y0, x1, y1 = box
+        h, w = y1 - y0, x1 - x0
+        k, t = self.kernel(face_w), self.thickness(face_w)
+        local = pts - np.array([x0, y0], dtype=np.int32)
+        s = next((s for s in DOWNSCALES if k // s >= DOWNSCALE_MIN_KERNEL), 1)
+        if s == 1:
+            mask = np.zeros((h, w), dtype=np.uint8)
+            self.draw(mask, local, t)
+            return cv2.GaussianBlur(mask, (k, k), 0) if k > 1 else mask
+        small = np.zeros((-(-h // s), -(-w // s)), dtype=np.uint8)
+        self.draw(small, local // s, max(t // s, 1))
+        ks = (k // s) | 1
+        small = cv2.GaussianBlur(small, (ks, ks), 0)
+        # Exactly s x up, then trimmed: resizing straight to (w, h) stretches by a bit more than s
+        return cv2.resize(small, (small.shape[1] * s, small.shape[0] * s), interpolation=cv2.INTER_LINEAR)[:h, :w]
+
+
+# Masks are rasterized and blurred at 1/s, for the first s here that leaves a
+# kernel of DOWNSCALE_MIN_KERNEL px: narrower blurs don't hide the coarse edges
+DOWNSCALES = (4, 2)
+DOWNSCALE_MIN_KERNEL = 11
+# Overlapping layers share one uint16 pass over their union box only when it is
+# under this fraction of their boxes added up: a pass over the union costs about
+# as much as blending two layers in their own boxes
+MERGE_MAX_RATIO = 0.5
+
+EFFECTS = {
+    "lipstick": Effect("lipstick", fills=[LIPS_OUTER], holes=[LIPS_INNER], blur=7, color="red", opacity=0.5),
+    "blush": Effect("blush", fills=[CHEEK_LEFT, CHEEK_RIGHT], hull=True, blur=0.12, color="pink", opacity=0.25),
+    "eyeshadow": Effect("eyeshadow", fills=[EYESHADOW_LEFT, EYESHADOW_RIGHT], blur=0.03, color="brown", opacity=0.35),
+    "eyeliner": Effect("eyeliner", lines=[UPPER_LID_LEFT, UPPER_LID_RIGHT], blur=3, line_width=0.008,
+                       color="black", opacity=0.7),
+}
+
+
+class MakeupCompositor:
+    """
+    Blends every active makeup layer into the frame, touching only their boxes.
+
+    set_layer() caches a layer's color and fixed-point opacity until the
+    layer changes. render() rasterizes each layer's mask only inside its own
+    padded bounding box, in EFFECTS order ("over"). Each layer is blended
+    straight into the frame in its own box, unless several are stacked on
+    the same pixels (their union box under MERGE_MAX_RATIO of their boxes
+    added up): those are composited into one uint16 copy of the union,
+    which is written back once. Partial overlaps (blush grazing the
+    lipstick, eyeliner inside the eyeshadow) stay per layer, where the
+    union pass measured slower.
+    """
+    def __init__(self, effects=EFFECTS):
+        self.effects = effects
+        self.layers = {} # name -> (color uint16 (1, 1, 3), opacity 0..256), in insertion order
+
+    def set_layer(self, name, color, opacity):
+        self.layers[name] = (np.array(color, dtype=np.uint16).reshape(1, 1, 3), int(round(opacity * 256)))
+
+    def clear(self, name=None):
+        if name is None: self.layers.clear()
+        else: self.layers.pop(name, None)
+
+    def render(self, frame, pts):
+        """Blend all layers into `frame` IN PLACE. pts: (N, 2) int32 face landmarks in pixels."""
+        if not self.layers: return frame
+        h, w = frame.shape[:2]
+        face_w = int(np.ptp(pts[:, 0]))
+
+        groups = [] # [box, [(effect, color, opacity, box), ...]]
+        for name, (color, opacity) in list(self.layers.items()):
+            effect = self.effects[name]
+            box = effect.box(pts, face_w, w, h)
+            if box is not None: groups.append([box, [(effect, color, opacity, box)]])
+        # Merge until the group boxes are pairwise disjoint
+        i = 0
+        while i < len(groups):
+            j = next((j for j in range(i + 1, len(groups)) if _overlaps(groups[i][0], groups[j][0])), None)
+            if j is None:
+                i += 1
+                continue
+            box, layers = groups.pop(j)
+            groups[i] = [_union(groups[i][0], box), groups[i][1] + layers]
+            i = 0
+
+        order = list(self.effects)
+        for group, layers in groups:
+            layers.sort(key=lambda layer: order.index(layer[0].name))
+            if _area(group) >= MERGE_MAX_RATIO * sum(_area(layer[3]) for layer in layers):
+                # Alone, or not stacked enough for one pass over the union to pay
+                for effect, color, opacity, (x0, y0, x1, y1) in layers:
+                    blend_color(frame[y0:y1, x0:x1], _alpha(effect.mask(pts, (x0, y0, x1, y1), face_w), opacity), color)
+                continue
+            x0, y0, x1, y1 = group
+            roi = frame[y0:y1, x0:x1]
+            acc = roi.astype(np.uint16)
+            for effect, color, opacity, box in layers:
+                a = _alpha(effect.mask(pts, box, face_w), opacity)[..., None]
+                sub = acc[box[1] - y0:box[3] - y0, box[0] - x0:box[2] - x0]
+                sub *= 255 - a
+                sub += color * a
+                _div255(sub)
+            roi[:] = acc # The one write
+        return frame
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _union(a, b):
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def _alpha(mask, opacity):
+    """uint8 coverage x fixed-point opacity (0..256) -> uint16 alpha 0..255."""
+    a = mask.astype(np.uint16)
+    a *= opacity
+    a >>= 8
+    return a
+
+
+def blend_color(roi, alpha, color):
+    """
+    In-place fixed-point alpha blend of a solid BGR color into `roi`:
+        out = color * a + roi * (1 - a),  alpha 0..255 (uint16)
+    All math stays in uint16 (255 * 255 fits), no float conversion.
+    """
+    alpha = alpha[..., None]
+    acc = roi.astype(np.uint16)
+    acc *= 255 - alpha
+    acc += color * alpha
+    roi[:] = _div255(acc)
+
+
+def _div255(x):
+    """Rounded x / 255 in integer math, in place: (x + 128 + ((x + 128) >> 8)) >> 8."""
+    x += 128
+    x += x >> 8
+    x >>= 8
+    return x
+
+
+def create_face_landmarker():
+    """The MediaPipe FaceLandmarker (module level, so landmark_worker can build it in a worker process)."""
+    # Import TASKS API
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    # Create FaceLandmarker options
+    base_options = python.BaseOptions(model_asset_path='face_landmarker.task')
+    options = vision.FaceLandmarkerOptions(
+        base_options=base_options,
+        output_face_blendshapes=False,
+        output_facial_transformation_matrixes=False, 
+        num_faces=1,
+        running_mode=vision.RunningMode.VIDEO)
+        
+    return vision.FaceLandmarker.create_from_options(options)
 
-# Import TASKS API
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 
 class ARMakeup:
-    def __init__(self):
-        # Create FaceLandmarker options
-        base_options = python.BaseOptions(model_asset_path='face_landmarker.task')
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options,
-            output_face_blendshapes=False,
-            output_facial_transformation_matrixes=False, 
-            num_faces=1,
-            running_mode=vision.RunningMode.VIDEO)
-            
-        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+    def __init__(self, landmarker=None, scheduler=None, region=None):
+        if landmarker is None:
+            landmarker = create_face_landmarker()
+        # Any object with detect_for_video(mp_image, timestamp_ms) works (benchmarks use stand-ins,
+        # landmark_worker.RemoteLandmarker runs it in another process; see HandDetector)
+        self.landmarker = landmarker
+        self.accepts_arrays = getattr(landmarker, "accepts_arrays", False)
         self.start_time_ms = int(time.time() * 1000)
         
-        # State
-        self.enabled = False
-        self.current_color = None # None or (B, G, R)
-        self.lipstick_opacity = 0.5
+        # State: active makeup layers (lipstick, blush, ...), see MakeupCompositor
+        self.compositor = MakeupCompositor()
+        self.lipstick_opacity = EFFECTS["lipstick"].opacity
         
-        # Color Palette
+        # Color Palette (lipstick shades, cycled by lip touch)
         self.COLORS = {
             "red": (0, 0, 200),
             "nude": (150, 150, 220), # Sort of a beige/pink
@@ -34,34 +240,70 @@ class ARMakeup:
             "purple": (128, 0, 128),
             "dark": (30, 30, 100)
         }
+        # Extra shades for the other effects
+        self.SHADES = {
+            "peach": (140, 170, 250),
+            "brown": (40, 70, 120),
+            "gold": (60, 170, 210),
+            "black": (20, 20, 20),
+        }
 
-        # ORDERED Indices for Polygon Filling (Donut Mask)
-        # Outer Contour (Clockwise)
-        self.LIPS_OUTER_LOWER = [61, 146, 91, 181, 84, 17, 314, 405, 321, 375, 291]
-        self.LIPS_OUTER_UPPER = [291, 409, 270, 269, 267, 0, 37, 39, 40, 185, 61]
-        self.LIPS_OUTER = self.LIPS_OUTER_LOWER + self.LIPS_OUTER_UPPER[1:] 
+        # ORDERED Indices for Polygon Filling (Donut Mask), see landmarks.py
+        self.LIPS_OUTER = LIPS_OUTER
+        self.LIPS_INNER = LIPS_INNER
         
-        # Inner Contour (Mouth Hole)
-        self.LIPS_INNER_LOWER = [78, 95, 88, 178, 87, 14, 317, 402, 318, 324, 308]
-        self.LIPS_INNER_UPPER = [308, 415, 310, 311, 312, 13, 82, 81, 80, 191, 78]
-        self.LIPS_INNER = self.LIPS_INNER_LOWER + self.LIPS_INNER_UPPER[1:] 
+        # Lip contours of the current frame (normalized (N, 2) arrays) for
+        # analytic touch tests, None when no face
+        self.current_lips = None
         
-        # Cache for lip hull to check collisions
-        self.current_lip_mask = None
+        # Demand-driven detection (FaceScheduler). None = detect every frame.
+        # Between detections the last face landmarks are carried forward,
+        # extrapolated by their velocity for up to MAX_EXTRAPOLATE_MS.
+        self.scheduler = scheduler
+        self.face_track = [] # last 2 detections: (time_s, (N, 2) normalized xy)
+        self.face_box = None # (x0, y0, x1, y1) normalized, last detection
+        self.MAX_EXTRAPOLATE_MS = 100
+        
+        # Reduced-resolution / ROI-cropped inference (roi.InferenceRegion), None = full frame
+        self.region = region
+
+    @property
+    def enabled(self):
+        return bool(self.compositor.layers)
+
+    @property
+    def current_color(self):
+        """Lipstick (B, G, R), None when no lipstick is on."""
+        layer = self.compositor.layers.get("lipstick")
+        return tuple(int(v) for v in layer[0].ravel()) if layer else None
 
     def set_color(self, color_name):
+        """Lipstick color; "off" removes all makeup."""
         if color_name == "off":
-            self.enabled = False
-            self.current_color = None
+            self.compositor.clear()
             return "Makeup removed."
             
-        if color_name in self.COLORS:
-            self.current_color = self.COLORS[color_name]
-            self.enabled = True
+        color = self.COLORS.get(color_name) or self.SHADES.get(color_name)
+        if color is not None:
+            self.compositor.set_layer("lipstick", color, self.lipstick_opacity)
             return f"Applying {color_name} lipstick."
         else:
             return f"Color {color_name} not found."
 
+    def set_effect(self, effect, color_name=None):
+        """Turn one effect on (default shade when no color) or "off"."""
+        if effect not in EFFECTS:
+            return f"Effect {effect} not found."
+        if color_name == "off":
+            self.compositor.clear(effect)
+            return f"Removed {effect}."
+        color_name = color_name or EFFECTS[effect].color
+        color = self.COLORS.get(color_name) or self.SHADES.get(color_name)
+        if color is None:
+            return f"Color {color_name} not found."
+        self.compositor.set_layer(effect, color, EFFECTS[effect].opacity)
+        return f"Applying {color_name} {effect}."
+
     def cycle_color(self):
         color_keys = list(self.COLORS.keys())
         if self.current_color is None:
@@ -85,75 +327,97 @@ class ARMakeup:
 
     def check_touch(self, cursor_x, cursor_y, frame_w, frame_h):
         """
-        Check if normalized cursor (0.0-1.0) is inside the lip mask.
+        Check if normalized cursor (0.0-1.0) is on the lips.
         cursor_x: 0.0 (Left) to 1.0 (Right)
+        Analytic polygon test (outer minus inner contour), no mask needed.
         """
-        if self.current_lip_mask is None: return False
-        
-        # Scale cursor
-        cx, cy = int(cursor_x * frame_w), int(cursor_y * frame_h)
+        lips = self.current_lips
+        if lips is None: return False
+        outer, inner = lips
         
-        # Check against mask (255 where lips are)
-        # Boundary check
-        if 0 <= cx < frame_w and 0 <= cy < frame_h:
-            # If mask pixel > 0, it's a hit
-            if self.current_lip_mask[cy, cx] > 0:
-                return True
-        return False
+        # Compare in pixel space so the aspect ratio matches the image
+        scale = np.array([frame_w, frame_h], dtype=np.float32)
+        return lip_hit(cursor_x * frame_w, cursor_y * frame_h, outer * scale, inner * scale)
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, packet=None):
         # Always run detection to get landmarks for touch, even if disabled?
-        # Yes, need landmarks for "Touch to apply".
+        # Yes, need landmarks for "Touch to apply" -- but with a scheduler,
+        # only at full rate when the result is visible or a touch is likely.
         
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        timestamp = int(time.time() * 1000) - self.start_time_ms
+        h, w, c = frame.shape
+        now = time.time()
+        
+        if self.scheduler is None or self.scheduler.should_detect(self.enabled, self.face_box, now):
+            with timings.time("face_detect"):
+                face = self.detect_face(frame, packet, now)
+        else:
+            face = self.predict_face(now)
+        
+        # Published as one tuple, so check_touch on another pipeline
+        # thread always sees a matching outer/inner pair
+        self.current_lips = (face[self.LIPS_OUTER], face[self.LIPS_INNER]) if face is not None else None
+        
+        # Masks are only rasterized when there is something to render
+        if face is not None and self.enabled:
+            pts = (face * np.array([w, h], dtype=np.float32)).astype(np.int32)
+            with timings.time("render"):
+                self.compositor.render(frame, pts)
+        return frame
+
+    def detect_face(self, frame, packet, now):
+        """Run the FaceLandmarker. Returns (N, 2) normalized landmarks or None."""
+        region = self.region if self.region is not None and not self.region.passthrough else None
+        wrap = not self.accepts_arrays
+        if packet is not None:
+            # Shared conversion from the FramePacket (frame is packet.bgr)
+            rgb = packet.rgb
+            mp_image = None if region or not wrap else packet.mp_image
+            timestamp = packet.timestamp_ms
+        else:
+            import mediapipe as mp
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            mp_image = None if region or not wrap else mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+            timestamp = int(time.time() * 1000) - self.start_time_ms
+        if region:
+            # Downscaled and/or cropped around the last face
+            mp_image, crop = region.prepare(rgb, wrap=wrap)
+        elif not wrap:
+            mp_image = rgb
         
         # Detect
         detection_result = self.landmarker.detect_for_video(mp_image, timestamp)
         
-        h, w, c = frame.shape
-        output_frame = frame
+        if not detection_result.face_landmarks:
+            self.face_track = []
+            self.face_box = None
+            if region: region.update(None)
+            return None
         
-        # Reset mask each frame
-        self.current_lip_mask = np.zeros((h, w), dtype=np.uint8)
+        # (N, 3) array in full-frame normalized coords
+        face = Landmarks.from_mp(detection_result.face_landmarks[0])
+        if region:
+            region.update(region.to_full(face.points, crop))
         
-        if detection_result.face_landmarks:
-            face_lms = detection_result.face_landmarks[0]
-            
-            def get_points(indices):
-                pts = []
-                for idx in indices:
-                    lm = face_lms[idx]
-                    px, py = int(lm.x * w), int(lm.y * h)
-                    pts.append((px, py))
-                return np.array(pts, dtype=np.int32)
-
-            outer_pts = get_points(self.LIPS_OUTER)
-            inner_pts = get_points(self.LIPS_INNER)
-            
-            # Create Donut Mask for Collision & Rendering
-            cv2.fillPoly(self.current_lip_mask, [outer_pts], 255)
-            cv2.fillPoly(self.current_lip_mask, [inner_pts], 0)
-            
-            # If Enabled, Render
-            if self.enabled and self.current_color is not None:
-                mask = self.current_lip_mask.copy()
-                mask = cv2.GaussianBlur(mask, (7, 7), 0)
-                
-                # Color Layer
-                colored_layer = np.zeros_like(frame)
-                colored_layer[:] = self.current_color
-                
-                # Blend (Manual implementation for speed/clarity)
-                # Convert to float
-                img_float = frame.astype(np.float32) / 255.0
-                color_float = colored_layer.astype(np.float32) / 255.0
-                mask_float = mask.astype(np.float32) / 255.0
-                mask_float = np.stack([mask_float]*3, axis=2)
-                
-                alpha_map = mask_float * self.lipstick_opacity
-                
-                out_float = (color_float * alpha_map) + (img_float * (1.0 - alpha_map))
-                output_frame = (out_float * 255).astype(np.uint8)
-                
-        return output_frame
+        xy = face.xy()
+        self.face_box = face.bbox()
+        self.face_track = (self.face_track + [(now, xy)])[-2:]
+        return xy
+
+    def detect_lips(self, frame, packet, now):
+        """detect_face() narrowed to the normalized (outer, inner) lip contours, or None."""
+        face = self.detect_face(frame, packet, now)
+        return (face[self.LIPS_OUTER], face[self.LIPS_INNER]) if face is not None else None
+
+    def predict_face(self, now):
+        """Carry the last landmarks forward (velocity-extrapolated) between detections."""
+        if not self.face_track: return None
+        t1, xy1 = self.face_track[-1]
+        if now - t1 > self.scheduler.max_carry_s:
+            return None # Too old to trust
+        if len(self.face_track) < 2:
+            return xy1
+        
+        t0, xy0 = self.face_track[0]
+        dt = min(now - t1, self.MAX_EXTRAPOLATE_MS / 1000.0)
+        k = dt / max(t1 - t0, 1e-3)
+        return xy1 + (xy1 - xy0) * k
@@ -0,0 +1,181 @@
+import queue
+import re
+import time
+from threading import Thread
+from perf import timings
+from startup import clock
+
+
+class AssistantWorker(Thread):
+    """
+    Runs the LLM side of Narcissus off the vision loop.
+
+    Voice commands go in through submit(). The worker streams the model
+    reply, executes tool calls, pushes partial text to the alert UI while it
+    streams, and reports the final result back to the main loop as an
+    {"type": "assistant", ...} event on `result_queue`.
+    Chat history lives in a ConversationMemory (token-budgeted).
+    preload=True loads the model as soon as the thread starts, and
+    keep_alive (Ollama semantics, -1 = forever) keeps it resident between
+    turns, so no command pays for a cold model load.
+    With a ResponseCache (response_cache.py), repeated commands in the same
+    cache_state() (mode, makeup) replay the cached turn instead of calling
+    the model.
+    """
+    PARTIAL_ALERT_INTERVAL = 0.5 # seconds between streamed alert updates
+
+    def __init__(self, result_queue, memory, tools, run_tool, show_alert, model='llama3.2', client=None,
+                 preload=False, keep_alive=None, cache=None, cache_state=None):
+        super().__init__(daemon=True)
+        self.result_queue = result_queue
+        self.memory = memory
+        self.tools = tools
+        self.run_tool = run_tool  # (name, args) -> (tool_res, state)
+        self.show_alert = show_alert  # (text) -> None
+        self.model = model
+        # ollama module, ollama.Client(host=...) (e.g. a local fake server) or
+        # a zero-arg factory of one; built/imported on the worker thread, off
+        # the startup path
+        self.client = client
+        self.preload = preload
+        self.keep_alive = keep_alive
+        self.cache = cache
+        self.cache_state = cache_state or (lambda: ())
+        self.inbox = queue.Queue()
+        self.running = True
+        self.last_eval = (None, None) # (prompt_eval_count, prompt_eval_ms) of the last call
+
+    def submit(self, command, suppress_alert=False):
+        self.inbox.put({"content": command, "suppress_alert": suppress_alert, "time": time.time()})
+
+    def stop(self):
+        self.running = False
+        self.inbox.put(None)
+
+    def load_model(self):
+        """Load (and with keep_alive, pin) the model: an empty chat makes Ollama load it and return."""
+        t0 = time.perf_counter()
+        try:
+            self.client.chat(model=self.model, messages=[], **self._keep_alive())
+        except Exception as e:
+            print(f"🤖 Model preload failed: {e}")
+            return
+        clock.mark("llm_ready")
+        print(f"🤖 {self.model} loaded in {time.perf_counter() - t0:.1f}s")
+
+    def _keep_alive(self):
+        return {"keep_alive": self.keep_alive} if self.keep_alive is not None else {}
+
+    def run(self):
+        if self.client is None:
+            import ollama
+            self.client = ollama
+        elif not hasattr(self.client, "chat"):
+            self.client = self.client()
+        if self.preload:
+            self.load_model()
+        while self.running:
+            event = self.inbox.get()
+            if event is None: continue
+            try:
+                self.handle(event)
+            except Exception as e:
+                print(f"🤖 Assistant Error: {e}")
+                self.result_queue.put({"type": "assistant", "content": None, "state": {}, "error": str(e)})
+
+    def stream_chat(self, tools=None, on_partial=None):
+        """One streamed ollama.chat call. Returns (content, tool_calls)."""
+        content = ""
+        tool_calls = []
+        kwargs = {"tools": tools} if tools else {}
+        kwargs.update(self._keep_alive())
+        t0 = time.perf_counter()
+        for chunk in self.client.chat(model=self.model, messages=self.memory.messages(), stream=True, **kwargs):
+            if chunk.done:
+                eval_ms = chunk.prompt_eval_duration / 1e6 if chunk.prompt_eval_duration else None
+                self.last_eval = (chunk.prompt_eval_count, eval_ms)
+            msg = chunk.message
+            if msg.tool_calls:
+                tool_calls.extend(msg.tool_calls)
+            if msg.content:
+                content += msg.content
+                if on_partial and not tool_calls:
+                    on_partial(content)
+        timings.record("llm_chat", time.perf_counter() - t0)
+        return content, tool_calls
+
+    def handle(self, event):
+        user_msg = event["content"]
+        suppress_alert = event.get("suppress_alert", False)
+        self.memory.append({'role': 'user', 'content': user_msg})
+
+        is_makeup_action = False
+        state = {}
+
+        last_partial = [0.0]
+        def on_partial(text):
+            # Throttled so Remote-Control isn't flooded with alerts
+            if suppress_alert or state.get('makeup') or len(text) <= 5: return
+            if time.time() - last_partial[0] < self.PARTIAL_ALERT_INTERVAL: return
+            last_partial[0] = time.time()
+            self.show_alert(text + " …")
+
+        t0 = time.time()
+        key = self.cache.key(user_msg, self.cache_state()) if self.cache else None
+        cached = self.cache.get(key) if key else None
+        llm_s = 0.0 # time spent in the model this turn
+        if cached:
+            print("♻️ Cached turn")
+            ai_content, tool_calls = cached["first_content"], cached["tool_calls"]
+        else:
+            print("Thinking...")
+            ai_content, tool_calls = self.stream_chat(self.tools, on_partial)
+            llm_s += time.time() - t0
+            tool_calls = [(tool.function.name, dict(tool.function.arguments)) for tool in tool_calls]
+        first_content = ai_content
+
+        tool_results = []
+        if tool_calls:
+            for name, args in tool_calls:
+                print(f"🤖 AI DECISION: {name} {args}")
+
+                tool_res, tool_state = self.run_tool(name, args)
+                if tool_state.get('reply'):
+                    ai_content = tool_state['reply']
+                if tool_state.get('makeup'):
+                    is_makeup_action = True
+                state.update(tool_state)
+
+                self.memory.append({'role': 'tool', 'content': str(tool_res)})
+                tool_results.append(str(tool_res))
+
+            if not ai_content and cached and tool_results == cached["tool_results"]:
+                ai_content = cached["content"] # Same results as last time: same summary
+            elif not ai_content:
+                t1 = time.time()
+                ai_content, _ = self.stream_chat(on_partial=on_partial)
+                llm_s += time.time() - t1
+        self.memory.append({'role': 'assistant', 'content': ai_content})
+
+        if cached:
+            self.cache.record_hit(cached, llm_s, tool_results, ai_content)
+        elif key:
+            self.cache.put(key, first_content, tool_calls, tool_results, ai_content, llm_s)
+
+        latency = time.time() - t0
+        timings.record("assistant_turn", latency)
+        clock.mark("first_answer")
+        self.memory.record_turn(latency, *(self.last_eval if llm_s else (None, None)))
+        print(f"🪞 NARCISSUS: {ai_content} ({latency:.1f}s)")
+        mem = self.memory.stats()
+        print(f"🧠 Memory: ~{mem['prompt_tokens_est']}/{mem['token_budget']} tokens, {mem['messages']} msgs, {mem['compactions']} compactions")
+
+        # CLEAN TEXT
+        clean_text = ai_content or ""
+        match = re.search(r'alert\s*\(\s*[\'"](.*?)[\'"]\s*\)', clean_text, re.DOTALL)
+        if match: clean_text = match.group(1)
+
+        if len(clean_text) > 5 and not is_makeup_action and not suppress_alert:
+            self.show_alert(clean_text)
+
+        self.result_queue.put({"type": "assistant", "content": ai_content, "state": state})
@@ -0,0 +1,1154 @@
+"""
+Micro-benchmarks for the Narcissus backend.
+
+    python benchmark.py                # list benchmarks
+    python benchmark.py frame_packet --frames 300 --width 1280 --height 720
+    python benchmark.py e2e --frames 600 --out base.json   # full-system replay, see replay.py
+
+Each benchmark runs offline (no camera, microphone, Ollama or MagicMirror).
+"""
+import argparse
+import time
+import tracemalloc
+import cv2
+import numpy as np
+
+BENCHMARKS = {}
+
+
+def benchmark(fn):
+    BENCHMARKS[fn.__name__.replace("bench_", "")] = fn
+    return fn
+
+
+def synthetic_frame(w, h, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+
+
+def measure(step, frames):
+    """Run step() `frames` times. Returns (ms/frame, KB allocated/frame)."""
+    step() # Warm up (first call may allocate pools)
+    tracemalloc.start()
+    alloc = 0
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        step()
+        alloc += tracemalloc.get_traced_memory()[1] - base
+    elapsed = time.perf_counter() - t0
+    tracemalloc.stop()
+    return 1000 * elapsed / frames, alloc / frames / 1024
+
+
+def percentiles(samples, pcts=(50, 95, 99)):
+    if not samples: return {p: float("nan") for p in pcts}
+    return {p: float(np.percentile(samples, p)) for p in pcts}
+
+
+def report(name, ms, kb):
+    print(f"   {name:<28} {ms:8.3f} ms/frame   {kb:10.1f} KB alloc/frame")
+
+
+@benchmark
+def bench_frame_packet(args):
+    """Per-frame flip + copy + 2x RGB conversion vs one pooled FramePacket."""
+    from frame_packet import FramePool
+
+    raw = synthetic_frame(args.width, args.height)
+
+    def legacy():
+        frame = cv2.flip(raw, 1)
+        debug_frame = frame.copy()
+        cv2.cvtColor(debug_frame, cv2.COLOR_BGR2RGB) # HandDetector
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) # ARMakeup
+
+    pool = FramePool()
+    def pooled():
+        packet = pool.fill(raw)
+        packet.release()
+
+    print(f"📊 frame_packet @ {args.width}x{args.height}")
+    report("legacy (per-frame arrays)", *measure(legacy, args.frames))
+    report("FramePool / FramePacket", *measure(pooled, args.frames))
+
+
+def legacy_render_lips(frame, outer_pts, inner_pts, color, opacity):
+    """The original full-frame float32 lipstick blend (reference output)."""
+    h, w = frame.shape[:2]
+    lip_mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.fillPoly(lip_mask, [outer_pts], 255)
+    cv2.fillPoly(lip_mask, [inner_pts], 0)
+    mask = cv2.GaussianBlur(lip_mask, (7, 7), 0)
+    colored_layer = np.zeros_like(frame)
+    colored_layer[:] = color
+    img_float = frame.astype(np.float32) / 255.0
+    color_float = colored_layer.astype(np.float32) / 255.0
+    mask_float = np.stack([mask.astype(np.float32) / 255.0]*3, axis=2)
+    alpha_map = mask_float * opacity
+    out_float = (color_float * alpha_map) + (img_float * (1.0 - alpha_map))
+    return (out_float * 255).astype(np.uint8)
+
+
+def synthetic_lips(w, h):
+    """Lip contours (outer, inner) scaled to the frame, roughly mouth-sized."""
+    t = np.linspace(0, 2 * np.pi, 21, endpoint=False)
+    cx, cy, rx, ry = w * 0.5, h * 0.6, w * 0.06, h * 0.035
+    outer = np.stack([cx + rx * np.cos(t), cy + ry * np.sin(t)], axis=1)
+    inner = np.stack([cx + rx * 0.7 * np.cos(t), cy + ry * 0.25 * np.sin(t)], axis=1)
+    return outer.astype(np.int32), inner.astype(np.int32)
+
+
+def synthetic_face(w, h):
+    """(478, 2) int32 pixel landmarks: lips from synthetic_lips, cheeks, eyelids and brows placed around them."""
+    from landmarks import (LIPS_OUTER, LIPS_INNER, CHEEK_LEFT, CHEEK_RIGHT,
+                           UPPER_LID_LEFT, UPPER_LID_RIGHT, EYESHADOW_LEFT, EYESHADOW_RIGHT)
+
+    def ring(n, cx, cy, rx, ry, t0=0.0, t1=2 * np.pi, endpoint=False):
+        t = np.linspace(t0, t1, n, endpoint=endpoint)
+        return np.stack([cx + rx * np.cos(t), cy + ry * np.sin(t)], axis=1)
+
+    pts = np.tile([w * 0.5, h * 0.45], (478, 1))
+    pts[234], pts[454] = (w * 0.36, h * 0.45), (w * 0.64, h * 0.45) # face edges, sets the face width
+    pts[LIPS_OUTER], pts[LIPS_INNER] = synthetic_lips(w, h)
+    for side, cheek, lid, shadow in ((-1, CHEEK_LEFT, UPPER_LID_LEFT, EYESHADOW_LEFT),
+                                     (1, CHEEK_RIGHT, UPPER_LID_RIGHT, EYESHADOW_RIGHT)):
+        cx = w * (0.5 + side * 0.07)
+        pts[cheek] = ring(len(cheek), cx + side * w * 0.015, h * 0.52, w * 0.03, h * 0.03)
+        # Eyeshadow = upper lid arc followed by a brow-side arc running back
+        pts[shadow] = np.concatenate([ring(len(lid), cx, h * 0.4, w * 0.03, h * 0.015, np.pi, 2 * np.pi, True),
+                                      ring(len(shadow) - len(lid), cx, h * 0.4, w * 0.032, h * 0.035,
+                                           2 * np.pi, np.pi, True)])
+    return pts.astype(np.int32)
+
+
+@benchmark
+def bench_lip_render(args):
+    """Full-frame float32 lipstick blend vs the ROI fixed-point compositor, per resolution."""
+    from ar_makeup import ARMakeup
+
+    ar_app = ARMakeup(landmarker=object()) # render only, no detection
+    ar_app.set_color("red")
+
+    for w, h in [(640, 480), (1280, 720), (1920, 1080)]:
+        frame = synthetic_frame(w, h)
+        pts = synthetic_face(w, h)
+        outer, inner = pts[ar_app.LIPS_OUTER], pts[ar_app.LIPS_INNER]
+        work = frame.copy()
+
+        ref = legacy_render_lips(frame, outer, inner, ar_app.current_color, ar_app.lipstick_opacity)
+        np.copyto(work, frame)
+        out = ar_app.compositor.render(work, pts)
+        diff = int(np.abs(out.astype(np.int16) - ref).max())
+
+        print(f"📊 lip_render @ {w}x{h} (max diff vs legacy: {diff})")
+        report("legacy float32 full-frame",
+               *measure(lambda: legacy_render_lips(frame, outer, inner, ar_app.current_color, ar_app.lipstick_opacity), args.frames))
+        report("ROI fixed-point compositor",
+               *measure(lambda: ar_app.compositor.render(work, pts), args.frames))
+
+
+def sequential_blend(frame, pts, compositor):
+    """One full-resolution ROI blend per effect, each a read-modify-write of its own region."""
+    face_w = int(np.ptp(pts[:, 0]))
+    h, w = frame.shape[:2]
+    for name, (color, opacity) in compositor.layers.items():
+        effect = compositor.effects[name]
+        k, t = effect.kernel(face_w), effect.thickness(face_w)
+        x0, y0, x1, y1 = effect.box(pts, face_w, w, h)
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        effect.draw(mask, pts - np.array([x0, y0], dtype=np.int32), t)
+        if k > 1: mask = cv2.GaussianBlur(mask, (k, k), 0)
+        a = ((mask.astype(np.uint16) * opacity) >> 8)[..., None]
+        roi = frame[y0:y1, x0:x1]
+        roi[:] = ((roi.astype(np.uint16) * (255 - a) + color * a + 127) // 255).astype(np.uint8)
+    return frame
+
+
+@benchmark
+def bench_makeup(args):
+    """1-4 makeup effects: one full-resolution blend per effect vs MakeupCompositor."""
+    from ar_makeup import ARMakeup
+
+    frame = synthetic_frame(args.width, args.height)
+    pts = synthetic_face(args.width, args.height)
+    work = frame.copy()
+    print(f"📊 makeup @ {args.width}x{args.height}")
+    for effects in (["lipstick"], ["lipstick", "blush"], ["lipstick", "blush", "eyeshadow"],
+                    ["lipstick", "blush", "eyeshadow", "eyeliner"]):
+        ar_app = ARMakeup(landmarker=object())
+        for effect in effects:
+            ar_app.set_effect(effect)
+        ref = sequential_blend(frame.copy(), pts, ar_app.compositor)
+        out = ar_app.compositor.render(frame.copy(), pts)
+        diff = int(np.abs(out.astype(np.int16) - ref).max())
+        print(f"   {' + '.join(effects)} (max diff: {diff})")
+        report("  one blend per effect", *measure(lambda: sequential_blend(work, pts, ar_app.compositor), args.frames))
+        report("  MakeupCompositor", *measure(lambda: ar_app.compositor.render(work, pts), args.frames))
+
+
+@benchmark
+def bench_cursor(args):
+    """Cursor SSE channel: publish -> stand-in subscriber latency and rate limiting."""
+    import json
+    import threading
+    import urllib.request
+    from video_server import VideoServer
+
+    server = VideoServer(host="127.0.0.1", port=args.port)
+    server.start()
+    time.sleep(0.5)
+
+    latencies = []
+    def subscriber():
+        # Stand-in for MMM-NarcissusMirror's EventSource
+        stream = urllib.request.urlopen(f"http://127.0.0.1:{args.port}/cursor_stream")
+        for line in stream:
+            if line.startswith(b"data: "):
+                payload = json.loads(line[6:])
+                latencies.append(time.time() * 1000 - payload["t"])
+    threading.Thread(target=subscriber, daemon=True).start()
+    time.sleep(0.3)
+
+    # Hand moving at 60 Hz for half the frames, then holding still
+    t0 = time.perf_counter()
+    for i in range(args.frames):
+        x = 0.2 + 0.6 * min(i, args.frames // 2) / args.frames
+        t = time.perf_counter()
+        server.publish_cursor({'x': x, 'y': 0.5})
+        publish_cost = time.perf_counter() - t
+        time.sleep(max(0, 1 / 60 - publish_cost))
+    elapsed = time.perf_counter() - t0
+    time.sleep(0.2)
+
+    channel = server.cursor_channel
+    p = percentiles(latencies)
+    print(f"📊 cursor over {elapsed:.1f}s ({args.frames} hand frames @ 60 Hz, still for the last half)")
+    print(f"   published (changed): {channel.published}   received: {len(latencies)}")
+    print(f"   latency p50 {p[50]:.2f} ms   p95 {p[95]:.2f} ms   p99 {p[99]:.2f} ms")
+
+
+@benchmark
+def bench_assistant(args):
+    """Vision loop FPS while the AssistantWorker streams a reply from a fake Ollama."""
+    import queue
+    from assistant import AssistantWorker
+    from conversation_memory import ConversationMemory
+    from fakes import FakeOllamaServer
+
+    words = " ".join(["word"] * 60)
+    server = FakeOllamaServer(reply=lambda messages, tools: (words, []), token_delay=0.03).start()
+
+    alerts = []
+    results = queue.Queue()
+    worker = AssistantWorker(results, ConversationMemory("test"), tools=[],
+                             run_tool=lambda name, args: ("N/A", {}),
+                             show_alert=lambda text: alerts.append((time.time(), text)),
+                             client=server.client())
+    worker.start()
+
+    # Stand-in vision loop: ~30 FPS of fixed work, measured while the LLM answers
+    frame_times = []
+    t0 = time.time()
+    worker.submit("tell me a story")
+    done_at = None
+    while done_at is None or time.time() - done_at < 0.2:
+        t = time.perf_counter()
+        time.sleep(1 / 30)
+        frame_times.append(time.perf_counter() - t)
+        try:
+            results.get_nowait()
+            done_at = time.time()
+        except queue.Empty:
+            pass
+
+    first_alert = alerts[0][0] - t0 if alerts else float("nan")
+    print("📊 assistant (fake ollama, 60 tokens @ 30 ms)")
+    print(f"   reply done after {done_at - t0:.2f}s, first streamed alert after {first_alert:.2f}s, {len(alerts)} alert updates")
+    print(f"   vision loop during inference: {len(frame_times) / (time.time() - t0):.1f} FPS "
+          f"(max frame {1000 * max(frame_times):.1f} ms)")
+    worker.stop()
+    server.stop()
+
+
+@benchmark
+def bench_memory(args):
+    """Prompt size over a simulated day of turns: unbounded list vs ConversationMemory."""
+    from conversation_memory import ConversationMemory, estimate_tokens
+
+    search_result = "Some Title: " + "lorem ipsum dolor sit amet " * 70 # ~2 KB, like perform_search
+    plain = [{'role': 'system', 'content': 'You are Narcissus, a smart mirror.'}]
+    memory = ConversationMemory('You are Narcissus, a smart mirror.')
+
+    prefix_changes = 0
+    prev = None
+    for i in range(args.frames):
+        turn = [{'role': 'user', 'content': f"what is the news number {i}"}]
+        if i % 3 == 0:
+            turn.append({'role': 'tool', 'content': search_result})
+        turn.append({'role': 'assistant', 'content': "Here is what I found about that topic today."})
+        for msg in turn:
+            plain.append(dict(msg))
+            memory.append(dict(msg))
+
+        # Prefix stability: did anything before the newest turn change?
+        msgs = memory.messages()
+        if prev is not None and msgs[:len(prev)] != prev:
+            prefix_changes += 1
+        prev = [dict(m) for m in msgs]
+
+    plain_tokens = sum(estimate_tokens(m['content']) for m in plain)
+    stats = memory.stats()
+    print(f"📊 memory after {args.frames} turns")
+    print(f"   unbounded list:     ~{plain_tokens} tokens, {len(plain)} messages")
+    print(f"   ConversationMemory: ~{stats['prompt_tokens_est']} tokens, {stats['messages']} messages "
+          f"(budget {stats['token_budget']}, {stats['compactions']} compactions, prefix changed on {prefix_changes} turns)")
+
+
+# (utterance after the wake word, expected route or None = goes to the LLM)
+ROUTING_CORPUS = [
+    ("mirror mode", ('control_hardware', {'setting': 'mirror_mode'})),
+    ("switch to mirror mode please", ('control_hardware', {'setting': 'mirror_mode'})),
+    ("show me the camera", ('control_hardware', {'setting': 'mirror_mode'})),
+    ("dashboard", ('control_hardware', {'setting': 'dashboard_mode'})),
+    ("go to the dashboard", ('control_hardware', {'setting': 'dashboard_mode'})),
+    ("hide video", ('control_hardware', {'setting': 'dashboard_mode'})),
+    ("red lipstick", ('control_makeup', {'color': 'red'})),
+    ("I want red lips", ('control_makeup', {'color': 'red'})),
+    ("apply pink lipstick", ('control_makeup', {'color': 'pink'})),
+    ("purple", ('control_makeup', {'color': 'purple'})),
+    ("give me some nude lips", ('control_makeup', {'color': 'nude'})),
+    ("dark lipstick", ('control_makeup', {'color': 'dark'})),
+    ("makeup off", ('control_makeup', {'color': 'off'})),
+    ("remove the lipstick", ('control_makeup', {'color': 'off', 'effect': 'lipstick'})),
+    ("lips off", ('control_makeup', {'color': 'off', 'effect': 'lipstick'})),
+    ("no lipstick please", ('control_makeup', {'color': 'off', 'effect': 'lipstick'})),
+    ("remove all makeup", ('control_makeup', {'color': 'off'})),
+    ("no makeup", ('control_makeup', {'color': 'off'})),
+    ("pink blush", ('control_makeup', {'color': 'pink', 'effect': 'blush'})),
+    ("apply brown eyeshadow", ('control_makeup', {'color': 'brown', 'effect': 'eyeshadow'})),
+    ("eyeliner", ('control_makeup', {'effect': 'eyeliner'})),
+    ("remove the eyeliner", ('control_makeup', {'color': 'off', 'effect': 'eyeliner'})),
+    ("brightness 40", ('control_hardware', {'setting': 'brightness', 'value': 40})),
+    ("set brightness to 75%", ('control_hardware', {'setting': 'brightness', 'value': 75})),
+    ("50 percent brightness", ('control_hardware', {'setting': 'brightness', 'value': 50})),
+    ("play bohemian rhapsody", ('play_youtube_music', {'query': 'bohemian rhapsody'})),
+    ("please play some jazz", ('play_youtube_music', {'query': 'jazz'})),
+    ("put on red lipstick", ('control_makeup', {'color': 'red'})),
+    ("put on some blush", ('control_makeup', {'effect': 'blush'})),
+    # Must fall through to the LLM
+    ("what's the weather in lagos", None),
+    ("who is the president of france", None),
+    ("tell me a joke", None),
+    ("turn the brightness up", None),
+    ("make it brighter", None),
+    ("dark", None),
+    ("play", None),
+    ("play some music", None),
+    ("brightness 400", None),
+    ("brightness", None),
+    ("set the brightness", None),
+    ("show me the brightness", None),
+    ("what color lipstick suits me", None),
+    ("mirror mode with red lips", None),
+    ("do i look tired", None),
+    ("black", None),
+    ("put on taylor swift", None), # "put on" is makeup first; music needs "play"
+    ("play a game with me", None),
+    ("play twenty questions", None),
+    ("let's play trivia", None),
+    ("play red lipstick", None),
+    ("play with me", None),
+]
+
+
+@benchmark
+def bench_intent_router(args):
+    """IntentRouter routing accuracy on a labelled corpus and per-command latency."""
+    from intent_router import IntentRouter
+    from simulation_multimodal import narcissus_tools
+
+    router = IntentRouter(narcissus_tools)
+    correct, false_routes, misses = 0, [], []
+    for text, expected in ROUTING_CORPUS:
+        got = router.route(text)
+        if got == expected:
+            correct += 1
+        elif expected is None:
+            false_routes.append((text, got))
+        else:
+            misses.append((text, got))
+
+    latencies = []
+    for _ in range(max(1, args.frames // len(ROUTING_CORPUS))):
+        for text, _ in ROUTING_CORPUS:
+            latencies.append(router.timed_route(text)[1])
+    p = percentiles(latencies)
+
+    print(f"📊 intent_router on {len(ROUTING_CORPUS)} commands ({len(router.phrases)} compiled phrases)")
+    print(f"   accuracy {correct}/{len(ROUTING_CORPUS)}   wrongly routed: {false_routes}   missed: {misses}")
+    print(f"   latency p50 {p[50]:.1f} µs   p99 {p[99]:.1f} µs")
+
+
+@benchmark
+def bench_search(args):
+    """SearchService against a fake 300 ms backend: miss vs hit latency, hit rate."""
+    from fakes import FakeSearchBackend
+    from search_cache import SearchService
+
+    backend = FakeSearchBackend(latency=0.3, fail_first=1)
+    day = [0.0]
+    service = SearchService(backend, backoff=0.1, clock=lambda: time.time() + day[0])
+
+    # A week of mornings: the same few questions, phrased slightly differently,
+    # each morning a day later on the service's clock (the web's answers change too)
+    mornings = ["weather in Lagos", "Weather in lagos?", "news headlines", "latest news headlines",
+                "who won the match last night", "News headlines!"]
+    miss_ms, hit_ms = [], []
+    stale_answers = 0
+    for morning in range(7):
+        day[0] = morning * 24 * 60 * 60
+        backend.edition = f"day {morning + 1}"
+        for q in mornings:
+            before = service.misses
+            t0 = time.perf_counter()
+            text = service.search(q)
+            (miss_ms if service.misses > before else hit_ms).append(1000 * (time.perf_counter() - t0))
+            stale_answers += backend.edition not in text and text != "No results found."
+
+    p_miss, p_hit = percentiles(miss_ms), percentiles(hit_ms)
+    print(f"📊 search ({len(miss_ms) + len(hit_ms)} queries over 7 days, backend 300 ms, first call fails)")
+    print(f"   miss p50 {p_miss[50]:.1f} ms   hit p50 {p_hit[50]:.3f} ms   backend calls: {backend.calls}   "
+          f"earlier days' answers served: {stale_answers}")
+    print(f"   stats: {service.stats()}")
+
+
+# Mode switches and alerts as the main loop issues them: repeated gestures,
+# "mirror mode" said while already in mirror mode, a quick back-and-forth
+UI_SCRIPT = ["mirror_mode", "mirror_mode", "alert", "dashboard_mode", "dashboard_mode", "mirror_mode",
+             "alert", "alert", "mirror_mode", "dashboard_mode", "mirror_mode", "dashboard_mode"]
+UI_GAP = 0.25
+
+
+def legacy_set_ui_state(base_url, action, message=None):
+    """The pre-ui_control set_ui_state: blocking calls, a new connection each."""
+    import requests
+    params = {"apiKey": "narcissus_secret"}
+    if action == "mirror_mode":
+        requests.get(f"{base_url}/module/all/hide", params=params, timeout=1)
+        requests.get(f"{base_url}/module/MMM-NarcissusMirror/show", params=params, timeout=1)
+        requests.get(f"{base_url}/notification/NARCISSUS_SHOW_VIDEO", params=params, timeout=1)
+    elif action == "dashboard_mode":
+        requests.get(f"{base_url}/module/all/show", params=params, timeout=1)
+        requests.get(f"{base_url}/notification/NARCISSUS_HIDE_VIDEO", params=params, timeout=1)
+    elif action == "alert":
+        requests.post(f"{base_url}/module/alert/showalert", params=params,
+                      json={"title": "Narcissus", "message": message, "timer": 5000}, timeout=1)
+
+
+@benchmark
+def bench_ui(args):
+    """Mode switches against a fake Remote-Control API (10 ms/request): legacy set_ui_state vs MirrorUI."""
+    from fakes import FakeRemoteControlServer
+    from perf import timings
+    from ui_control import MirrorUI
+
+    print(f"📊 ui: {len(UI_SCRIPT)} mode switches / alerts, {UI_GAP * 1000:.0f} ms apart, "
+          f"Remote-Control API 10 ms per request")
+    for name in ("legacy", "MirrorUI"):
+        server = FakeRemoteControlServer(latency=0.01).start()
+        ui = MirrorUI(server.url) if name == "MirrorUI" else None
+        timings.reset()
+        caller_ms = []
+        for action in UI_SCRIPT:
+            t0 = time.perf_counter()
+            if ui is None:
+                legacy_set_ui_state(server.url, action, "Hello")
+            elif action == "alert":
+                ui.show_alert("Hello")
+            else:
+                ui.set_mode(action.replace("_mode", ""))
+            caller_ms.append(1000 * (time.perf_counter() - t0))
+            time.sleep(UI_GAP)
+        if ui is not None: ui.close()
+        server.stop()
+
+        # Legacy: the caller waits for the whole switch; MirrorUI: request -> acknowledged, off-thread
+        if ui is None:
+            applied = percentiles([ms for ms, action in zip(caller_ms, UI_SCRIPT) if action != "alert"])[50]
+        else:
+            applied = timings.summary()["ui_mode"]["p50_ms"]
+        caller = percentiles(caller_ms)
+        print(f"   {name:<9} caller blocked p50 {caller[50]:7.3f} ms  max {max(caller_ms):7.3f} ms   "
+              f"switch applied p50 {applied:6.2f} ms   {len(server.requests)} requests, "
+              f"{server.connections} connections")
+        if ui is not None:
+            print(f"   {'':<9} {ui.stats()}")
+
+    # Gesture flapping: switches faster than MagicMirror answers coalesce
+    server = FakeRemoteControlServer(latency=0.01).start()
+    ui = MirrorUI(server.url)
+    for i in range(20):
+        ui.set_mode("mirror" if i % 2 else "dashboard")
+    ui.close()
+    server.stop()
+    print(f"   burst of 20 alternating switches: {len(server.requests)} requests, final mode {ui.mode}, "
+          f"{ui.stats()}")
+
+
+# A burst while the main loop is busy: gesture flapping, voice commands and
+# finished assistant turns, all within a few hundred ms
+EVENT_BURST = ([("gesture", "mirror_mode"), ("voice", "red lipstick"), ("gesture", "dashboard_mode"),
+                ("assistant", None), ("gesture", "mirror_mode"), ("voice", "what's the weather"),
+                ("gesture", "dashboard_mode"), ("assistant", None), ("voice", "tell me a joke"),
+                ("gesture", "mirror_mode")])
+
+
+def consume_events(events, scheduler, handle_s, stop):
+    """Main-loop stand-in: legacy get_nowait + 10 ms sleep polling, or a blocking scheduler get()."""
+    import queue
+    handled = []
+    while not stop.is_set():
+        try:
+            event = events.get(timeout=0.1) if scheduler else events.get_nowait()
+        except queue.Empty:
+            if not scheduler: time.sleep(0.01)
+            continue
+        handled.append((event, time.time()))
+        time.sleep(handle_s) # Acting on it (tool call, UI request)
+        if not scheduler: time.sleep(0.01)
+    return handled
+
+
+@benchmark
+def bench_events(args):
+    """Main loop events: FIFO queue + 10 ms polling vs EventScheduler (wake-up, burst backlog, staleness)."""
+    import queue
+    import threading
+    from event_scheduler import EventScheduler
+
+    handle_s = 0.3
+    print(f"📊 events: idle wake-up, then a burst of {len(EVENT_BURST)} events while each takes "
+          f"{handle_s * 1000:.0f} ms to act on")
+    for name in ("FIFO + poll", "EventScheduler"):
+        scheduler = name == "EventScheduler"
+        def make():
+            if not scheduler: return queue.Queue()
+            return EventScheduler(key=lambda e: "mode" if e["type"] == "gesture" else None)
+
+        # Idle: one event every 50 ms, the loop has nothing else to do
+        events, stop, out = make(), threading.Event(), []
+        consumer = threading.Thread(target=lambda: out.extend(consume_events(events, scheduler, 0.0, stop)))
+        consumer.start()
+        for i in range(40):
+            events.put({"type": "voice", "content": "hi", "time": time.time()})
+            time.sleep(0.05)
+        stop.set()
+        consumer.join()
+        wake = percentiles([1000 * (t - e["time"]) for e, t in out])
+
+        # Burst: everything arrives while the loop is busy with the first one
+        events, stop, out = make(), threading.Event(), []
+        consumer = threading.Thread(target=lambda: out.extend(consume_events(events, scheduler, handle_s, stop)))
+        consumer.start()
+        t0 = time.time()
+        for kind, content in EVENT_BURST:
+            events.put({"type": kind, "content": content, "time": time.time()})
+            time.sleep(0.02)
+        while events.qsize(): time.sleep(0.05)
+        time.sleep(handle_s + 0.1)
+        stop.set()
+        consumer.join()
+        modes = [(e, t) for e, t in out if e["type"] == "gesture"]
+        final_mode = (modes[-1][1] - t0) if modes and modes[-1][0]["content"] == EVENT_BURST[-1][1] else None
+        waits = [t - e["time"] for e, t in out]
+        print(f"   {name:<15} idle wake-up p50 {wake[50]:5.2f} ms  p95 {wake[95]:5.2f} ms   burst: handled "
+              f"{len(out)}/{len(EVENT_BURST)} ({len(modes)} mode switches), final mode applied after "
+              f"{1000 * final_mode:6.0f} ms, oldest event acted on {max(waits):.2f} s old")
+
+        # Stall: the loop was stuck for 2.5 s (a blocking call) while a gesture and a command came in
+        events, stop, out = make(), threading.Event(), []
+        events.put({"type": "gesture", "content": "mirror_mode", "time": time.time()})
+        events.put({"type": "voice", "content": "red lipstick", "time": time.time()})
+        time.sleep(2.5)
+        consumer = threading.Thread(target=lambda: out.extend(consume_events(events, scheduler, 0.0, stop)))
+        consumer.start()
+        time.sleep(0.2)
+        stop.set()
+        consumer.join()
+        print(f"   {'':<15} after a 2.5 s stall: acted on {[e['content'] for e, _ in out]}")
+        if scheduler:
+            print(f"   {'':<15} {events.stats()}")
+
+
+# A few mornings of the same questions (tools: search for weather/time, makeup)
+LLM_MORNING = ["tell me a joke", "what's the weather in Lagos", "What time is it in Lagos?",
+               "put on red lipstick please", "tell me more", "Tell me a joke!"]
+
+
+def llm_cache_reply(messages, tools):
+    """FakeOllamaServer reply: a tool call for weather/time/lipstick, a ~40-word answer otherwise."""
+    last = messages[-1] if messages else {}
+    text = last.get("content", "").lower()
+    if last.get("role") == "user" and tools:
+        if "weather" in text or "time" in text:
+            return "", [{"name": "search_web", "arguments": {"query": text}}]
+        if "lipstick" in text:
+            return "", [{"name": "control_makeup", "arguments": {"color": "red"}}]
+    if last.get("role") == "tool":
+        return "Here is what I found: " + " ".join(["word"] * 25), []
+    return " ".join(["word"] * 40), []
+
+
+@benchmark
+def bench_llm_cache(args):
+    """Repeated voice commands through the AssistantWorker with and without the ResponseCache."""
+    import queue
+    from assistant import AssistantWorker
+    from conversation_memory import ConversationMemory
+    from fakes import FakeOllamaServer
+    from response_cache import ResponseCache
+
+    def run_tool(name, args):
+        if name == "search_web":
+            # Time answers change every minute (here: every call), weather doesn't
+            return (f"{time.time():.0f}" if "time" in args["query"] else "Sunny, 31 C"), {}
+        return "Applied red lipstick", {"makeup": True}
+
+    print(f"📊 llm_cache: {len(LLM_MORNING)} commands x 4 mornings, fake Ollama streaming at "
+          f"{args.token_ms:.0f} ms/word")
+    for name in ("no cache", "ResponseCache"):
+        server = FakeOllamaServer(reply=llm_cache_reply, token_delay=args.token_ms / 1000).start()
+        results = queue.Queue()
+        cache = ResponseCache() if name == "ResponseCache" else None
+        worker = AssistantWorker(results, ConversationMemory("test"), tools=[{"type": "function"}],
+                                 run_tool=run_tool, show_alert=lambda text: None, client=server.client(),
+                                 cache=cache, cache_state=lambda: ("dashboard",))
+        worker.start()
+        turn_ms = []
+        for _ in range(4):
+            for command in LLM_MORNING:
+                t0 = time.perf_counter()
+                worker.submit(command)
+                results.get()
+                turn_ms.append(1000 * (time.perf_counter() - t0))
+        worker.stop()
+        server.stop()
+        p = percentiles(turn_ms)
+        print(f"   {name:<14} turn p50 {p[50]:7.1f} ms  p95 {p[95]:7.1f} ms  total {sum(turn_ms) / 1000:5.2f} s   "
+              f"{server.requests} LLM requests")
+        if cache:
+            print(f"   {'':<14} {cache.stats()}")
+
+
+# What the microphone picks up, one utterance every UTTERANCE_GAP seconds
+# ('' = noise nothing was recognized in)
+UTTERANCE_SCRIPT = [
+    "", "mirror red lipstick", "and then i told him", "", "hey mirror what's the weather",
+    "narcissus", "mirror dashboard", "", "smart mirror tell me a joke", "turn it up",
+    "mirror mirror mode", "hey narcissus pink lipstick",
+]
+UTTERANCE_GAP = 0.4
+
+
+@benchmark
+def bench_voice_workers(args):
+    """Recognition on the listening thread (old) vs RecognitionPool, stub recognizer ~1 s +/- 0.5 s."""
+    import queue
+    import threading
+    from fakes import FakeRecognizer
+    from recognition import RecognitionPool, match_wake_word
+
+    expected = [m[1] for m in map(match_wake_word, UTTERANCE_SCRIPT) if m and m[1]]
+    print(f"📊 voice_workers ({len(UTTERANCE_SCRIPT)} utterances, {UTTERANCE_GAP}s apart, {len(expected)} commands)")
+
+    for label, workers in (("serial (old callback)", 0), ("pool, 1 worker", 1), ("pool, 3 workers", 3)):
+        recognize = FakeRecognizer()
+        delivered = []
+        on_command = lambda command, delivered=delivered: delivered.append((command, time.time()))
+
+        spoken = {}
+        if workers == 0:
+            # Old behaviour: phrases queue up behind one synchronous recognizer
+            backlog = queue.Queue()
+            def listen_thread():
+                while True:
+                    text = backlog.get()
+                    if text is None: return
+                    match = match_wake_word(recognize(text) or "")
+                    if match and match[1]: on_command(match[1])
+            worker = threading.Thread(target=listen_thread, daemon=True)
+            worker.start()
+            submit = backlog.put
+        else:
+            pool = RecognitionPool(on_command, recognize, workers=workers)
+            submit = pool.submit
+
+        for text in UTTERANCE_SCRIPT:
+            match = match_wake_word(text)
+            if match and match[1]: spoken.setdefault(match[1], time.time())
+            submit(text)
+            time.sleep(UTTERANCE_GAP)
+
+        # Serial: wait for the backlog to drain; pool: for the last recognitions
+        time.sleep(recognize.latency + recognize.jitter + 0.1)
+        if workers == 0:
+            backlog.put(None)
+            worker.join()
+        else:
+            pool.shutdown()
+        order = [c for c, _ in delivered]
+        in_order = order == [c for c in expected if c in order]
+        lat = percentiles([1000 * (t - spoken[c]) for c, t in delivered])
+        extra = f", cancelled {pool.cancelled}" if workers else ""
+        print(f"   {label:<22} delivered {len(delivered)}/{len(expected)}{extra}, in order: {in_order}, "
+              f"latency p50 {lat[50]:.0f} ms / max {max((1000 * (t - spoken[c]) for c, t in delivered), default=0):.0f} ms")
+
+
+def synthetic_speech(seconds, rate, rng, level=3000.0):
+    """Voiced harmonics under three formants, 4 Hz syllable envelope."""
+    t = np.arange(int(seconds * rate)) / rate
+    f0 = 130 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    x = np.zeros_like(t)
+    for k in range(1, 26):
+        f = k * 140
+        gain = sum(np.exp(-((f - c) / 250.0) ** 2) for c in (500, 1500, 2500)) + 0.05
+        x += gain * np.sin(k * phase)
+    envelope = 0.2 + 0.8 * np.abs(np.sin(2 * np.pi * 2.0 * t + rng.uniform(0, np.pi)))
+    return level * envelope * x / np.abs(x).max()
+
+
+def synthetic_audio(kind, rate, rng):
+    """PCM fixture for bench_vad: (int16 samples, utterances a listener should hear)."""
+    quiet = lambda s: rng.normal(0, 30, int(s * rate))
+    dryer = lambda s: rng.normal(0, 1500, int(s * rate))
+    if kind == "speech":
+        parts, expected = [quiet(1), synthetic_speech(2, rate, rng) + quiet(2), quiet(1.5),
+                           synthetic_speech(1.5, rate, rng) + quiet(1.5), quiet(1)], 2
+    elif kind == "hair_dryer":
+        parts, expected = [quiet(1), dryer(6), quiet(1)], 0
+    elif kind == "speech_over_dryer":
+        parts, expected = [dryer(3), synthetic_speech(2, rate, rng, level=12000) + dryer(2), dryer(2)], 1
+    elif kind == "short_blips": # "uh", "hm": voiced but too short to be a command
+        parts, expected = [], 0
+        for _ in range(4):
+            parts += [quiet(1), synthetic_speech(0.2, rate, rng)]
+        parts.append(quiet(1))
+    else: # knocks / clicks
+        parts, expected = [], 0
+        for _ in range(6):
+            knock = rng.normal(0, 8000, int(0.06 * rate)) * np.exp(-np.arange(int(0.06 * rate)) / (0.01 * rate))
+            parts += [quiet(0.8), knock]
+    pcm = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    return pcm, expected
+
+
+def energy_segments(pcm, rate, threshold=120, pause_s=0.8, phrase_s=0.3, chunk=1024):
+    """What speech_recognition's listen() sends: energy above threshold, phrase >= phrase_s."""
+    count, in_phrase, loud, quiet_s = 0, False, 0.0, 0.0
+    for i in range(0, len(pcm) - chunk, chunk):
+        rms = np.sqrt(np.mean(pcm[i:i + chunk].astype(np.float32) ** 2))
+        dt = chunk / rate
+        if rms > threshold:
+            in_phrase, loud, quiet_s = True, loud + dt, 0.0
+        elif in_phrase:
+            quiet_s += dt
+            if quiet_s >= pause_s:
+                count += loud >= phrase_s
+                in_phrase, loud = False, 0.0
+    return count + (in_phrase and loud >= phrase_s)
+
+
+@benchmark
+def bench_vad(args):
+    """Recognition requests per WAV fixture: energy threshold (old) vs StreamingVAD."""
+    import os
+    import tempfile
+    from vad import segment_wav, write_wav
+
+    rate = 16000
+    rng = np.random.default_rng(0)
+    print("📊 vad (synthetic 16 kHz WAV fixtures)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in ("speech", "hair_dryer", "speech_over_dryer", "short_blips", "knocks"):
+            pcm, expected = synthetic_audio(kind, rate, rng)
+            path = os.path.join(tmp, kind + ".wav")
+            write_wav(path, pcm, rate)
+
+            t0 = time.perf_counter()
+            segments, vad = segment_wav(path)
+            cost = 1000 * (time.perf_counter() - t0) / (len(pcm) / rate)
+            st = vad.stats()
+            print(f"   {kind:<18} expected {expected}   energy: {energy_segments(pcm, rate)} requests   "
+                  f"VAD: {len(segments)} requests (dropped {st['dropped_short']} short, "
+                  f"{st['dropped_nonspeech']} non-speech)   {cost:.2f} ms per audio second")
+
+
+def frame_source(args):
+    """Frames from --video (looped) or synthetic ones."""
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+                if not ret: raise RuntimeError(f"Cannot read {args.video}")
+            yield frame
+    frame = synthetic_frame(args.width, args.height)
+    while True:
+        yield frame
+
+
+@benchmark
+def bench_face_schedule(args):
+    """FaceLandmarker CPU per frame with/without FaceScheduler, per mirror state."""
+    from ar_makeup import ARMakeup
+    from face_scheduler import FaceScheduler
+    from fakes import FakeFaceLandmarker
+    from frame_packet import FramePool
+
+    # (label, mode, makeup color, cursor trajectory)
+    scenarios = [
+        ("dashboard, makeup off, no hand", "dashboard", "off", lambda i: {'x': -1, 'y': -1}),
+        ("dashboard, hand at the edge", "dashboard", "off", lambda i: {'x': 0.1, 'y': 0.5}),
+        ("dashboard, hand near face", "dashboard", "off", lambda i: {'x': 0.5, 'y': 0.6}),
+        ("mirror, red lipstick", "mirror", "red", lambda i: {'x': -1, 'y': -1}),
+    ]
+    print(f"📊 face_schedule ({args.frames} frames @ 30 FPS, landmarker {args.landmarker_ms} ms CPU/call)")
+    for label, mode, color, cursor in scenarios:
+        for scheduled in (False, True):
+            # --real-models: the actual FaceLandmarker (needs face_landmarker.task), best with --video
+            fake = None if args.real_models else FakeFaceLandmarker(cost_ms=args.landmarker_ms)
+            scheduler = FaceScheduler() if scheduled else None
+            ar_app = ARMakeup(landmarker=fake, scheduler=scheduler)
+            if fake: fake.set_lips(ar_app.LIPS_OUTER, ar_app.LIPS_INNER)
+            ar_app.set_color(color)
+            if scheduler: scheduler.mode = mode
+
+            pool = FramePool()
+            frames = frame_source(args)
+            cpu = 0.0
+            for i in range(args.frames):
+                packet = pool.fill(next(frames))
+                if scheduler: scheduler.update_cursor(cursor(i))
+                t0 = time.process_time()
+                ar_app.process_frame(packet.bgr, packet=packet)
+                cpu += time.process_time() - t0
+                packet.release()
+                time.sleep(1 / 30) # Real-time pacing for the background rate
+
+            detections = scheduler.detections if scheduler else args.frames
+            name = ("scheduled: " if scheduled else "every frame: ") + label
+            print(f"   {name:<52} {1000 * cpu / args.frames:7.2f} ms CPU/frame   {detections:4d} detections")
+
+
+@benchmark
+def bench_inference_res(args):
+    """Landmarker latency and landmark error vs full-res, per input scale / ROI mode."""
+    from ar_makeup import ARMakeup
+    from fakes import FakeFaceLandmarker, FakeHandLandmarker
+    from frame_packet import FramePool
+    from gesture_input import HandDetector
+    from roi import InferenceRegion
+
+    configs = [("full frame", 1.0, False), ("scale 0.75", 0.75, False), ("scale 0.5", 0.5, False),
+               ("ROI tracking", 1.0, True), ("ROI + scale 0.5", 0.5, True)]
+
+    # Record the frames once so every config sees identical input
+    frames = frame_source(args)
+    clip = [next(frames).copy() for _ in range(args.frames)]
+    full_pixels = clip[0].shape[0] * clip[0].shape[1]
+
+    baseline = None
+    print(f"📊 inference_res ({len(clip)} frames @ {clip[0].shape[1]}x{clip[0].shape[0]}, "
+          f"{'MediaPipe models' if args.real_models else 'stand-in models, cost ~ input area'})")
+    for label, scale, roi in configs:
+        if args.real_models:
+            detector = HandDetector(region=InferenceRegion(scale=scale, roi_tracking=roi))
+            ar_app = ARMakeup(region=InferenceRegion(scale=scale, roi_tracking=roi))
+        else:
+            detector = HandDetector(landmarker=FakeHandLandmarker(full_pixels=full_pixels),
+                                    region=InferenceRegion(scale=scale, roi_tracking=roi))
+            fake_face = FakeFaceLandmarker(full_pixels=full_pixels)
+            ar_app = ARMakeup(landmarker=fake_face, region=InferenceRegion(scale=scale, roi_tracking=roi))
+            fake_face.set_lips(ar_app.LIPS_OUTER, ar_app.LIPS_INNER)
+
+        pool = FramePool()
+        hand_ms, face_ms, tips, lips = [], [], [], []
+        for i, frame in enumerate(clip):
+            packet = pool.fill(frame)
+            packet.timestamp_ms = i * 33 # Same timeline for every config
+            t0 = time.perf_counter()
+            detector.prev_x = -1 # Raw (unsmoothed) tip for the error figure
+            _, _, cursor = detector.find_gestures(None, packet=packet)
+            t1 = time.perf_counter()
+            lip = ar_app.detect_lips(packet.bgr, packet, time.time())
+            t2 = time.perf_counter()
+            packet.release()
+            hand_ms.append(1000 * (t1 - t0))
+            face_ms.append(1000 * (t2 - t1))
+            tips.append((cursor['x'], cursor['y']) if cursor['x'] != -1 else None)
+            lips.append(lip[0].mean(axis=0) if lip is not None else None)
+
+        err = ""
+        if baseline is None:
+            baseline = (tips, lips)
+        elif args.real_models:
+            w, h = clip[0].shape[1], clip[0].shape[0]
+            def px_err(a, b):
+                d = [np.hypot((p[0] - q[0]) * w, (p[1] - q[1]) * h) for p, q in zip(a, b) if p is not None and q is not None]
+                return f"{np.mean(d):.1f}px" if d else "n/a"
+            err = f"   tip err {px_err(tips, baseline[0])}, lip err {px_err(lips, baseline[1])}"
+        ph, pf = percentiles(hand_ms), percentiles(face_ms)
+        print(f"   {label:<16} hand p50 {ph[50]:6.2f} ms   face p50 {pf[50]:6.2f} ms{err}")
+
+
+@benchmark
+def bench_frame_ring(args):
+    """Shared-memory frame ring vs MJPEG: writer here, `frame_ring.py` reader in a second process."""
+    import json
+    import subprocess
+    import sys
+    import frame_ring
+    from frame_ring import FrameRingWriter
+
+    frame = synthetic_frame(args.width, args.height)
+    # MJPEG path per frame: encode (server) + decode (client)
+    def jpeg_roundtrip():
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+    print(f"📊 frame_ring @ {args.width}x{args.height}")
+    report("MJPEG encode + decode", *measure(jpeg_roundtrip, min(args.frames, 50)))
+
+    for fps in (args.fps, 0):
+        name = f"narcissus_bench_{int(time.time() * 1000) % 100000}"
+        writer = FrameRingWriter(name=name)
+        # Frames carry their seq in the first 8 bytes so the reader can spot torn reads
+        frame.reshape(-1)[:8].view(np.int64)[0] = 1
+        writer.update_frame(frame) # Create the segment before the reader attaches
+        reader = subprocess.Popen([sys.executable, frame_ring.__file__, "--name", name, "--frames", str(args.frames),
+                                   "--json"], stdout=subprocess.PIPE, text=True)
+        try:
+            time.sleep(0.5) # Reader attach + imports
+            write_ms = []
+            interval = 1.0 / fps if fps else 0.0
+            t_start = time.perf_counter()
+            for i in range(args.frames + 20):
+                if reader.poll() is not None: break
+                frame.reshape(-1)[:8].view(np.int64)[0] = writer.seq + 1
+                t0 = time.perf_counter()
+                writer.update_frame(frame)
+                write_ms.append(1000 * (time.perf_counter() - t0))
+                if interval:
+                    time.sleep(max(t_start + (i + 1) * interval - time.perf_counter(), 0))
+                else:
+                    time.sleep(0.0005) # Let the reader run on small machines
+            elapsed = time.perf_counter() - t_start
+            out, _ = reader.communicate(timeout=10)
+        finally:
+            writer.close()
+        if reader.returncode != 0:
+            print("   reader failed")
+            continue
+        r = json.loads(out)
+        lat = percentiles(r["latency_ms"])
+        label = f"{fps:.0f} FPS" if fps else "unpaced"
+        print(f"   {label:<10} writer {len(write_ms) / elapsed:7.1f} FPS, write p50 {np.median(write_ms):.3f} ms | "
+              f"reader {r['fps']} FPS, got {r['read']}, missed {r['missed']}, corrupt {r['corrupt']}, "
+              f"latency p50 {lat[50]:.2f} / p99 {lat[99]:.2f} ms")
+
+
+@benchmark
+def bench_capture(args):
+    """Frame age at hand-off and read waits: cv2-style reads on the loop vs the CameraCapture thread."""
+    from capture import DRIVER_BUFFERS, CameraCapture, FileSource, SyntheticSource
+    from fakes import burn_cpu
+    from frame_packet import FramePool
+    from perf import timings
+
+    fps = args.fps or 30.0
+    frames = min(args.frames, 150)
+    print(f"📊 capture @ {args.width}x{args.height} ({args.video or 'synthetic'}), camera {fps:g} FPS "
+          f"with {DRIVER_BUFFERS} driver buffers, {frames} frames")
+    for work_ms in (10, 50): # Loop faster / slower than the camera
+        for threaded in (False, True):
+            source = (FileSource(args.video, fps=fps) if args.video
+                      else SyntheticSource(args.width, args.height, fps=fps))
+            cap = CameraCapture(source) if threaded else source
+            pool = FramePool()
+            waits = []
+            timings.reset()
+            t0 = time.perf_counter()
+            for _ in range(frames):
+                t = time.perf_counter()
+                packet = pool.capture(cap)
+                waits.append(time.perf_counter() - t)
+                burn_cpu(work_ms) # The loop's work on the frame
+                packet.release()
+            rate = frames / (time.perf_counter() - t0)
+            age = timings.summary()["frame_age"]
+            cap.release()
+            label = f"{'CameraCapture thread' if threaded else 'sync read'}, {work_ms} ms work"
+            print(f"   {label:<34} {rate:5.1f} FPS   frame age p50 {age['p50_ms']:6.1f} ms  p95 {age['p95_ms']:6.1f} ms"
+                  f"   read wait p50 {1000 * np.median(waits):5.1f} ms   camera dropped {source.dropped}")
+
+
+@benchmark
+def bench_e2e(args):
+    """Whole mirror (main loop, servers, assistant) replayed offline; --out saves JSON, --compare diffs."""
+    import json
+    import replay
+
+    results = replay.run_replay(args)
+    replay.print_results(results)
+    if args.out:
+        replay.save_results(results, args.out)
+    if args.compare:
+        with open(args.compare) as f:
+            replay.compare_results(json.load(f), results)
+
+
+@benchmark
+def bench_landmarker_procs(args):
+    """e2e FPS and CPU use with the landmarkers in-process (threads) vs in worker processes."""
+    import json
+    import subprocess
+    import sys
+    import tempfile
+
+    print(f"📊 landmarker_procs @ {args.width}x{args.height}, {args.landmarker_ms:.0f} ms per landmarker call, "
+          f"capture {args.fps:.0f} FPS, {'serial' if args.serial else 'pipeline'}")
+    # Each run in a fresh interpreter (the video server's threads are process-wide)
+    common = [sys.executable, __file__, "e2e", "--frames", str(args.frames), "--width", str(args.width),
+              "--height", str(args.height), "--port", str(args.port), "--fps", str(args.fps),
+              "--landmarker-ms", str(args.landmarker_ms), "--token-ms", str(args.token_ms)]
+    common += (["--video", args.video] if args.video else []) + (["--real-models"] if args.real_models else [])
+    common += ["--serial"] if args.serial else []
+    for processes in (False, True):
+        with tempfile.NamedTemporaryFile(suffix=".json") as out:
+            cmd = common + ["--out", out.name] + (["--processes"] if processes else [])
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            results = json.load(open(out.name))
+        stages, cpu = results["stages"], results["cpu"]
+        label = "worker processes" if processes else "threads (one process)"
+        print(f"   {label:<22} {results['fps']:6.2f} FPS   cores busy {cpu['cores']:4.2f} of {cpu['available']}   "
+              f"e2e_frame p50 {stages['e2e_frame']['p50_ms']:6.1f} ms   hand p50 {stages['hand']['p50_ms']:5.1f} ms   "
+              f"face p50 {stages['face']['p50_ms']:5.1f} ms")
+        for kind in ("hand", "face"):
+            if f"{kind}_ipc" in stages:
+                print(f"   {'':<22} {kind} ipc p50 {stages[kind + '_ipc']['p50_ms']:.2f} ms   "
+                      f"{results['landmarkers'][kind]}")
+
+
+@benchmark
+def bench_startup(args):
+    """Launch -> first frame / first answer with cold-start costs, eager (sequential) vs FAST_STARTUP."""
+    import json
+    import subprocess
+    import sys
+    import tempfile
+    import time
+
+    print(f"📊 startup @ {args.width}x{args.height}, cold start: camera, model loads, first detections, LLM load")
+    common = [sys.executable, __file__, "e2e", "--frames", str(args.frames), "--width", str(args.width),
+              "--height", str(args.height), "--port", str(args.port), "--fps", str(args.fps),
+              "--landmarker-ms", str(args.landmarker_ms), "--token-ms", str(args.token_ms), "--cold-start"]
+    common += ["--processes"] if args.processes else []
+    for eager in (True, False):
+        with tempfile.NamedTemporaryFile(suffix=".json") as out:
+            cmd = common + ["--out", out.name] + (["--eager-startup"] if eager else [])
+            launched = time.time()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            results = json.load(open(out.name))
+        # Marks are relative to the child's startup import; add interpreter + import time before it
+        marks = results["startup"]
+        boot = marks.pop("t0") - launched
+        label = "eager (sequential)" if eager else "fast (parallel + lazy)"
+        print(f"   {label:<24} " + "   ".join(f"{name} {boot + s:5.2f} s" for name, s in marks.items())
+              + f"   (interpreter + imports {boot:.2f} s)")
+
+
+@benchmark
+def bench_quality(args):
+    """Frame rate under a load spike with fixed vs adaptive quality (QualityController), and recovery."""
+    import json
+    import subprocess
+    import sys
+    import tempfile
+
+    target, tolerance = 24, 0.1 # simulation_multimodal.TARGET_FPS, QualityController default
+    busy_at, busy_for, after = 6.0, 12.0, 20.0 # Load after QualityController.settle_s
+    print(f"📊 quality @ {args.width}x{args.height}, {args.landmarker_ms:.0f} ms per landmarker call x"
+          f"{args.busy_factor:g} from {busy_at:g} s for {busy_for:g} s, target {target} FPS, "
+          f"{'serial' if args.serial else 'pipeline'}")
+    frames = int(args.fps * (busy_at + busy_for + after))
+    common = [sys.executable, __file__, "e2e", "--frames", str(frames), "--width", str(args.width),
+              "--height", str(args.height), "--port", str(args.port), "--fps", str(args.fps),
+              "--landmarker-ms", str(args.landmarker_ms), "--token-ms", str(args.token_ms),
+              "--busy-at", str(busy_at), "--busy-for", str(busy_for), "--busy-factor", str(args.busy_factor)]
+    common += (["--video", args.video] if args.video else []) + (["--serial"] if args.serial else [])
+    for fixed in (True, False):
+        with tempfile.NamedTemporaryFile(suffix=".json") as out:
+            cmd = common + ["--out", out.name] + (["--fixed-quality"] if fixed else [])
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            results = json.load(open(out.name))
+        busy = results["busy"]
+        label = "fixed quality" if fixed else "adaptive quality"
+        print(f"   {label:<18} overall {results['fps']:5.1f} FPS   busy: first half {busy['first_half_fps']:5.1f} FPS, "
+              f"second half {busy['second_half_fps']:5.1f} FPS")
+        if fixed: continue
+
+        quality = results["quality"]
+        print(f"   {'t s':>6} {'FPS':>6} {'cost ms':>8} {'level':>6}")
+        for t, fps, cost, level in quality["history"]:
+            mark = " busy" if busy["start"] <= t <= busy["end"] + 1 else ""
+            print(f"   {t - busy['start'] + busy_at:6.1f} {fps:6.1f} {cost:8.1f} {level:6d}{mark}")
+        for change in quality["changes"]:
+            print(f"   {change['t'] - busy['start'] + busy_at:6.1f} s  {change['knob']} {change['from']} -> "
+                  f"{change['to']} ({change['fps']} FPS, {change['cost_ms']} ms)")
+        held = busy["second_half_fps"] >= target * (1 - tolerance)
+        restored = quality["level"] == 0
+        print(f"   held target under load: {'yes' if held else 'no'}   "
+              f"restored after: {'yes' if restored else 'no'} (level {quality['level']}/{quality['rungs']})   "
+              f"converged: {'yes' if held and restored else 'no'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Narcissus benchmarks")
+    parser.add_argument("name", nargs="?", choices=sorted(BENCHMARKS))
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--video", help="Replay a recorded clip instead of synthetic frames")
+    parser.add_argument("--real-models", action="store_true", help="Use the MediaPipe models instead of stand-ins")
+    parser.add_argument("--landmarker-ms", type=float, default=15.0, help="CPU cost of a fake landmarker call")
+    parser.add_argument("--fps", type=float, default=30.0, help="e2e: replay capture rate (0 = unpaced)")
+    parser.add_argument("--serial", action="store_true", help="e2e: serial loop instead of the pipeline")
+    parser.add_argument("--processes", action="store_true", help="e2e: landmarkers in worker processes")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="e2e: fake Ollama delay per streamed word")
+    parser.add_argument("--cold-start", action="store_true",
+                        help="e2e: stand-ins pay camera/model/LLM startup costs (replay.COLD_START)")
+    parser.add_argument("--eager-startup", action="store_true", help="e2e: FAST_STARTUP off (sequential, no warm-up)")
+    parser.add_argument("--sync-capture", action="store_true", help="e2e: CAPTURE_THREAD off (read on the loop)")
+    parser.add_argument("--fixed-quality", action="store_true", help="e2e: ADAPTIVE_QUALITY off")
+    parser.add_argument("--busy-at", type=float, help="e2e: seconds after the first frame the landmarkers slow down")
+    parser.add_argument("--busy-for", type=float, default=10.0, help="e2e: seconds the slowdown lasts")
+    parser.add_argument("--busy-factor", type=float, default=3.0, help="e2e: landmarker cost multiplier while busy")
+    parser.add_argument("--out", help="e2e: save results JSON here")
+    parser.add_argument("--compare", help="e2e: previous results JSON to diff against")
+    args = parser.parse_args()
+
+    if not args.name:
+        for name, fn in sorted(BENCHMARKS.items()):
+            print(f"{name:<20} {fn.__doc__}")
+        return
+    BENCHMARKS[args.name](args)
+
+
+if __name__ == "__main__":
+    main()
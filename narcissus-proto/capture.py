@@ -0,0 +1,299 @@
+"""
+Camera capture on its own thread, newest frame wins.
+
+cv2.VideoCapture.read() on the main loop hands out whatever the driver has
+queued (OpenCV asks V4L2 for 4 buffers), so a loop slower than the camera
+gets frames several intervals old, and it blocks on the device when it's
+faster. CameraCapture reads the source on a grabber thread into a small
+preallocated ring; read() returns the newest frame (waiting only if none
+arrived since the last one). Every source sets `frame_time`, when the frame
+handed out was captured; FramePool records its age as the "frame_age"
+timing.
+
+    cap = CameraCapture(open_source(0, width=1280, height=720, fps=30, fourcc="MJPG"))
+    ret, frame = cap.read() # a ring slot: valid until the next read()
+
+Sources are cv2.VideoCapture look-alikes, interchangeable:
+- open_webcam(): a configured cv2.VideoCapture (size, FPS, fourcc, 1 buffer)
+- FileSource: a video file, looped
+- SyntheticSource: generated frames, no camera or file needed
+The last two behave like a camera (paced to `fps`, driver buffer queue),
+so capture latency can be measured without one.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+import cv2
+import numpy as np
+from perf import register_gauge
+
+DRIVER_BUFFERS = 4 # OpenCV's V4L2 default (CAP_PROP_BUFFERSIZE)
+
+
+def open_webcam(index=0, width=None, height=None, fps=None, fourcc="MJPG", buffersize=1):
+    """
+    cv2.VideoCapture for a camera, configured. MJPG lets most USB webcams
+    do 720p at 30 FPS (raw YUYV tops out far lower); the driver queue is
+    cut to `buffersize` (backends that ignore it are drained by CameraCapture).
+    """
+    cap = cv2.VideoCapture(index)
+    # Format first: V4L2 picks the frame sizes / rates the format offers
+    if fourcc: cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if width: cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    if height: cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps: cap.set(cv2.CAP_PROP_FPS, fps)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, buffersize)
+    if cap.isOpened():
+        code = int(cap.get(cv2.CAP_PROP_FOURCC))
+        got = "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)) if code else "?"
+        print(f"📷 Camera {index}: {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} "
+              f"@ {cap.get(cv2.CAP_PROP_FPS):g} FPS, {got}")
+    return cap
+
+
+def open_source(source=0, width=None, height=None, fps=None, fourcc="MJPG"):
+    """A camera index (int or digits), "synthetic", or a video file path."""
+    if isinstance(source, int) or str(source).isdigit():
+        return open_webcam(int(source), width, height, fps, fourcc)
+    if source == "synthetic":
+        return SyntheticSource(width or 1280, height or 720, fps=30.0 if fps is None else fps)
+    return FileSource(source, fps=fps, width=width, height=height)
+
+
+class SimulatedCamera(ABC):
+    """
+    Base for the camera-less sources. Frames "arrive" every 1/fps seconds
+    into a queue of `buffersize` driver buffers (arrivals are lost while
+    it's full) and read() takes the oldest, as V4L2 does: a slow reader
+    gets stale frames, a fast one waits for the next frame. fps=0: no
+    pacing, every read gets a fresh frame at once.
+
+    frame_time: when the last frame read was captured (time.time()).
+    Subclasses provide the pixels: _frame(image) -> (ret, frame).
+    """
+    def __init__(self, width, height, fps=30.0, buffersize=DRIVER_BUFFERS):
+        self.size = (width, height)
+        self.interval = 1.0 / fps if fps else 0.0
+        self.buffersize = buffersize
+        self.opened = True
+        self.frame_time = None
+        self._t0 = None
+        self._arrived = -1 # index of the latest frame that reached the driver
+        self._queue = deque() # indices filled, not read yet
+
+        # Stats
+        self.frames = 0
+        self.dropped = 0 # arrived while every buffer was full
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH: return float(self.size[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT: return float(self.size[1])
+        if prop == cv2.CAP_PROP_FPS: return 1.0 / self.interval if self.interval else 0.0
+        if prop == cv2.CAP_PROP_BUFFERSIZE: return float(self.buffersize)
+        return 0.0
+
+    def set(self, prop, value):
+        """Width/height: later frames come at the new size (like a camera's mode change)."""
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.size = (int(value), self.size[1])
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.size = (self.size[0], int(value))
+        elif prop == cv2.CAP_PROP_FPS:
+            self.interval = 1.0 / value if value else 0.0
+            self._t0, self._arrived = None, -1
+            self._queue.clear()
+        elif prop == cv2.CAP_PROP_BUFFERSIZE:
+            self.buffersize = max(int(value), 1)
+        else:
+            return False
+        return True
+
+    def _dequeue(self):
+        """Wait for a queued frame; returns its capture time."""
+        now = time.time()
+        if not self.interval: return now
+        if self._t0 is None: self._t0 = now
+        latest = int((now - self._t0) / self.interval)
+        if not self._queue and latest <= self._arrived:
+            # Nothing captured since the last read: wait for the next frame
+            latest = self._arrived + 1
+            time.sleep(max(self._t0 + latest * self.interval - now, 0.0))
+        arrivals = latest - self._arrived
+        room = max(self.buffersize - len(self._queue), 0)
+        self._queue.extend(range(self._arrived + 1, self._arrived + 1 + min(arrivals, room)))
+        self.dropped += max(arrivals - room, 0)
+        self._arrived = latest
+        return self._t0 + self._queue.popleft() * self.interval
+
+    def read(self, image=None):
+        if not self.opened: return False, None
+        self.frame_time = self._dequeue()
+        ret, frame = self._frame(image)
+        self.frames += int(ret)
+        return ret, frame
+
+    @abstractmethod
+    def _frame(self, image):
+        """The frame that just arrived, into `image` when it fits (like cv2's read(image))."""
+
+    def release(self):
+        self.opened = False
+
+
+class SyntheticSource(SimulatedCamera):
+    """Noise frames (fixed per size and seed): as costly to process as camera frames."""
+    def __init__(self, width=1280, height=720, fps=30.0, buffersize=DRIVER_BUFFERS, seed=0):
+        super().__init__(width, height, fps, buffersize)
+        self.seed = seed
+        self._image = None
+
+    def _frame(self, image):
+        if self._image is None or self._image.shape[1::-1] != self.size:
+            w, h = self.size
+            self._image = np.random.default_rng(self.seed).integers(0, 255, (h, w, 3), dtype=np.uint8)
+        if image is not None and image is not self._image and image.shape == self._image.shape:
+            np.copyto(image, self._image)
+            return True, image
+        return True, self._image
+
+
+class FileSource(SimulatedCamera):
+    """A video file, looped, paced to `fps` (default: the file's own rate)."""
+    def __init__(self, path, fps=None, buffersize=DRIVER_BUFFERS, width=None, height=None):
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Cannot open {path}")
+        self.native = (int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        if fps is None: fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(width or self.native[0], height or self.native[1], fps, buffersize)
+        self._raw = None # Decoded frame before resizing to a set() size
+
+    def _frame(self, image):
+        resize = self.size != self.native
+        ret, frame = self._cap.read(self._raw if resize else image)
+        if not ret:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read(self._raw if resize else image)
+        if ret and resize:
+            self._raw = frame
+            dst = image if image is not None and image.shape[1::-1] == self.size else None
+            frame = cv2.resize(frame, self.size, dst=dst, interpolation=cv2.INTER_AREA)
+        return ret, frame
+
+    def release(self):
+        super().release()
+        self._cap.release()
+
+
+class CameraCapture:
+    """
+    cv2.VideoCapture look-alike that grabs `source` on its own thread.
+
+    - ring: preallocated frame buffers (>= 3: the one being filled, the
+      newest, the one the reader holds); the grabber never waits for the
+      reader, frames it doesn't take in time are dropped
+    - read(image=None): the newest frame not handed out yet, waiting up to
+      `timeout` for one. The frame is the ring buffer itself (no copy) and
+      stays valid until the next read(); `image` is ignored.
+    - frame_time: capture time of the frame last handed out
+    - set(): applied by the grabber thread before its next read
+    """
+    def __init__(self, source, ring=3, timeout=1.0):
+        self.source = source
+        self.timeout = timeout
+        w, h = int(source.get(cv2.CAP_PROP_FRAME_WIDTH)), int(source.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self._slots = [np.empty((h, w, 3), dtype=np.uint8) if w and h else None for _ in range(max(ring, 3))]
+        self._times = [0.0] * len(self._slots)
+        self._newest = None # slot index of the latest frame
+        self._held = None # slot index the reader has
+        self._seq = 0 # frames grabbed
+        self._read_seq = 0 # seq of the frame last handed out
+        self._settings = [] # (prop, value) for the grabber to apply
+        self._cond = threading.Condition()
+        self.frame_time = None
+        self.running = True
+
+        # Stats
+        self.delivered = 0
+        self.dropped = 0 # overwritten before anyone read them
+        self.errors = 0
+
+        for result, fn in (("captured", lambda: self._seq), ("delivered", lambda: self.delivered),
+                           ("dropped", lambda: self.dropped)):
+            register_gauge("narcissus_capture_frames_total", fn, "Camera frames by outcome.", "counter",
+                           {"result": result})
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+
+    # --- Grabber thread ---
+    def _run(self):
+        failing = False
+        while self.running:
+            with self._cond:
+                settings, self._settings = self._settings, []
+                slot = next(i for i in range(len(self._slots)) if i not in (self._newest, self._held))
+            for prop, value in settings:
+                self.source.set(prop, value)
+
+            buf = self._slots[slot]
+            ret, frame = self.source.read(buf)
+            if not ret or frame is None:
+                self.errors += 1
+                if not failing: print("📷 Camera read failed, retrying...")
+                failing = True
+                time.sleep(0.1)
+                continue
+            failing = False
+            if frame is not buf:
+                if buf is not None and frame.shape == buf.shape:
+                    np.copyto(buf, frame)
+                else:
+                    buf = frame.copy() # New size: the slot is reallocated (never shares the source's buffer)
+            captured_at = getattr(self.source, "frame_time", None) or time.time()
+
+            with self._cond:
+                self._slots[slot], self._times[slot] = buf, captured_at
+                if self._newest is not None and self._read_seq < self._seq: self.dropped += 1
+                self._newest = slot
+                self._seq += 1
+                self._cond.notify_all()
+
+    # --- Reader side ---
+    def read(self, image=None):
+        with self._cond:
+            deadline = time.time() + self.timeout
+            while self.running and self._read_seq == self._seq:
+                remaining = deadline - time.time()
+                if remaining <= 0: return False, None
+                self._cond.wait(remaining)
+            if self._read_seq == self._seq: return False, None
+            self._held, self._read_seq = self._newest, self._seq
+            frame, self.frame_time = self._slots[self._held], self._times[self._held]
+        self.delivered += 1
+        return True, frame
+
+    def isOpened(self):
+        return self.running and self.source.isOpened()
+
+    def get(self, prop):
+        return self.source.get(prop)
+
+    def set(self, prop, value):
+        with self._cond:
+            self._settings.append((prop, value))
+        return True
+
+    def release(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=2.0)
+        self.source.release()
+
+    def stats(self):
+        return {"captured": self._seq, "delivered": self.delivered, "dropped": self.dropped, "errors": self.errors,
+                "source_dropped": getattr(self.source, "dropped", None)}
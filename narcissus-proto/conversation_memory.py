@@ -0,0 +1,114 @@
+import time
+from collections import deque
+
+
+def estimate_tokens(text):
+    # ~4 chars per token for English, +4 for role/formatting overhead
+    return len(text or "") // 4 + 4
+
+
+class ConversationMemory:
+    """
+    Token-budgeted chat history for the assistant.
+
+    Layout sent to the model:
+        [system prompt] [summary of compacted turns] [recent turns...]
+
+    The history is only rewritten when it goes over `token_budget`, and
+    then it is compacted down to `low_water` * budget in one go. Between
+    compactions messages are only appended, so the prompt prefix stays
+    byte-identical and Ollama can reuse its prefix/KV cache.
+
+    Compaction first shrinks tool outputs of older turns (search results
+    are the bulk of it), then, if that is not enough, those of the recent
+    turns except the one in progress, then folds the oldest turns into the
+    summary. The budget is checked on every message, tool outputs included.
+    """
+    def __init__(self, system_prompt, token_budget=2048, keep_recent_turns=3,
+                 tool_output_chars=240, low_water=0.6, summary_turns=8):
+        self.system = {'role': 'system', 'content': system_prompt}
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_output_chars = tool_output_chars
+        self.low_water = low_water
+        self.summary_lines = deque(maxlen=summary_turns)
+        self.summary = None
+        self.turns = [] # [[user msg, tool msgs..., assistant msg], ...]
+
+        # Stats
+        self.compactions = 0
+        self.turn_stats = deque(maxlen=100)
+
+    # --- History ---
+    def append(self, message):
+        if message['role'] == 'user' or not self.turns:
+            self.turns.append([])
+        tokens = estimate_tokens(message['content'])
+        if self.prompt_tokens() + tokens > self.token_budget:
+            self.compact(incoming=tokens)
+        self.turns[-1].append(message)
+
+    def messages(self):
+        msgs = [self.system]
+        if self.summary:
+            msgs.append(self.summary)
+        for turn in self.turns:
+            msgs.extend(turn)
+        return msgs
+
+    def prompt_tokens(self):
+        return sum(estimate_tokens(m['content']) for m in self.messages())
+
+    def compact(self, incoming=0):
+        # Room for the message that triggered it, or the next one compacts again
+        target = int(self.token_budget * self.low_water) - incoming
+        old = self.turns[:-self.keep_recent_turns - 1] if len(self.turns) > self.keep_recent_turns + 1 else []
+
+        # 1. Shrink tool outputs of older turns
+        self._trim_tool_outputs(old)
+        # 2. Still over: those of the recent turns too, which were already
+        # answered from them (the turn in progress keeps its own)
+        if self.prompt_tokens() > target:
+            self._trim_tool_outputs(self.turns[:-1])
+
+        # 3. Fold the oldest turns into the summary until under target
+        while self.prompt_tokens() > target and len(self.turns) > self.keep_recent_turns + 1:
+            self.summary_lines.append(self._summarize_turn(self.turns.pop(0)))
+        if self.summary_lines:
+            self.summary = {'role': 'system',
+                            'content': "Earlier in this conversation:\n" + "\n".join(self.summary_lines)}
+        self.compactions += 1
+
+    def _trim_tool_outputs(self, turns):
+        for turn in turns:
+            for msg in turn:
+                if msg['role'] == 'tool' and len(msg['content']) > self.tool_output_chars:
+                    msg['content'] = msg['content'][:self.tool_output_chars] + " …[trimmed]"
+
+    def _summarize_turn(self, turn):
+        user = next((m['content'] for m in turn if m['role'] == 'user'), "")
+        reply = next((m['content'] for m in reversed(turn) if m['role'] == 'assistant'), "") or ""
+        return f"- User: {user[:80]} / You: {reply[:80]}"
+
+    # --- Stats ---
+    def record_turn(self, latency, prompt_eval_count=None, prompt_eval_ms=None):
+        self.turn_stats.append({
+            "time": time.time(),
+            "prompt_tokens_est": self.prompt_tokens(),
+            "messages": len(self.messages()),
+            "latency_s": round(latency, 3),
+            "prompt_eval_count": prompt_eval_count,
+            "prompt_eval_ms": prompt_eval_ms,
+        })
+
+    def stats(self):
+        latencies = [t["latency_s"] for t in self.turn_stats]
+        return {
+            "turns": len(self.turns),
+            "messages": len(self.messages()),
+            "prompt_tokens_est": self.prompt_tokens(),
+            "token_budget": self.token_budget,
+            "compactions": self.compactions,
+            "last_turn": self.turn_stats[-1] if self.turn_stats else None,
+            "avg_latency_s": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        }
@@ -0,0 +1,109 @@
+"""
+Priority event queue for the main loop (drop-in for the queue.Queue it replaces).
+
+- gestures go before voice commands, voice before assistant results
+  (alerts); FIFO within each
+- events with the same key replace each other while waiting, so only the
+  latest of several mode switches is acted on
+- commands older than their type's max age are dropped, not acted on late
+- get() blocks until an event arrives instead of being polled
+"""
+import queue
+import threading
+import time
+from collections import deque
+from perf import timings, register_gauge
+
+PRIORITY = {"gesture": 0, "voice": 1, "assistant": 2} # Lower first; other types go last
+DEFAULT_MAX_AGE = {"gesture": 2.0, "voice": 8.0} # Seconds; types not listed never expire
+
+
+class EventScheduler:
+    """
+    put() / get() / get_nowait() / qsize() like queue.Queue, for event dicts
+    with "type" and (optionally) "time", when the event happened.
+
+    - max_age: {type: seconds}; a command older than that when it would be
+      handed out is dropped
+    - key: (event) -> hashable or None; a new event replaces the waiting one
+      with the same key (None: never coalesced)
+    """
+    def __init__(self, max_age=None, key=None):
+        self.max_age = DEFAULT_MAX_AGE if max_age is None else max_age
+        self.key = key or (lambda event: None)
+        self._levels = [deque() for _ in range(max(PRIORITY.values()) + 2)] # (event, key, arrived)
+        self._keyed = {} # key -> the waiting event with that key
+        self._cond = threading.Condition()
+
+        # Stats
+        self.delivered = 0
+        self.coalesced = 0 # replaced by a newer event with the same key
+        self.expired = 0
+
+        for result, fn in (("delivered", lambda: self.delivered), ("coalesced", lambda: self.coalesced),
+                           ("expired", lambda: self.expired)):
+            register_gauge("narcissus_events_total", fn, "Main loop events by outcome.", "counter",
+                           {"result": result})
+
+    def put(self, event):
+        key = self.key(event) # Outside the lock: may do some work (e.g. intent matching)
+        level = self._levels[PRIORITY.get(event.get("type"), len(self._levels) - 1)]
+        with self._cond:
+            if key is not None:
+                old = self._keyed.get(key)
+                if old is not None:
+                    self._remove(old)
+                    self.coalesced += 1
+                self._keyed[key] = event
+            level.append((event, key, time.time()))
+            self._cond.notify()
+
+    def _remove(self, event):
+        # Caller holds self._cond
+        for level in self._levels:
+            for i, (waiting, _, _) in enumerate(level):
+                if waiting is event:
+                    del level[i]
+                    return
+
+    def get(self, block=True, timeout=None):
+        """Highest-priority live event; raises queue.Empty when none arrives in time."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                event = self._pop()
+                if event is not None: return event
+                remaining = None if deadline is None else deadline - time.time()
+                if not block or (remaining is not None and remaining <= 0):
+                    raise queue.Empty
+                self._cond.wait(remaining)
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def _pop(self):
+        # Caller holds self._cond
+        now = time.time()
+        for level in self._levels:
+            while level:
+                event, key, arrived = level.popleft()
+                if key is not None and self._keyed.get(key) is event:
+                    del self._keyed[key]
+                age = now - event.get("time", arrived)
+                limit = self.max_age.get(event.get("type"))
+                if limit is not None and age > limit:
+                    self.expired += 1
+                    print(f"⌛ Dropped stale {event.get('type', 'event').upper()} ({age:.1f}s old): "
+                          f"{event.get('content')}")
+                    continue
+                self.delivered += 1
+                timings.record("event_wait", age)
+                return event
+        return None
+
+    def qsize(self):
+        return sum(len(level) for level in self._levels)
+
+    def stats(self):
+        return {"depth": self.qsize(), "delivered": self.delivered, "coalesced": self.coalesced,
+                "expired": self.expired}
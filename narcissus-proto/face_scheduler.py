@@ -0,0 +1,65 @@
+import time
+
+
+class FaceScheduler:
+    """
+    Decides, frame by frame, whether ARMakeup needs a fresh FaceLandmarker run.
+
+    Full rate when the output is visible or about to be used:
+      - makeup is enabled in mirror mode, or
+      - the hand cursor is near the last known face box (a lip touch may follow).
+    Otherwise detection drops to `background_hz`, just enough to keep the
+    face box current. ARMakeup carries landmarks forward in between.
+    max_hz caps the full rate too (set by the QualityController under load).
+    """
+    def __init__(self, background_hz=2.0, near_margin=0.15):
+        self.background_interval = 1.0 / background_hz
+        self.near_margin = near_margin # normalized units around the face box
+        self.max_hz = None # None: every frame at full rate
+        self.mode = "dashboard"
+        self.cursor = None # (x, y) normalized, None when no hand
+        self.last_detect = 0.0
+
+        # Stats
+        self.detections = 0
+        self.skipped = 0
+
+    @property
+    def max_carry_s(self):
+        """How long carried-forward landmarks stay valid without a detection."""
+        return 1.5 * self.background_interval
+
+    def update_cursor(self, cursor_pos):
+        self.cursor = None if cursor_pos['x'] == -1 else (cursor_pos['x'], cursor_pos['y'])
+
+    def cursor_near(self, face_box):
+        if self.cursor is None or face_box is None: return False
+        x, y = self.cursor
+        x0, y0, x1, y1 = face_box
+        m = self.near_margin
+        return x0 - m <= x <= x1 + m and y0 - m <= y <= y1 + m
+
+    def full_rate(self, makeup_enabled, face_box):
+        return (makeup_enabled and self.mode == "mirror") or self.cursor_near(face_box)
+
+    def should_detect(self, makeup_enabled, face_box, now=None):
+        now = time.time() if now is None else now
+        if self.full_rate(makeup_enabled, face_box):
+            interval = 1.0 / self.max_hz if self.max_hz else 0.0
+        else:
+            interval = self.background_interval
+        if now - self.last_detect >= interval:
+            self.last_detect = now
+            self.detections += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        total = self.detections + self.skipped
+        return {
+            "mode": self.mode,
+            "detections": self.detections,
+            "skipped": self.skipped,
+            "detect_ratio": round(self.detections / total, 3) if total else None,
+        }
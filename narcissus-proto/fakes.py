@@ -0,0 +1,271 @@
+"""
+Local stand-ins for the services Narcissus talks to, so benchmarks can run
+offline (benchmark.py, replay.py). Nothing here is used by
+simulation_multimodal.py itself.
+"""
+import json
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaServer:
+    """
+    Minimal Ollama /api/chat server (streaming NDJSON and non-streaming).
+
+    `reply(messages, tools)` returns (text, tool_calls) for each request;
+    tool_calls is a list of {"name": ..., "arguments": {...}}. The text is
+    streamed word by word with `token_delay` seconds between words.
+    The first request waits `load_s` (cold model load); a request with no
+    messages only loads the model, like Ollama's preload.
+    """
+    def __init__(self, reply=None, token_delay=0.02, port=0, load_s=0.0):
+        self.reply = reply or (lambda messages, tools: ("Hello from the fake mirror brain.", []))
+        self.token_delay = token_delay
+        self.load_s = load_s
+        self.loaded = False
+        self._load_lock = threading.Lock()
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server.requests += 1
+                with server._load_lock:
+                    if not server.loaded:
+                        time.sleep(server.load_s)
+                        server.loaded = True
+                if body.get("messages"):
+                    text, tool_calls = server.reply(body["messages"], body.get("tools"))
+                else:
+                    text, tool_calls = "", [] # Load only
+                model = body.get("model", "fake")
+
+                def chunk(content, calls=None, done=False):
+                    msg = {"role": "assistant", "content": content}
+                    if calls:
+                        msg["tool_calls"] = [{"function": c} for c in calls]
+                    return {"model": model, "created_at": "2025-01-01T00:00:00Z",
+                            "message": msg, "done": done}
+
+                self.send_response(200)
+                if body.get("stream", True):
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    if tool_calls:
+                        self._line(chunk("", tool_calls))
+                    for word in text.split(" ") if text else []:
+                        time.sleep(server.token_delay)
+                        self._line(chunk(word + " "))
+                    self._line(chunk("", done=True))
+                else:
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    self.wfile.write(json.dumps(chunk(text, tool_calls, done=True)).encode())
+
+            def _line(self, obj):
+                self.wfile.write(json.dumps(obj).encode() + b"\n")
+                self.wfile.flush()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.port = self.httpd.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+    def client(self):
+        import ollama
+        return ollama.Client(host=self.url)
+
+
+class FakeRemoteControlServer:
+    """
+    Stand-in for MagicMirror's MMM-Remote-Control API (/api/...).
+    Answers every GET/POST with {"success": true} after `latency` seconds
+    and keeps the request paths in `requests` (in arrival order). Speaks
+    HTTP/1.1 keep-alive like Express; `connections` counts TCP connections.
+    """
+    def __init__(self, latency=0.005, port=0):
+        self.latency = latency
+        self.requests = []
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args): pass
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length", 0))
+                if length: self.rfile.read(length)
+                server.requests.append(self.path.split("?")[0])
+                time.sleep(server.latency)
+                body = b'{"success": true}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.port = self.httpd.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/api"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+class FakeSearchBackend:
+    """
+    Offline stand-in for DDGSBackend. Returns deterministic results after
+    `latency` seconds; the first `fail_first` calls raise. Results mention
+    `edition` when set (change it to make the web's answer change, e.g. a
+    new day's weather).
+    """
+    def __init__(self, latency=0.3, fail_first=0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.calls = 0
+        self.edition = None
+
+    def __call__(self, query, max_results=3):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.calls <= self.fail_first:
+            raise ConnectionError("fake search backend offline")
+        edition = f" ({self.edition})" if self.edition else ""
+        return [{"title": f"Result {i + 1} for {query}", "body": f"Snippet {i + 1} about {query}{edition}."}
+                for i in range(max_results)]
+
+
+class FakeRecognizer:
+    """
+    Stand-in speech recognizer backend for recognition.RecognitionPool.
+    The "audio" is the transcript itself; each call takes `latency` seconds
+    +/- `jitter` (seeded, so runs are repeatable).
+    """
+    def __init__(self, latency=1.0, jitter=0.5, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, audio):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(delay, 0.0))
+        return audio
+
+
+def burn_cpu(ms):
+    """Spin for `ms` milliseconds (stands in for model inference CPU time)."""
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+
+def input_cost(cost_ms, image, full_pixels):
+    """Scale a full-frame inference cost by the input image (RGB array) area."""
+    if full_pixels and image is not None:
+        return cost_ms * (image.shape[0] * image.shape[1]) / full_pixels
+    return cost_ms
+
+
+class FakeHandLandmarker:
+    """
+    Stand-in HandLandmarker: 21 landmarks of a hand drifting left/right,
+    index tip (8) leading. CPU cost scales with the input area relative
+    to `full_pixels` (0 = fixed cost).
+    """
+    accepts_arrays = True # Takes the RGB array, no mediapipe needed
+
+    def __init__(self, cost_ms=10.0, full_pixels=0, present=True, load_ms=0.0, first_call_ms=0.0):
+        burn_cpu(load_ms) # Model load
+        self.cost_ms = cost_ms
+        self.full_pixels = full_pixels
+        self.present = present
+        self.first_call_ms = first_call_ms # Extra cost of the first call (graph setup)
+        self.calls = 0
+
+    def hand_at(self, timestamp_ms):
+        return 0.5 + 0.35 * math.sin(timestamp_ms / 1500.0), 0.55
+
+    def detect_for_video(self, mp_image, timestamp_ms):
+        self.calls += 1
+        burn_cpu(input_cost(self.cost_ms, mp_image, self.full_pixels) + (self.first_call_ms if self.calls == 1 else 0))
+        if not self.present:
+            return SimpleNamespace(hand_landmarks=[])
+        cx, cy = self.hand_at(timestamp_ms)
+        pts = [SimpleNamespace(x=cx + 0.01 * (i % 5), y=cy + 0.012 * (i // 5), z=0.0) for i in range(21)]
+        pts[8] = SimpleNamespace(x=cx, y=cy - 0.08, z=0.0)
+        return SimpleNamespace(hand_landmarks=[pts])
+
+
+class FakeFaceLandmarker:
+    """
+    Stand-in FaceLandmarker: costs `cost_ms` of CPU per call (scaled by
+    input area when `full_pixels` is set) and returns
+    478 landmarks for a face drifting slowly around `center`, with the lip
+    contours (set_lips, or lips=(outer, inner)) laid out as two ellipses.
+    """
+    accepts_arrays = True
+
+    def __init__(self, cost_ms=15.0, center=(0.5, 0.45), size=(0.3, 0.45), full_pixels=0, lips=None,
+                 load_ms=0.0, first_call_ms=0.0):
+        burn_cpu(load_ms)
+        self.cost_ms = cost_ms
+        self.first_call_ms = first_call_ms
+        self.full_pixels = full_pixels
+        self.center = center
+        self.size = size
+        self.lips = lips or ([], [])
+        self.calls = 0
+
+    def set_lips(self, outer_indices, inner_indices):
+        self.lips = (outer_indices, inner_indices)
+
+    def face_at(self, timestamp_ms):
+        cx = self.center[0] + 0.02 * math.sin(timestamp_ms / 700.0)
+        cy = self.center[1] + 0.01 * math.cos(timestamp_ms / 900.0)
+        return cx, cy
+
+    def detect_for_video(self, mp_image, timestamp_ms):
+        self.calls += 1
+        burn_cpu(input_cost(self.cost_ms, mp_image, self.full_pixels) + (self.first_call_ms if self.calls == 1 else 0))
+        cx, cy = self.face_at(timestamp_ms)
+        sw, sh = self.size
+        pts = [SimpleNamespace(x=cx + sw * ((i % 22) / 21 - 0.5), y=cy + sh * ((i // 22) / 21 - 0.5), z=0.0)
+               for i in range(478)]
+        mouth_y = cy + sh * 0.3
+        for indices, (rx, ry) in zip(self.lips, [(0.07, 0.035), (0.05, 0.01)]):
+            for k, idx in enumerate(indices):
+                a = 2 * math.pi * k / max(len(indices), 1)
+                pts[idx] = SimpleNamespace(x=cx + rx * math.cos(a), y=mouth_y + ry * math.sin(a), z=0.0)
+        return SimpleNamespace(face_landmarks=[pts])
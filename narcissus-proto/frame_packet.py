@@ -0,0 +1,140 @@
+import threading
+import time
+import cv2
+import numpy as np
+from perf import timings
+
+
+class FramePacket:
+    """
+    One captured frame, converted once and shared by every consumer.
+
+    - bgr: mirrored camera frame (what gets rendered on and streamed)
+    - rgb: the same frame in RGB, for MediaPipe
+    - mp_image / timestamp_ms: shared by HandDetector and ARMakeup
+
+    Buffers belong to a FramePool and are reused. Every holder calls
+    retain() before keeping a packet and release() when done with it.
+    """
+    def __init__(self, pool, shape):
+        self.pool = pool
+        self.bgr = np.empty(shape, dtype=np.uint8)
+        self.rgb = np.empty(shape, dtype=np.uint8)
+        self.seq = 0
+        self.timestamp_ms = 0
+        self.captured_at = 0.0
+        self._mp_image = None
+        self._lock = threading.Lock()
+        self._refs = 0
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    @property
+    def mp_image(self):
+        # Built on first use, then shared by both landmarkers
+        with self._lock:
+            if self._mp_image is None:
+                import mediapipe as mp
+                self._mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=self.rgb)
+            return self._mp_image
+
+    def retain(self):
+        with self._lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            done = self._refs <= 0
+        if done:
+            self.pool._recycle(self)
+
+
+class FramePool:
+    """
+    Preallocated FramePackets for one capture resolution.
+    capture() reads, mirrors and converts into a free packet with no
+    per-frame allocations once the pool is warm.
+    """
+    def __init__(self, size=6):
+        self.size = size
+        self.shape = None
+        self.raw = None # cap.read() target, reused every frame
+        self._free = []
+        self._lock = threading.Lock()
+        self.start_time_ms = int(time.time() * 1000)
+        self.last_timestamp_ms = 0 # 0 is the landmarkers' warm-up frame (startup.py)
+        self.seq = 0
+        self.requested_size = None # (width, height) to set on the camera before the next read
+
+        # Stats
+        self.allocated = 0
+
+    def _resize(self, shape):
+        self.shape = shape
+        self.raw = np.empty(shape, dtype=np.uint8)
+        self._free = [FramePacket(self, shape) for _ in range(self.size)]
+        self.allocated += self.size
+
+    def _recycle(self, packet):
+        with self._lock:
+            if packet.shape == self.shape:
+                packet._mp_image = None
+                self._free.append(packet)
+
+    def acquire(self, shape):
+        with self._lock:
+            if shape != self.shape:
+                self._resize(shape)
+            if self._free:
+                packet = self._free.pop()
+            else:
+                # All packets in flight: grow instead of blocking capture
+                packet = FramePacket(self, shape)
+                self.allocated += 1
+        packet._refs = 1
+        return packet
+
+    def fill(self, frame):
+        """Mirror + convert a BGR frame into a pooled packet (caller owns one ref)."""
+        packet = self.acquire(frame.shape)
+        cv2.flip(frame, 1, dst=packet.bgr)
+        cv2.cvtColor(packet.bgr, cv2.COLOR_BGR2RGB, dst=packet.rgb)
+
+        # VIDEO mode landmarkers need strictly increasing timestamps
+        now_ms = int(time.time() * 1000) - self.start_time_ms
+        self.last_timestamp_ms = max(now_ms, self.last_timestamp_ms + 1)
+        self.seq += 1
+        packet.timestamp_ms = self.last_timestamp_ms
+        packet.seq = self.seq
+        packet.captured_at = time.time()
+        return packet
+
+    def set_capture_size(self, width, height):
+        """Change the camera resolution from any thread; applied by the capturing one."""
+        self.requested_size = (width, height)
+
+    def capture(self, cap):
+        """Read the next camera frame into the pool. Returns a packet or None."""
+        if self.requested_size:
+            (width, height), self.requested_size = self.requested_size, None
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if self.raw is not None:
+            ret, frame = cap.read(self.raw)
+        else:
+            ret, frame = cap.read()
+        if not ret or frame is None: return None
+        if frame is not self.raw:
+            # First frame, or the camera changed resolution
+            self.raw = frame
+        # Sources that know when the frame was taken (capture.py): its age at
+        # hand-off, and e2e_frame counts from the capture, not the read
+        frame_time = getattr(cap, "frame_time", None)
+        if frame_time: timings.record("frame_age", time.time() - frame_time)
+        packet = self.fill(frame)
+        if frame_time: packet.captured_at = frame_time
+        return packet
@@ -0,0 +1,240 @@
+"""
+Raw-frame ring buffer in shared memory, for consumers on the same machine
+(a native renderer, a recording sidecar, ...) that don't want MJPEG.
+
+Layout of the segment (all header fields int64):
+
+    [magic, version, slots, height, width, channels, latest_seq, closed]
+    slots x [seq, timestamp_ns]
+    slots x height*width*channels uint8 (BGR), 64-byte aligned
+
+Each slot is a seqlock: the writer zeroes its seq, copies the frame in and
+then publishes the new seq, so a reader that sees the same non-zero seq
+before and after touching the pixels knows the frame wasn't torn. Readers
+get NumPy views straight into the segment (no copy, no decode); a view
+stays valid until the writer wraps around to that slot again, i.e. for
+`slots - 1` frames.
+
+    reader = FrameRingReader()
+    while True:
+        item = reader.wait(timeout=1.0)
+        if item is None: continue
+        seq, ts_ns, frame = item
+        ...use frame...
+        if not reader.valid(seq): ...  # overwritten while we were using it
+
+`python frame_ring.py` is a minimal consumer that reports what it receives.
+"""
+import argparse
+import json
+import sys
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+DEFAULT_NAME = "narcissus_frames"
+MAGIC = 0x4E415243 # "NARC"
+VERSION = 1
+HEADER_WORDS = 8
+LATEST, CLOSED = 6, 7
+
+
+def _layout(slots, shape):
+    """(slot header offset, data offset, total bytes)."""
+    frame_bytes = int(np.prod(shape))
+    slot_hdr = HEADER_WORDS * 8
+    data = -(-(slot_hdr + slots * 16) // 64) * 64
+    return slot_hdr, data, data + slots * frame_bytes
+
+
+def _release(shm):
+    try:
+        shm.close()
+    except BufferError:
+        pass # A caller still holds a frame view; the mapping goes when it does
+
+
+def _views(buf, slots, shape):
+    slot_hdr, data, size = _layout(slots, shape)
+    header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=buf)
+    slot_meta = np.ndarray((slots, 2), dtype=np.int64, buffer=buf, offset=slot_hdr)
+    frames = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=buf, offset=data)
+    return header, slot_meta, frames
+
+
+class FrameRingWriter:
+    """
+    Frame sink (update_frame) that publishes into the shared ring.
+    The segment is created on the first frame and recreated, with the old
+    one marked closed, if the frame shape changes.
+    """
+    def __init__(self, name=DEFAULT_NAME, slots=4):
+        self.name = name
+        self.slots = slots
+        self.shm = None
+        self.shape = None
+        self.seq = 0
+
+        # Stats
+        self.written = 0
+
+    def _create(self, shape):
+        self.close()
+        try:
+            # Left behind by a crashed run
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=_layout(self.slots, shape)[2])
+        self.shape = shape
+        self.header, self.slot_meta, self.frames = _views(self.shm.buf, self.slots, shape)
+        self.slot_meta[:] = 0
+        self.header[:] = (MAGIC, VERSION, self.slots, shape[0], shape[1], shape[2], self.seq, 0)
+
+    def update_frame(self, frame):
+        if frame.shape != self.shape:
+            self._create(frame.shape)
+        seq = self.seq + 1
+        meta = self.slot_meta[seq % self.slots]
+        meta[0] = 0 # Being written
+        np.copyto(self.frames[seq % self.slots], frame)
+        meta[1] = time.time_ns()
+        meta[0] = seq
+        self.header[LATEST] = seq
+        self.seq = seq
+        self.written += 1
+
+    def close(self):
+        if self.shm is None: return
+        self.header[CLOSED] = 1
+        del self.header, self.slot_meta, self.frames
+        self.shm.unlink()
+        _release(self.shm)
+        self.shm = None
+        self.shape = None
+
+
+class FrameRingReader:
+    """
+    Attaches to a FrameRingWriter's segment (any process on the machine)
+    and hands out the newest frame as a zero-copy view.
+    """
+    def __init__(self, name=DEFAULT_NAME):
+        self.name = name
+        self.shm = None
+        self.last_seq = 0
+
+        # Stats
+        self.read = 0
+        self.missed = 0 # frames the writer published that we never saw
+        self.torn = 0 # reads retried because the writer was in the slot
+
+    def attach(self, timeout=5.0):
+        """Open the segment, waiting up to `timeout` s for the writer. Returns True when attached."""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                shm = shared_memory.SharedMemory(name=self.name)
+                break
+            except FileNotFoundError:
+                if time.time() >= deadline: return False
+                time.sleep(0.05)
+        if sys.version_info < (3, 13):
+            # Readers must not unlink the writer's segment on exit
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        if header[0] != MAGIC or header[1] != VERSION:
+            del header
+            shm.close()
+            raise RuntimeError(f"{self.name} is not a v{VERSION} frame ring")
+        slots, shape = int(header[2]), (int(header[3]), int(header[4]), int(header[5]))
+        del header
+        self.shm = shm
+        self.slots, self.shape = slots, shape
+        self.header, self.slot_meta, self.frames = _views(shm.buf, slots, shape)
+        self.last_seq = 0
+        return True
+
+    def latest(self):
+        """(seq, timestamp_ns, frame view) for the newest frame, or None if nothing new."""
+        if self.shm is None or self.header[CLOSED]:
+            # Writer restarted (e.g. resolution change): reattach
+            self.close()
+            if not self.attach(timeout=0): return None
+
+        for _ in range(3):
+            seq = int(self.header[LATEST])
+            if seq == 0 or seq == self.last_seq: return None
+            slot = seq % self.slots
+            ts = int(self.slot_meta[slot, 1])
+            frame = self.frames[slot]
+            if int(self.slot_meta[slot, 0]) != seq:
+                self.torn += 1
+                continue
+            if self.last_seq and seq > self.last_seq + 1:
+                self.missed += seq - self.last_seq - 1
+            self.last_seq = seq
+            self.read += 1
+            return seq, ts, frame
+        return None
+
+    def wait(self, timeout=1.0, poll=0.001):
+        """Poll for the next frame (1 ms steps). Returns latest() or None on timeout."""
+        deadline = time.perf_counter() + timeout
+        while True:
+            item = self.latest()
+            if item is not None or time.perf_counter() >= deadline:
+                return item
+            time.sleep(poll)
+
+    def valid(self, seq):
+        """True while frame `seq` hasn't been overwritten (check after using a view)."""
+        return self.shm is not None and int(self.slot_meta[seq % self.slots, 0]) == seq
+
+    def close(self):
+        if self.shm is None: return
+        del self.header, self.slot_meta, self.frames
+        _release(self.shm)
+        self.shm = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read frames from the Narcissus shared-memory ring")
+    parser.add_argument("--name", default=DEFAULT_NAME)
+    parser.add_argument("--frames", type=int, default=300, help="Stop after this many frames")
+    parser.add_argument("--json", action="store_true", help="Print one JSON result line (for benchmark.py)")
+    args = parser.parse_args()
+
+    reader = FrameRingReader(args.name)
+    if not reader.attach(timeout=10):
+        sys.exit(f"No frame ring named {args.name}")
+    latency_ms, corrupt = [], 0
+    t_first = t_last = None
+    while reader.read < args.frames:
+        item = reader.wait(timeout=2.0)
+        if item is None: break
+        seq, ts_ns, frame = item
+        t_last = time.perf_counter()
+        t_first = t_first or t_last
+        # Touch the frame like a renderer would; benchmark writers stamp seq into the first 8 bytes
+        stamp = int(frame.reshape(-1)[:8].view(np.int64)[0])
+        frame[::16, ::16].sum()
+        if stamp != seq or not reader.valid(seq): corrupt += 1
+        latency_ms.append((time.time_ns() - ts_ns) / 1e6)
+    elapsed = (t_last - t_first) if t_first else 0.0
+    result = {"read": reader.read, "missed": reader.missed, "torn": reader.torn, "corrupt": corrupt,
+              "fps": round((reader.read - 1) / max(elapsed, 1e-6), 1), "latency_ms": latency_ms}
+    reader.close()
+    if args.json:
+        print(json.dumps(result))
+    else:
+        lat = np.percentile(latency_ms, (50, 99)) if latency_ms else (float("nan"),) * 2
+        print(f"🧊 {result['read']} frames at {result['fps']} FPS, missed {result['missed']}, "
+              f"latency p50 {lat[0]:.2f} / p99 {lat[1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
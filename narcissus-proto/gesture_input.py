@@ -1,26 +1,46 @@
 import cv2
-import mediapipe as mp
 import time
 import math
 import numpy as np
+from landmarks import Landmarks, HAND_CONNECTIONS, INDEX_TIP
+
+# MediaPipe is imported where it's used: it's slow to import, and with
+# landmark_worker the main process never needs it
+
+def create_hand_landmarker():
+    """The MediaPipe HandLandmarker (module level, so landmark_worker can build it in a worker process)."""
+    # Import TASKS API
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+
+    # Create HandLandmarker options
+    base_options = python.BaseOptions(model_asset_path='hand_landmarker.task')
+    options = vision.HandLandmarkerOptions(
+        base_options=base_options,
+        num_hands=1,
+        min_hand_detection_confidence=0.5,
+        min_hand_presence_confidence=0.5,
+        min_tracking_confidence=0.5,
+        running_mode=vision.RunningMode.VIDEO)
+        
+    return vision.HandLandmarker.create_from_options(options)
 
-# Import TASKS API
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
 
 class HandDetector:
-    def __init__(self):
-        # Create HandLandmarker options
-        base_options = python.BaseOptions(model_asset_path='hand_landmarker.task')
-        options = vision.HandLandmarkerOptions(
-            base_options=base_options,
-            num_hands=1,
-            min_hand_detection_confidence=0.5,
-            min_hand_presence_confidence=0.5,
-            min_tracking_confidence=0.5,
-            running_mode=vision.RunningMode.VIDEO)
-            
-        self.landmarker = vision.HandLandmarker.create_from_options(options)
+    def __init__(self, landmarker=None, region=None):
+        if landmarker is None:
+            landmarker = create_hand_landmarker()
+        # Any object with detect_for_video(mp_image, timestamp_ms) works (benchmarks use stand-ins,
+        # landmark_worker.RemoteLandmarker runs it in another process).
+        # accepts_arrays = True: it takes the RGB ndarray instead of an mp.Image
+        self.landmarker = landmarker
+        self.accepts_arrays = getattr(landmarker, "accepts_arrays", False)
+        
+        # Reduced-resolution / ROI-cropped inference (roi.InferenceRegion), None = full frame
+        self.region = region
+        
+        # Magic Zones: x < 0.2 is LEFT, x > 0.8 is RIGHT (normalized cursor)
+        self.ZONE_EDGES = np.array([0.2, 0.8])
         
         # State
         self.zone_timer = 0
@@ -33,73 +53,83 @@ class HandDetector:
         self.alpha = 0.5
         self.start_time_ms = int(time.time() * 1000)
 
-    def find_gestures(self, frame):
+    def zone(self, x):
+        """Magic Zone of a normalized cursor x (the edges themselves are centre)."""
+        left, right = self.ZONE_EDGES
+        if x < left: return "LEFT_ZONE"
+        if x > right: return "RIGHT_ZONE"
+        return None
+
+    def find_gestures(self, frame, packet=None):
         """
         Returns: gesture_name, frame, cursor_pos
+        With a FramePacket, its shared mp.Image/timestamp are used and
+        `frame` may be None (no debug drawing).
         """
-        # Convert to MP Image
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        
-        # Timestamp for Video Mode
-        timestamp = int(time.time() * 1000) - self.start_time_ms
+        region = self.region if self.region is not None and not self.region.passthrough else None
+        wrap = not self.accepts_arrays
+        if packet is not None:
+            mp_image = None if region or not wrap else packet.mp_image
+            rgb = packet.rgb
+            timestamp = packet.timestamp_ms
+            h, w, c = packet.shape
+        else:
+            # Convert to MP Image
+            import mediapipe as mp
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            mp_image = None if region or not wrap else mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+            
+            # Timestamp for Video Mode
+            timestamp = int(time.time() * 1000) - self.start_time_ms
+            h, w, c = frame.shape
+        if region:
+            # Downscaled and/or cropped around the last hand
+            mp_image, crop = region.prepare(rgb, wrap=wrap)
+        elif not wrap:
+            mp_image = rgb
         
         # Detect
         # detect_for_video returns a HandLandmarkerResult
         detection_result = self.landmarker.detect_for_video(mp_image, timestamp)
         
-        h, w, c = frame.shape
+        draw = frame is not None
         cursor_pos = {'x': -1, 'y': -1}
         gesture = None
         
         if detection_result.hand_landmarks:
             # We asked for 1 hand
-            hand_lms = detection_result.hand_landmarks[0]
+            # (N, 3) array in full-frame normalized coords
+            hand = Landmarks.from_mp(detection_result.hand_landmarks[0])
+            if region:
+                region.update(region.to_full(hand.points, crop))
             
             # --- Draw Logic (Custom, since solutions.drawing_utils might be missing) ---
-            # Index Tip is index 8
-            # Wrist 0, ThumbCMC 1, ThumbMCP 2, ThumbIP 3, ThumbTip 4
-            # IndexMCP 5, IndexPIP 6, IndexDIP 7, IndexTip 8
-            # ...
-            
-            # Draw Connections (Simple subset for viz)
-            connections = [
-                (0,1), (1,2), (2,3), (3,4), # Thumb
-                (0,5), (5,6), (6,7), (7,8), # Index
-                (5,9), (9,10), (10,11), (11,12), # Middle
-                (9,13), (13,14), (14,15), (15,16), # Ring
-                (13,17), (17,18), (18,19), (19,20), # Pinky
-                (0,17) # Wrist
-            ]
-            
-            points = []
-            for lm in hand_lms:
-                px, py = int(lm.x * w), int(lm.y * h)
-                points.append((px, py))
-                cv2.circle(frame, (px, py), 3, (0, 255, 0), -1)
-                
-            for start_idx, end_idx in connections:
-                if start_idx < len(points) and end_idx < len(points):
-                    cv2.line(frame, points[start_idx], points[end_idx], (0, 255, 0), 1)
+            # Connections (Simple subset for viz) are landmarks.HAND_CONNECTIONS
+            if draw:
+                points = hand.to_pixels(w, h)
+                for px, py in points:
+                    cv2.circle(frame, (int(px), int(py)), 3, (0, 255, 0), -1)
+                # All bones in one call: (K, 2, 2) segments
+                cv2.polylines(frame, points[HAND_CONNECTIONS], False, (0, 255, 0), 1)
 
             # --- Cursor Logic ---
-            index_tip = hand_lms[8]
+            tip_x, tip_y = (float(v) for v in hand.points[INDEX_TIP, :2])
             
             # Smoothing
-            if self.prev_x == -1: self.prev_x, self.prev_y = index_tip.x, index_tip.y
+            if self.prev_x == -1: self.prev_x, self.prev_y = tip_x, tip_y
             
-            smooth_x = (self.alpha * index_tip.x) + ((1 - self.alpha) * self.prev_x)
-            smooth_y = (self.alpha * index_tip.y) + ((1 - self.alpha) * self.prev_y)
+            smooth_x = (self.alpha * tip_x) + ((1 - self.alpha) * self.prev_x)
+            smooth_y = (self.alpha * tip_y) + ((1 - self.alpha) * self.prev_y)
             
             self.prev_x, self.prev_y = smooth_x, smooth_y
             cursor_pos = {'x': smooth_x, 'y': smooth_y}
             
-            cx, cy = int(smooth_x * w), int(smooth_y * h)
-            cv2.circle(frame, (cx, cy), 15, (255, 0, 255), cv2.FILLED)
+            if draw:
+                cx, cy = int(smooth_x * w), int(smooth_y * h)
+                cv2.circle(frame, (cx, cy), 15, (255, 0, 255), cv2.FILLED)
 
             # --- Zone Logic ---
-            detected_zone = None
-            if smooth_x < 0.2: detected_zone = "LEFT_ZONE"
-            elif smooth_x > 0.8: detected_zone = "RIGHT_ZONE"
+            detected_zone = self.zone(smooth_x)
             
             if detected_zone:
                 if detected_zone == self.current_zone:
@@ -116,10 +146,12 @@ class HandDetector:
         else:
             self.prev_x = -1
             self.current_zone = None
+            if region: region.update(None)
 
         # Viz Zones
-        zone_w = int(w * 0.2)
-        cv2.rectangle(frame, (0, 0), (zone_w, h), (0, 255, 0), 2)
-        cv2.rectangle(frame, (w-zone_w, 0), (w, h), (0, 255, 0), 2)
+        if draw:
+            left_x, right_x = (self.ZONE_EDGES * w).astype(int)
+            cv2.rectangle(frame, (0, 0), (left_x, h), (0, 255, 0), 2)
+            cv2.rectangle(frame, (right_x, 0), (w, h), (0, 255, 0), 2)
 
         return gesture, frame, cursor_pos
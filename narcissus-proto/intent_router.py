@@ -0,0 +1,165 @@
+import re
+import time
+
+# Extra phrasings per (tool, enum value). The enum values themselves come
+# from the tool schema, so a new color/setting is routed without edits here.
+SYNONYMS = {
+    ('control_hardware', 'mirror_mode'): [
+        "mirror", "camera", "camera mode", "video", "video mode", "reflection",
+        "camera on", "video on",
+    ],
+    ('control_hardware', 'dashboard_mode'): [
+        "dashboard", "widgets", "home", "home screen", "hide camera", "hide video",
+        "camera off", "video off",
+    ],
+    # Everything off; lipstick alone comes from EFFECT_OFF ("lipstick off", "no lips", ...)
+    ('control_makeup', 'off'): [
+        "makeup off", "all makeup off", "remove makeup", "remove the makeup", "remove all makeup",
+        "no makeup", "clear makeup", "take off makeup", "take off the makeup", "take off all makeup",
+        "turn off makeup", "turn off the makeup",
+    ],
+}
+
+# Words a color can be paired with ("red lips", "lipstick pink", ...)
+MAKEUP_NOUNS = ["lips", "lip", "lipstick", "lip color", "makeup"]
+LIP_NOUNS = ["lipstick", "lips", "lip color"] # what "<noun> off" takes off the lipstick alone
+EFFECT_NAMES = ["blush", "eyeshadow", "eyeliner"]
+# Colors too vague to route on their own ("dark" could mean the screen)
+BARE_COLOR_BLOCKLIST = {"dark", "black", "off"}
+# Settings that mean nothing without a value ("brightness" alone would set the
+# default); only their own patterns (BRIGHTNESS_RE) route them
+NEEDS_VALUE = {('control_hardware', 'brightness')}
+# Ways to take a single effect off ("blush off", "remove the eyeliner", ...)
+EFFECT_OFF = ["{} off", "no {}", "remove {}", "remove the {}", "take off {}", "take off the {}", "turn off {}"]
+
+# Polite / command prefixes stripped before matching
+FILLERS = [
+    "please", "can you", "could you", "would you", "will you", "i want", "i'd like", "i would like",
+    "i wanna", "let's", "lets", "switch to", "switch", "go to", "change to", "turn on", "set",
+    "apply", "put on", "give me", "show me", "show", "use", "to", "the", "a", "some", "me", "now", "mode",
+]
+
+PLAY_RE = re.compile(r"^play\s+(?P<query>.+)$")
+# "play ..." that isn't music ("play a game with me", "play twenty questions")
+NOT_MUSIC = {"game", "games", "questions", "quiz", "trivia", "riddle", "riddles", "pretend"}
+BRIGHTNESS_RE = re.compile(
+    r"^(?:(?:screen )?brightness(?: to| at)? (?P<a>\d{1,3})(?: ?%| percent)?"
+    r"|(?P<b>\d{1,3})(?: ?%| percent)? brightness)$")
+FILLER_RE = re.compile(r"^(?:(?:" + "|".join(re.escape(f) for f in sorted(FILLERS, key=len, reverse=True)) + r")\s+)+")
+TRAILING_RE = re.compile(r"\s+(?:please|now|mode)$")
+
+
+def normalize(text):
+    text = text.lower().replace("%", " % ")
+    text = re.sub(r"[^a-z0-9%' ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class IntentRouter:
+    """
+    Fast path for deterministic voice commands.
+
+    route(text) returns (tool_name, args) for commands that map one-to-one
+    onto a tool in `narcissus_tools`, and None for anything unmatched or
+    ambiguous (those still go to the LLM). Phrases are compiled into a
+    single dict, so a lookup is a normalize + strip + hash.
+    """
+    def __init__(self, tools, synonyms=SYNONYMS):
+        self.phrases = {}
+        self.ambiguous = set()
+        self.tool_names = {t['function']['name'] for t in tools}
+        self.makeup_words = {word for noun in MAKEUP_NOUNS + EFFECT_NAMES for word in noun.split()}
+
+        for tool in tools:
+            fn = tool['function']
+            for param, spec in fn['parameters']['properties'].items():
+                for value in spec.get('enum', []):
+                    args = {param: value}
+                    for phrase in self._phrases_for(fn['name'], param, value, synonyms):
+                        self._add(phrase, fn['name'], args)
+            self._add_effect_phrases(fn)
+
+        # Stats
+        self.routed = 0
+        self.fallthrough = 0
+
+    def _phrases_for(self, tool_name, param, value, synonyms):
+        if (tool_name, value) in NEEDS_VALUE: return []
+        phrases = [value.replace("_", " ")]
+        if value.endswith("_mode"):
+            phrases.append(value[:-len("_mode")])
+        if tool_name == 'control_makeup' and param != 'color':
+            pass # Effect names alone apply their default shade
+        elif tool_name == 'control_makeup' and value != 'off':
+            for noun in MAKEUP_NOUNS:
+                phrases += [f"{value} {noun}", f"{noun} {value}"]
+            if value in BARE_COLOR_BLOCKLIST:
+                phrases.remove(value)
+        elif tool_name == 'control_makeup':
+            phrases.remove(value)
+        phrases += synonyms.get((tool_name, value), [])
+        return phrases
+
+    def _add_effect_phrases(self, fn):
+        """"pink blush" / "blush pink" / "blush off" for tools taking both a color and an effect."""
+        props = fn['parameters']['properties']
+        if 'color' not in props or 'effect' not in props: return
+        for effect in props['effect'].get('enum', []):
+            for color in props['color'].get('enum', []):
+                # "<color> lipstick" already means the lipstick color; its off phrases
+                # must still name the effect, or set_color("off") clears everything
+                if effect == 'lipstick' and color != 'off': continue
+                args = {'color': color, 'effect': effect}
+                nouns = LIP_NOUNS if effect == 'lipstick' else [effect]
+                phrases = [p.format(noun) for p in EFFECT_OFF for noun in nouns] if color == 'off' else \
+                    [f"{color} {effect}", f"{effect} {color}"]
+                for phrase in phrases:
+                    self._add(phrase, fn['name'], args)
+
+    def _add(self, phrase, tool_name, args):
+        phrase = normalize(phrase)
+        existing = self.phrases.get(phrase)
+        if existing and existing != (tool_name, args):
+            # Same phrase for two intents: let the LLM decide
+            self.ambiguous.add(phrase)
+        self.phrases[phrase] = (tool_name, args)
+
+    def route(self, text):
+        match = self.match(text)
+        if match: self.routed += 1
+        else: self.fallthrough += 1
+        return match
+
+    def match(self, text):
+        """route() without counting it in the stats (to classify an event ahead of handling it)."""
+        text = normalize(text)
+        return self._match(TRAILING_RE.sub("", FILLER_RE.sub("", text)))
+
+    def _match(self, text):
+        if not text: return None
+
+        hit = self.phrases.get(text)
+        if hit and text not in self.ambiguous:
+            return hit[0], dict(hit[1])
+
+        m = BRIGHTNESS_RE.match(text)
+        if m and 'control_hardware' in self.tool_names:
+            value = int(m.group('a') or m.group('b'))
+            if value <= 100:
+                return 'control_hardware', {'setting': 'brightness', 'value': value}
+
+        m = PLAY_RE.match(text)
+        if m and 'play_youtube_music' in self.tool_names:
+            query = m.group('query').strip()
+            if query.startswith("some "): query = query[5:]
+            words = set(query.split())
+            if words & NOT_MUSIC or words & self.makeup_words or query.split()[-2:] == ["with", "me"]: return None
+            if query and query not in ("music", "something", "a song"):
+                return 'play_youtube_music', {'query': query}
+        return None
+
+    def timed_route(self, text):
+        """route() plus its latency in microseconds."""
+        t0 = time.perf_counter()
+        match = self.route(text)
+        return match, (time.perf_counter() - t0) * 1e6
@@ -0,0 +1,238 @@
+"""
+Landmarkers hosted in worker processes.
+
+RemoteLandmarker is a drop-in for a MediaPipe landmarker (detect_for_video)
+that runs the real one in its own process, so hand and face inference use
+separate cores instead of sharing the GIL with the main loop and with each
+other. Frames go in through a shared-memory segment (one copy, no pickling);
+each result comes back as compact (N, 3) float32 landmark arrays.
+
+    hand = RemoteLandmarker(create_hand_landmarker, "hand")
+    detector = HandDetector(landmarker=hand)
+
+The factory runs in the worker, so it must be picklable: a module-level
+function or a functools.partial of one. A worker that dies or hangs is
+killed and restarted in the background; calls made until the new one has
+loaded its model return "nothing detected".
+"""
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+import numpy as np
+from landmarks import Landmarks
+from perf import timings, register_gauge
+
+RESULT_ATTRS = {"hand": "hand_landmarks", "face": "face_landmarks"}
+
+
+def _serve(conn, factory, result_attr):
+    """Worker process: build the landmarker, then answer one frame per message until None."""
+    try:
+        landmarker = factory()
+    except Exception as e:
+        conn.send(("error", repr(e)))
+        return
+    wrap = not getattr(landmarker, "accepts_arrays", False)
+    if wrap:
+        import mediapipe as mp
+    conn.send(("ready", None))
+
+    shm = None
+    while True:
+        msg = conn.recv()
+        if msg is None: break
+        name, shape, timestamp_ms = msg
+        if shm is None or shm.name != name:
+            # The parent grew the segment
+            if shm is not None: shm.close()
+            # Spawned workers share the parent's resource tracker; the parent unlinks
+            shm = shared_memory.SharedMemory(name=name)
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame) if wrap else frame
+
+        t0 = time.perf_counter()
+        result = landmarker.detect_for_video(image, timestamp_ms)
+        targets = [Landmarks.from_mp(lms).points for lms in getattr(result, result_attr)]
+        busy = time.perf_counter() - t0
+        del image, frame
+        conn.send((targets, busy, time.process_time()))
+    if shm is not None: shm.close()
+
+
+class RemoteLandmarker:
+    """
+    detect_for_video() proxy for a landmarker in a supervised worker process.
+
+    - factory: picklable () -> landmarker, called in the worker
+    - kind: "hand" or "face" (which result list to return)
+    - timeout: seconds a call may take before the worker counts as hung
+    Restarts back off from 0.5 s up to 5 s while the worker keeps failing.
+    """
+    accepts_arrays = True # detect_for_video takes the RGB ndarray, no mp.Image needed
+
+    def __init__(self, factory, kind, timeout=2.0, startup_timeout=30.0):
+        self.factory = factory
+        self.kind = kind
+        self.result_attr = RESULT_ATTRS[kind]
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._ctx = multiprocessing.get_context("spawn") # No fork of a threaded process
+        self.process = None
+        self.conn = None
+        self.shm = None
+        self._segments = 0
+        self._retry_at = 0.0
+        self._backoff = 0.5
+        self._ready = False
+        self._started_at = 0.0
+
+        # Stats
+        self.calls = 0
+        self.restarts = 0
+        self.timeouts = 0
+        self.skipped = 0 # calls answered empty while the worker was down or loading
+        self.worker_busy = 0.0 # inference seconds inside the worker
+        self.worker_cpu = 0.0 # CPU seconds of previous worker incarnations
+        self._cpu = 0.0 # ... and of the current one
+
+        register_gauge("narcissus_landmarker_restarts_total", lambda: self.restarts,
+                       "Landmarker worker process restarts.", "counter", {"landmarker": kind})
+        self._start()
+
+    # --- Worker lifecycle ---
+    def _start(self, wait=True):
+        """Spawn the worker; wait=False returns at once and _check_ready() picks up its "ready" later."""
+        parent, child = self._ctx.Pipe()
+        self.process = self._ctx.Process(target=_serve, args=(child, self.factory, self.result_attr),
+                                         name=f"{self.kind}_landmarker", daemon=True)
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self._ready = False
+        self._started_at = time.time()
+        if wait:
+            self._check_ready(self.startup_timeout)
+
+    def _check_ready(self, timeout=0.0):
+        """True once the worker has loaded its model, False while it still is; raises if it failed."""
+        if self._ready: return True
+        if not self.conn.poll(timeout):
+            if time.time() - self._started_at < self.startup_timeout: return False
+            self._kill()
+            raise RuntimeError(f"{self.kind} landmarker worker did not start in {self.startup_timeout:.0f} s")
+        try:
+            status, detail = self.conn.recv()
+        except EOFError:
+            status, detail = "error", f"exited with code {self.process.exitcode}"
+        if status != "ready":
+            self._kill()
+            raise RuntimeError(f"{self.kind} landmarker worker failed to start: {detail}")
+        self._ready = True
+        print(f"🧵 {self.kind} landmarker running in process {self.process.pid}")
+        return True
+
+    def _kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join(timeout=1.0)
+        if self.conn is not None:
+            self.conn.close()
+        self.worker_cpu += self._cpu
+        self._cpu = 0.0
+        self.process = self.conn = None
+
+    def _restart(self, reason):
+        # Doesn't wait for the model to load: calls answer empty until the
+        # new worker reports ready (see detect_for_video)
+        exitcode = self.process.exitcode if self.process is not None else None
+        print(f"🔁 {self.kind} landmarker worker {reason} (exit code {exitcode}), restarting")
+        self._kill()
+        self.restarts += 1
+        try:
+            self._start(wait=False)
+        except Exception as e:
+            self._start_failed(e)
+
+    def _start_failed(self, error):
+        print(f"⚠️ {self.kind} landmarker restart failed: {error}")
+        self._retry_at = time.time() + self._backoff
+        self._backoff = min(self._backoff * 2, 5.0)
+
+    # --- Shared frame segment ---
+    def _frame_view(self, shape):
+        nbytes = int(np.prod(shape))
+        if self.shm is None or self.shm.size < nbytes:
+            self._release_segment()
+            self._segments += 1
+            name = f"narcissus_{self.kind}_{id(self):x}_{self._segments}"
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=nbytes)
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def _release_segment(self):
+        if self.shm is None: return
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    # --- Landmarker API ---
+    def detect_for_video(self, image, timestamp_ms):
+        """Same contract as the MediaPipe call; `image` is an RGB ndarray (or anything with numpy_view())."""
+        self.calls += 1
+        empty = SimpleNamespace(**{self.result_attr: []})
+        if self.conn is None:
+            if time.time() < self._retry_at:
+                self.skipped += 1
+                return empty
+            self._restart("is down")
+            if self.conn is None:
+                self.skipped += 1
+                return empty
+        try:
+            ready = self._check_ready()
+        except RuntimeError as e:
+            self._start_failed(e)
+            ready = False
+        if not ready:
+            self.skipped += 1 # Still loading the model
+            return empty
+
+        frame = image if isinstance(image, np.ndarray) else image.numpy_view()
+        t0 = time.perf_counter()
+        np.copyto(self._frame_view(frame.shape), frame)
+        try:
+            self.conn.send((self.shm.name, frame.shape, timestamp_ms))
+            if not self.conn.poll(self.timeout):
+                self.timeouts += 1
+                self._restart(f"hung for {self.timeout:.1f} s")
+                return empty
+            targets, busy, cpu = self.conn.recv()
+        except (EOFError, OSError):
+            self._restart("died")
+            return empty
+        self._backoff = 0.5
+        self.worker_busy += busy
+        self._cpu = cpu
+        # Round trip minus inference: shared-memory copy + pipe + wakeups
+        timings.record(f"{self.kind}_ipc", time.perf_counter() - t0 - busy)
+        return SimpleNamespace(**{self.result_attr: targets})
+
+    def cpu_seconds(self):
+        """CPU time used by all worker incarnations so far (as of their last reply)."""
+        return self.worker_cpu + self._cpu
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+                self.process.join(timeout=1.0)
+            except (OSError, EOFError):
+                pass
+        self._kill()
+        self._release_segment()
+
+    def stats(self):
+        return {"calls": self.calls, "restarts": self.restarts, "timeouts": self.timeouts,
+                "skipped": self.skipped, "worker_busy_s": round(self.worker_busy, 3),
+                "worker_cpu_s": round(self.cpu_seconds(), 3)}
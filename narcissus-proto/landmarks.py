@@ -0,0 +1,90 @@
+import numpy as np
+
+# --- Precomputed index arrays ---
+
+# FaceLandmarker lip contours, ORDERED for polygon filling (donut mask)
+# Outer Contour (Clockwise): lower half then upper half
+LIPS_OUTER = np.array([61, 146, 91, 181, 84, 17, 314, 405, 321, 375, 291,
+                       409, 270, 269, 267, 0, 37, 39, 40, 185, 61], dtype=np.intp)
+# Inner Contour (Mouth Hole)
+LIPS_INNER = np.array([78, 95, 88, 178, 87, 14, 317, 402, 318, 324, 308,
+                       415, 310, 311, 312, 13, 82, 81, 80, 191, 78], dtype=np.intp)
+
+# Makeup regions (FaceLandmarker indices, see ar_makeup.EFFECTS)
+CHEEK_LEFT = np.array([117, 118, 101, 36, 205, 187, 123, 116], dtype=np.intp)
+CHEEK_RIGHT = np.array([346, 347, 330, 266, 425, 411, 352, 345], dtype=np.intp)
+# Upper lash line, outer corner -> inner corner
+UPPER_LID_LEFT = np.array([33, 246, 161, 160, 159, 158, 157, 173, 133], dtype=np.intp)
+UPPER_LID_RIGHT = np.array([263, 466, 388, 387, 386, 385, 384, 398, 362], dtype=np.intp)
+# Lash line + the ring above it (back the other way): the lid as a polygon
+EYESHADOW_LEFT = np.concatenate([UPPER_LID_LEFT, [243, 190, 56, 28, 27, 29, 30, 247, 130]]).astype(np.intp)
+EYESHADOW_RIGHT = np.concatenate([UPPER_LID_RIGHT, [463, 414, 286, 258, 257, 259, 260, 467, 359]]).astype(np.intp)
+
+# HandLandmarker: Wrist 0, Thumb 1-4, Index 5-8, Middle 9-12, Ring 13-16, Pinky 17-20
+INDEX_TIP = 8
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4), # Thumb
+    (0, 5), (5, 6), (6, 7), (7, 8), # Index
+    (5, 9), (9, 10), (10, 11), (11, 12), # Middle
+    (9, 13), (13, 14), (14, 15), (15, 16), # Ring
+    (13, 17), (17, 18), (18, 19), (19, 20), # Pinky
+    (0, 17) # Wrist
+], dtype=np.intp)
+
+
+class Landmarks:
+    """
+    One landmarker result as a compact (N, 3) float32 array of normalized
+    x, y, z. Everything downstream (lip contours, cursor, zones, boxes)
+    is sliced out of `points` with the index arrays above.
+    """
+    __slots__ = ("points",)
+
+    def __init__(self, points):
+        self.points = points
+
+    @classmethod
+    def from_mp(cls, mp_landmarks):
+        """From a MediaPipe NormalizedLandmark list (the only per-point loop)."""
+        if isinstance(mp_landmarks, np.ndarray):
+            return cls(mp_landmarks) # Already compact (landmark_worker results)
+        n = len(mp_landmarks)
+        flat = np.fromiter((v for lm in mp_landmarks for v in (lm.x, lm.y, lm.z)), dtype=np.float32, count=3 * n)
+        return cls(flat.reshape(n, 3))
+
+    def __len__(self):
+        return len(self.points)
+
+    def xy(self, indices=None):
+        return self.points[:, :2] if indices is None else self.points[indices, :2]
+
+    def to_pixels(self, w, h, indices=None):
+        return (self.xy(indices) * np.array([w, h], dtype=np.float32)).astype(np.int32)
+
+    def bbox(self):
+        """(x0, y0, x1, y1) normalized."""
+        lo = self.points[:, :2].min(axis=0)
+        hi = self.points[:, :2].max(axis=0)
+        return (float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1]))
+
+
+def point_in_polygon(x, y, poly):
+    """
+    Even-odd ray casting of one point against an (N, 2) closed polygon,
+    vectorized over the edges. No raster needed.
+    """
+    x0, y0 = poly[:, 0], poly[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    crosses = (y0 > y) != (y1 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at_y = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return bool(np.count_nonzero(crosses & (x < x_at_y)) % 2)
+
+
+def lip_hit(x, y, outer, inner):
+    """Inside the outer lip contour but not in the mouth hole."""
+    # Cheap bounding-box reject first: the cursor is rarely near the mouth
+    lo, hi = outer.min(axis=0), outer.max(axis=0)
+    if not (lo[0] <= x <= hi[0] and lo[1] <= y <= hi[1]):
+        return False
+    return point_in_polygon(x, y, outer) and not point_in_polygon(x, y, inner)
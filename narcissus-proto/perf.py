@@ -0,0 +1,119 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+
+# Histogram bucket upper bounds (seconds), frame-scale up to LLM-scale
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class StageTimings:
+    """
+    Latency per named stage (capture, hand, face, render, encode, ...).
+
+    Each stage keeps a rolling window of samples (summary() p50/p95/p99 for
+    the replay harness) and a cumulative histogram for /metrics.
+    record() is a deque append plus a bisect, cheap enough to stay on in
+    production.
+    """
+    def __init__(self, window=4096):
+        self.window = window
+        self._samples = {} # name -> deque of seconds
+        self.counts = {} # name -> total samples ever recorded
+        self.sums = {} # name -> total seconds
+        self.buckets = {} # name -> per-bucket counts (last one is +Inf)
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        samples = self._samples.get(name)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(name, deque(maxlen=self.window))
+                self.counts.setdefault(name, 0)
+                self.sums.setdefault(name, 0.0)
+                self.buckets.setdefault(name, [0] * (len(BUCKETS) + 1))
+        samples.append(seconds)
+        self.counts[name] += 1
+        self.sums[name] += seconds
+        self.buckets[name][bisect_left(BUCKETS, seconds)] += 1
+
+    @contextmanager
+    def time(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def recent(self, name, n):
+        """The last n samples of a stage (seconds, oldest first; fewer if the window is shorter)."""
+        samples = self._samples.get(name)
+        if not samples or n <= 0: return []
+        return list(samples)[-n:]
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self.counts.clear()
+            self.sums.clear()
+            self.buckets.clear()
+
+    def summary(self):
+        """{name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} over the window."""
+        with self._lock:
+            items = [(name, list(samples)) for name, samples in self._samples.items()]
+        out = {}
+        for name, samples in sorted(items):
+            if not samples: continue
+            ms = 1000 * np.asarray(samples)
+            p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+            out[name] = {"count": self.counts[name], "mean_ms": round(float(ms.mean()), 3),
+                         "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+                         "p99_ms": round(float(p99), 3), "max_ms": round(float(ms.max()), 3)}
+        return out
+
+    def prometheus(self, metric="narcissus_stage_seconds"):
+        lines = [f"# HELP {metric} Latency of each hot-path stage.", f"# TYPE {metric} histogram"]
+        with self._lock:
+            names = sorted(self.buckets)
+        for name in names:
+            counts = list(self.buckets[name])
+            cumulative = 0
+            for le, n in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {self.sums[name]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {cumulative}')
+        return lines
+
+
+# Process-wide timings, shared by the pipeline, video server and assistant
+timings = StageTimings()
+
+# Gauges / counters read at scrape time: (name, labels) -> (help, type, fn)
+_gauges = {}
+
+
+def register_gauge(name, fn, help="", kind="gauge", labels=None):
+    """Export fn() as `name` on /metrics. Nothing runs until a scrape, so it costs the hot path nothing."""
+    _gauges[(name, tuple(sorted((labels or {}).items())))] = (help, kind, fn)
+
+
+def prometheus_text():
+    """Prometheus text exposition of all stage histograms and registered gauges."""
+    lines = timings.prometheus()
+    seen = set()
+    for (name, labels), (help, kind, fn) in sorted(_gauges.items(), key=lambda item: item[0]):
+        if name not in seen:
+            seen.add(name)
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        try:
+            value = float(fn())
+        except Exception:
+            continue
+        label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"{name}{{{label_str}}} {value:g}" if label_str else f"{name} {value:g}")
+    return "\n".join(lines) + "\n"
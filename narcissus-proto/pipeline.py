@@ -0,0 +1,215 @@
+import threading
+import time
+from frame_packet import FramePool
+from perf import timings
+
+
+class LatestSlot:
+    """
+    Bounded hand-off between two pipeline stages.
+    Holds at most one item: a newer put() replaces an unread older one
+    (latest-wins), so a slow consumer never works on stale frames.
+    """
+    def __init__(self, name="slot", on_drop=None):
+        self.name = name
+        self.on_drop = on_drop  # Called with each item that gets replaced unread
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+
+        # Stats
+        self.puts = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            stale = self._item
+            self._item = item
+            self.puts += 1
+            if stale is not None:
+                self.dropped += 1
+            self._cond.notify_all()
+        if stale is not None and self.on_drop:
+            self.on_drop(stale)
+
+    def get(self, timeout=None):
+        """Wait for the next item. Returns None on timeout or when closed."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._item is None and not self._closed:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Stage(threading.Thread):
+    """
+    One pipeline stage on its own thread.
+    Takes items from `inbox` (or calls `fn()` as a source when inbox is None),
+    and puts every non-None result into all `outboxes`.
+    """
+    def __init__(self, name, fn, inbox=None, outboxes=()):
+        super().__init__(name=name, daemon=True)
+        self.fn = fn
+        self.inbox = inbox
+        self.outboxes = list(outboxes)
+        self.running = True
+
+        # Stats
+        self.processed = 0
+        self.busy_time = 0.0
+        self.errors = 0
+
+    def run(self):
+        while self.running:
+            if self.inbox is not None:
+                item = self.inbox.get(timeout=0.1)
+                if item is None: continue
+
+            t0 = time.perf_counter()
+            try:
+                result = self.fn(item) if self.inbox is not None else self.fn()
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Pipeline stage '{self.name}' error: {e}")
+                result = None
+            busy = time.perf_counter() - t0
+            self.busy_time += busy
+            if result is not None or self.inbox is not None:
+                timings.record(self.name, busy)
+
+            if result is None:
+                # Sinks (no outboxes) still count as having processed the item
+                if not self.outboxes and self.inbox is not None: self.processed += 1
+                continue
+            self.processed += 1
+            for slot in self.outboxes:
+                slot.put(result)
+
+    def stop(self):
+        self.running = False
+
+
+class VisionPipeline:
+    """
+    Staged version of the main vision loop:
+
+        capture ─┬─> hand inference ──> cursor publish
+                 └─> face inference / AR render ──> frame publish
+
+    Hand and face landmarking run in parallel on the same captured frame.
+    Every hand-off is a LatestSlot, so throughput is set by the slowest
+    stage instead of the sum of all stages.
+    """
+    def __init__(self, cap, detector, ar_app, streamer, on_hand_result, publish_cursor):
+        self.cap = cap
+        self.detector = detector
+        self.ar_app = ar_app
+        self.streamer = streamer
+        self.on_hand_result = on_hand_result  # (gesture, cursor_pos, frame_w, frame_h) -> None
+        self.publish_cursor = publish_cursor  # (cursor_pos) -> None
+
+        # Pooled FramePackets: flip + RGB conversion happen once per frame
+        self.pool = FramePool()
+
+        release = lambda packet: packet.release()
+        self.hand_in = LatestSlot("hand_in", on_drop=release)
+        self.face_in = LatestSlot("face_in", on_drop=release)
+        self.cursor_out = LatestSlot("cursor_out")
+        self.frame_out = LatestSlot("frame_out", on_drop=lambda item: item[0].release())
+        self.slots = [self.hand_in, self.face_in, self.cursor_out, self.frame_out]
+
+        self.stages = [
+            Stage("capture", self._capture),
+            Stage("hand", self._hand, inbox=self.hand_in, outboxes=[self.cursor_out]),
+            Stage("face", self._face, inbox=self.face_in, outboxes=[self.frame_out]),
+            Stage("publish_frame", self._publish_frame, inbox=self.frame_out),
+            Stage("publish_cursor", self._publish_cursor, inbox=self.cursor_out),
+        ]
+        self.start_time = None
+
+    # --- Stages ---
+    def _capture(self):
+        if not self.cap.isOpened():
+            time.sleep(0.1)
+            return None
+        packet = self.pool.capture(self.cap)
+        if packet is None: return None
+
+        # One reference per consumer stage, drop our own
+        packet.retain()
+        packet.retain()
+        self.hand_in.put(packet)
+        self.face_in.put(packet)
+        seq = packet.seq
+        packet.release()
+        return seq
+
+    def _hand(self, packet):
+        try:
+            gesture, _, cursor_pos = self.detector.find_gestures(None, packet=packet)
+            h, w = packet.shape[:2]
+        finally:
+            packet.release()
+        self.on_hand_result(gesture, cursor_pos, w, h)
+        return cursor_pos
+
+    def _face(self, packet):
+        try:
+            frame = self.ar_app.process_frame(packet.bgr, packet=packet)
+        except Exception:
+            packet.release()
+            raise
+        # Packet stays alive until the frame has been published
+        return (packet, frame)
+
+    def _publish_frame(self, item):
+        packet, frame = item
+        try:
+            self.streamer.update_frame(frame)
+            # Capture hand-off -> frame handed to the streamer
+            timings.record("e2e_frame", time.time() - packet.captured_at)
+        finally:
+            packet.release()
+        return None
+
+    def _publish_cursor(self, cursor_pos):
+        self.publish_cursor(cursor_pos)
+        return None
+
+    # --- Control ---
+    def start(self):
+        self.start_time = time.time()
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for slot in self.slots:
+            slot.close()
+        for stage in self.stages:
+            stage.join(timeout=1.0)
+
+    def stats(self):
+        """Per-stage FPS / busy time and per-slot drop counts."""
+        elapsed = max(time.time() - (self.start_time or time.time()), 1e-6)
+        return {
+            "stages": {
+                s.name: {
+                    "fps": round(s.processed / elapsed, 1),
+                    "busy_ms": round(1000 * s.busy_time / max(s.processed, 1), 2),
+                    "errors": s.errors,
+                } for s in self.stages
+            },
+            "dropped": {slot.name: slot.dropped for slot in self.slots},
+        }
+
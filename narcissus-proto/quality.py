@@ -0,0 +1,206 @@
+"""
+Adaptive quality: hold the vision loop at a target frame rate under load.
+
+Once per window, QualityController reads the loop rate (frames through
+e2e_frame) and the median per-stage costs from perf.timings. When the loop falls
+behind and the vision stages are what's slow (not the camera), it steps
+one rung down the LADDER; with headroom for a while, it steps back up
+(last change first). Every change is logged.
+
+    knobs, base = mirror_knobs(cap, pool, detector, ar_app, face_scheduler, broadcaster)
+    quality = QualityController(knobs, base, target_fps=24)
+    ... quality.update() # From the main loop, as often as convenient
+"""
+import time
+import cv2
+import numpy as np
+from perf import timings, register_gauge
+
+# Degrade order, one rung per step ("capture" is a fraction of the starting
+# resolution). Rungs that aren't below the starting setting (e.g. scale 0.75
+# when INFERENCE_SCALE is already 0.5) are skipped.
+LADDER = [
+    ("capture", 0.75),
+    ("capture", 0.5),
+    ("inference_scale", 0.75),
+    ("inference_scale", 0.5),
+    ("face_hz", 15),
+    ("face_hz", 8),
+    ("jpeg_quality", 80),
+    ("jpeg_quality", 60),
+    ("stream_fps", 20),
+    ("stream_fps", 12),
+]
+
+# Stages whose costs add up on one thread: pipeline mode runs each on its
+# own (the slowest one sets the pace), the serial loop runs them in a row.
+# The JPEG encoder has its own thread in both.
+PIPELINE_STAGES = [["hand"], ["face"], ["publish_frame"], ["encode"]]
+SERIAL_STAGES = [["hand", "face", "publish_frame", "publish_cursor"], ["encode"]]
+
+
+def _rank(value):
+    """Comparable quality of a knob setting; None (unlimited) is the best."""
+    return float("inf") if value is None else value
+
+
+def _fmt(value):
+    return "max" if value is None else f"{value:g}"
+
+
+def mirror_knobs(cap, pool, detector, ar_app, face_scheduler, broadcaster):
+    """Setters for the mirror's quality knobs, and their current settings (pool: the capturing FramePool)."""
+    full = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def set_capture(fraction):
+        # Even sizes: some camera drivers / encoders reject odd ones
+        pool.set_capture_size(2 * round(full[0] * fraction / 2), 2 * round(full[1] * fraction / 2))
+
+    def set_scale(scale):
+        detector.region.scale = scale
+        ar_app.region.scale = scale
+
+    knobs = {
+        "capture": set_capture,
+        "inference_scale": set_scale,
+        "face_hz": lambda hz: setattr(face_scheduler, "max_hz", hz),
+        "jpeg_quality": lambda q: setattr(broadcaster, "jpeg_quality", q),
+        "stream_fps": lambda fps: setattr(broadcaster, "max_fps", fps),
+    }
+    base = {
+        "capture": 1.0,
+        "inference_scale": detector.region.scale,
+        "face_hz": face_scheduler.max_hz,
+        "jpeg_quality": broadcaster.jpeg_quality,
+        "stream_fps": broadcaster.max_fps,
+    }
+    return knobs, base
+
+
+class QualityController:
+    """
+    Feedback controller over a ladder of quality settings.
+
+    - knobs: {name: setter(value)}, base: {name: starting value}
+    - windows in the first `settle_s` after the first frame don't count
+      (startup work shares the CPU with the first frames)
+    - down a rung after `patience` windows below target*(1 - tolerance)
+      while the slowest stage group costs over `bound_ratio` of the frame
+      budget (a slow camera alone doesn't count)
+    - up a rung after `restore_patience` windows on target with the
+      slowest group under `headroom_ratio` of the budget; a step up that
+      has to be undone soon after doubles that wait (up to 8x)
+    """
+    def __init__(self, knobs, base, ladder=LADDER, target_fps=24.0, stages=PIPELINE_STAGES, window_s=1.0,
+                 tolerance=0.1, patience=2, restore_patience=5, bound_ratio=0.6, headroom_ratio=0.5, settle_s=5.0):
+        self.knobs = knobs
+        self.base = dict(base)
+        self.ladder = [(k, v) for k, v in ladder if k in knobs and _rank(v) < _rank(base.get(k))]
+        self.target_fps = target_fps
+        self.stages = stages
+        self.window_s = window_s
+        self.tolerance = tolerance
+        self.patience = patience
+        self.restore_patience = restore_patience
+        self.bound_ratio = bound_ratio
+        self.headroom_ratio = headroom_ratio
+        self.settle_s = settle_s
+
+        self.level = 0 # rungs applied
+        self.settings = dict(self.base)
+        self._window = None # (start time, frames, {stage: count}) at the window start
+        self._first_frame = None
+        self._slow = 0
+        self._fast = 0
+        self._restore_wait = restore_patience
+        self._last_up = None # window index of the last step up
+        self._windows = 0
+
+        # Stats
+        self.fps = None
+        self.cost_ms = None # slowest stage group, per frame
+        self.changes = [] # {"t", "knob", "from", "to", "fps", "cost_ms"}
+        self.history = [] # (t, fps, cost_ms, level) per window
+
+        register_gauge("narcissus_quality_level", lambda: self.level, "Quality rungs given up to hold the frame rate.")
+
+    @property
+    def budget_ms(self):
+        return 1000.0 / self.target_fps
+
+    def _snapshot(self):
+        return {name: timings.counts.get(name, 0) for group in self.stages for name in group}
+
+    def update(self, now=None):
+        """Call often; acts once per window. Returns True when a setting changed."""
+        now = time.time() if now is None else now
+        frames = timings.counts.get("e2e_frame", 0)
+        if self._first_frame is None:
+            if frames: self._first_frame = now
+            return False
+        if self._window is None:
+            if now - self._first_frame < self.settle_s: return False
+            self._window = (now, frames, self._snapshot())
+            return False
+        t0, frames0, stages0 = self._window
+        if now - t0 < self.window_s: return False
+
+        stages = self._snapshot()
+        self._window = (now, frames, stages)
+        self._windows += 1
+        self.fps = (frames - frames0) / (now - t0)
+        cost = 0.0
+        for group in self.stages:
+            group_ms = 0.0
+            for name in group:
+                # Median, not mean: an LLM turn or GC pause shouldn't cost a rung
+                samples = timings.recent(name, stages[name] - stages0[name])
+                if samples: group_ms += 1000 * float(np.median(samples))
+            cost = max(cost, group_ms)
+        self.cost_ms = cost
+        self.history.append((round(now, 2), round(self.fps, 1), round(cost, 1), self.level))
+
+        if self.fps < self.target_fps * (1 - self.tolerance) and cost > self.bound_ratio * self.budget_ms:
+            self._slow, self._fast = self._slow + 1, 0
+        elif self.fps >= self.target_fps * (1 - self.tolerance / 2) and cost < self.headroom_ratio * self.budget_ms:
+            self._slow, self._fast = 0, self._fast + 1
+        else:
+            self._slow = self._fast = 0
+
+        if self._slow >= self.patience and self.level < len(self.ladder):
+            if self._last_up is not None and self._windows - self._last_up <= 2 * self.patience:
+                # The last step up didn't hold: wait longer before the next one
+                self._restore_wait = min(2 * self._restore_wait, 8 * self.restore_patience)
+            self._step(self.level + 1, now)
+            return True
+        if self._fast >= self._restore_wait and self.level > 0:
+            self._step(self.level - 1, now)
+            self._last_up = self._windows
+            return True
+        return False
+
+    def _step(self, level, now):
+        down = level > self.level
+        knob = self.ladder[max(level, self.level) - 1][0]
+        # The knob's value at the new level: its last rung at or below it, else the base
+        value = self.base[knob]
+        for k, v in self.ladder[:level]:
+            if k == knob: value = v
+        old = self.settings[knob]
+        self.knobs[knob](value)
+        self.settings[knob] = value
+        self.level = level
+        self._slow = self._fast = 0
+        self.changes.append({"t": round(now, 2), "knob": knob, "from": _fmt(old), "to": _fmt(value),
+                             "fps": round(self.fps, 1), "cost_ms": round(self.cost_ms, 1)})
+        if down:
+            print(f"🎚️ Quality down: {knob} {_fmt(old)} -> {_fmt(value)} ({self.fps:.1f} FPS < "
+                  f"{self.target_fps:g}, slowest stage {self.cost_ms:.0f} ms)")
+        else:
+            print(f"🎚️ Quality up: {knob} {_fmt(old)} -> {_fmt(value)} ({self.fps:.1f} FPS, "
+                  f"slowest stage {self.cost_ms:.0f} ms of {self.budget_ms:.0f})")
+
+    def stats(self):
+        return {"level": self.level, "rungs": len(self.ladder), "fps": self.fps and round(self.fps, 1),
+                "settings": {k: _fmt(v) for k, v in self.settings.items()}, "changes": self.changes,
+                "history": self.history}
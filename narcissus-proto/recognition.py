@@ -0,0 +1,151 @@
+from threading import Lock, Timer
+from concurrent.futures import ThreadPoolExecutor
+import time
+from perf import timings
+from intent_router import normalize
+
+WAKE_WORDS = ["narcissus", "hey narcissus", "mirror", "hey mirror", "smart mirror"]
+# How long newer commands wait for an older utterance still being recognized
+MAX_AGE = 5.0
+
+
+def match_wake_word(text):
+    """(trigger, command) if `text` starts with a wake word, else None. command may be ''."""
+    # Remove punctuation from start
+    clean_text = text.lower().strip().lstrip(".,-! ")
+    for trigger in WAKE_WORDS:
+        if clean_text.startswith(trigger):
+            # Strip trigger and send command
+            return trigger, clean_text[len(trigger):].strip().lstrip(".,-! ")
+    return None
+
+
+class RecognitionPool:
+    """
+    Transcribes utterances on a bounded worker pool, off the listening thread.
+
+    - recognize: any (audio) -> text callable (cloud, local engine, test stub);
+      '' means no speech, exceptions are reported as API errors
+    - wake words are matched the moment a transcript comes back
+    - commands are delivered to on_command in utterance order: a finished
+      command is held until every older utterance has resolved
+    - a held command is dropped when a newer one with the same key(command)
+      comes back; an older utterance still recognizing after `max_age`
+      seconds stops holding the newer ones and its result is dropped
+    - at most `max_pending` utterances wait; beyond that the oldest are cancelled
+    """
+    def __init__(self, on_command, recognize, workers=2, max_pending=4, max_age=MAX_AGE, key=normalize):
+        self.on_command = on_command
+        self.recognize = recognize
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.key = key
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recognize")
+        self._pending = {} # seq -> (Future, submitted_at), not recognized yet
+        self._held = {} # seq -> (command, submitted_at), waiting for an older utterance
+        self._seq = 0
+        self._next = 1 # next seq to deliver
+        self._timer = None
+        self._lock = Lock()
+
+        # Stats
+        self.submitted = 0
+        self.commands = 0
+        self.ignored = 0 # no speech, no wake word, or wake word alone
+        self.cancelled = 0 # superseded, too old, or over max_pending
+        self.errors = 0
+
+    def submit(self, audio):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self.submitted += 1
+            while len(self._pending) >= self.max_pending:
+                self._cancel(min(self._pending))
+            submitted_at = time.time()
+            self._pending[seq] = (self._pool.submit(self._recognize, seq, audio, submitted_at), submitted_at)
+            self._release()
+        return seq
+
+    def _cancel(self, seq):
+        # Caller holds self._lock
+        self._pending.pop(seq)[0].cancel()
+        self.cancelled += 1
+
+    def _recognize(self, seq, audio, submitted_at):
+        t0 = time.perf_counter()
+        try:
+            text = (self.recognize(audio) or "").lower().strip()
+        except Exception as e:
+            print(f"🎤 Voice API Error: {e}")
+            text = ""
+            self.errors += 1
+        timings.record("recognize", time.perf_counter() - t0)
+
+        command = None
+        if text:
+            print(f"🗣️ Heard: '{text}'")
+            match = match_wake_word(text)
+            if not match:
+                print(f"💤 Ignored (No Wake Word): '{text}'")
+            elif not match[1]:
+                print(f"⚠️ Wake Word '{match[0]}' detected, but no command followed.")
+            else:
+                print(f"🚀 Wake Word '{match[0]}' detected! Command: '{match[1]}'")
+                command = match[1]
+
+        with self._lock:
+            if self._pending.pop(seq, None) is None:
+                return # Given up on while we were recognizing it
+            if command is None:
+                self.ignored += 1
+            else:
+                key = self.key(command)
+                for older in [s for s, (c, _) in self._held.items() if self.key(c) == key]:
+                    del self._held[older] # Superseded by this one
+                    self.cancelled += 1
+                self._held[seq] = (command, submitted_at)
+            self._release()
+
+    def _release(self):
+        # Caller holds self._lock. Deliver held commands up to the oldest
+        # utterance still being recognized.
+        while self._next <= self._seq:
+            seq = self._next
+            if seq in self._pending:
+                if not self._held: return
+                wait = self._pending[seq][1] + self.max_age - time.time()
+                if wait > 0:
+                    self._recheck_in(wait)
+                    return
+                self._cancel(seq) # Too old to keep newer commands waiting
+            elif seq in self._held:
+                command, submitted_at = self._held.pop(seq)
+                self.commands += 1
+                timings.record("voice_command", time.time() - submitted_at)
+                self.on_command(command)
+            self._next += 1
+
+    def _recheck_in(self, wait):
+        # Caller holds self._lock. The head only moves forward, so a running
+        # timer is never later than the one we'd start.
+        if self._timer is not None: return
+        self._timer = Timer(wait, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _expire(self):
+        with self._lock:
+            self._timer = None
+            self._release()
+
+    def shutdown(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {"submitted": self.submitted, "commands": self.commands, "ignored": self.ignored,
+                "cancelled": self.cancelled, "errors": self.errors, "pending": len(self._pending),
+                "held": len(self._held)}
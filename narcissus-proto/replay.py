@@ -0,0 +1,325 @@
+"""
+Offline replay harness for the whole mirror.
+
+Runs the real main loop (simulation_multimodal.main: HandDetector,
+ARMakeup, VideoServer, intent router, assistant) on a recorded clip or
+synthetic frames, with stand-ins for everything live:
+
+    camera          -> capture.FileSource (video file, looped) or SyntheticSource
+    microphone      -> ScriptedVoice (timed wake-word-stripped commands)
+    landmarkers     -> FakeHandLandmarker / FakeFaceLandmarker (--real-models: MediaPipe),
+                       in worker processes with --processes
+    Ollama          -> FakeOllamaServer
+    Remote-Control  -> FakeRemoteControlServer
+    DuckDuckGo      -> FakeSearchBackend
+
+Entry point is the e2e benchmark:
+
+    python benchmark.py e2e --frames 600 --out results/base.json
+    python benchmark.py e2e --video clip.mp4 --compare results/base.json
+"""
+import json
+import os
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import partial
+import requests
+
+from perf import timings
+from startup import clock as startup_clock
+
+# (seconds into the run, command) replayed every SCRIPT_PERIOD seconds
+DEFAULT_SCRIPT = [
+    (1.0, "red lipstick"),
+    (2.5, "what's the weather in paris"),
+    (4.0, "mirror mode"),
+    (6.0, "tell me a joke"),
+    (8.0, "lipstick off"),
+    (9.0, "dashboard"),
+]
+SCRIPT_PERIOD = 10.0
+
+# Printed / compared in this order, anything else after
+# --cold-start: stand-ins pay startup costs like the real devices do
+COLD_START = {
+    "camera_open_s": 0.8, # V4L2 open + first-frame negotiation
+    "hand_load_ms": 400, "face_load_ms": 700, # model file + graph build (CPU)
+    "first_call_ms": 250, # first detect_for_video: delegate / graph setup (CPU)
+    "llm_load_s": 3.0, # Ollama loading llama3.2 from disk
+}
+# ... and someone asks a question the moment the mirror starts listening
+COLD_START_SCRIPT = [(0.0, "tell me a joke")] + DEFAULT_SCRIPT
+
+STAGE_ORDER = ["capture", "frame_age", "hand", "face", "face_detect", "hand_ipc", "face_ipc", "render", "publish_frame", "publish_cursor",
+               "encode", "e2e_frame", "event_wait", "fast_path", "llm_chat", "search", "assistant_turn"]
+
+
+def replay_capture(video=None, width=1280, height=720, fps=30.0, seed=0, open_s=0.0):
+    """
+    The camera: a video file (looped) or synthetic frames, paced to `fps`
+    like a camera (0 = as fast as the consumer reads). main() runs it on
+    the CameraCapture thread unless --sync-capture.
+    """
+    from capture import FileSource, SyntheticSource
+    time.sleep(open_s) # Device open
+    if video: return FileSource(video, fps=fps)
+    return SyntheticSource(width, height, fps=fps, seed=seed)
+
+
+class ScriptedVoice(threading.Thread):
+    """VoiceListener stand-in: puts scripted voice events on the queue on time."""
+    def __init__(self, event_queue, script=DEFAULT_SCRIPT, period=SCRIPT_PERIOD):
+        super().__init__(daemon=True)
+        self.event_queue = event_queue
+        self.script = sorted(script)
+        self.period = period
+        self.sent = 0
+        self._halt = threading.Event()
+
+    def run(self):
+        start = time.time()
+        cycle = 0
+        while not self._halt.is_set():
+            for at, command in self.script:
+                delay = start + cycle * self.period + at - time.time()
+                if delay > 0 and self._halt.wait(delay): return
+                self.event_queue.put({"type": "voice", "content": command, "time": time.time()})
+                self.sent += 1
+            cycle += 1
+
+    def stop(self):
+        self._halt.set()
+
+
+def scripted_reply(messages, tools):
+    """FakeOllamaServer reply: weather questions go through search_web."""
+    last = messages[-1] if messages else {}
+    if last.get("role") == "user" and tools and "weather" in last.get("content", ""):
+        return "", [{"name": "search_web", "arguments": {"query": last["content"]}}]
+    if last.get("role") == "tool":
+        return "It is sunny and 21 degrees right now.", []
+    return "Here is a short answer from your mirror.", []
+
+
+def watch_stream(url, stop):
+    """Stand-in MagicMirror client: keeps one stream open so the server does real work."""
+    while not stop.is_set():
+        try:
+            with requests.get(url, stream=True, timeout=2) as r:
+                for _ in r.iter_content(65536):
+                    if stop.is_set(): return
+        except requests.RequestException:
+            time.sleep(0.1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_replay(args):
+    """Drive simulation_multimodal.main() offline for args.frames frames. Returns the results dict."""
+    import simulation_multimodal as sm
+    from fakes import (FakeFaceLandmarker, FakeHandLandmarker, FakeOllamaServer,
+                       FakeRemoteControlServer, FakeSearchBackend)
+    from landmarks import LIPS_INNER, LIPS_OUTER
+    from search_cache import SearchService
+    from video_server import broadcaster, cursor_channel
+
+    cold = COLD_START if args.cold_start else {}
+    ollama_server = FakeOllamaServer(reply=scripted_reply, token_delay=args.token_ms / 1000,
+                                     load_s=cold.get("llm_load_s", 0.0)).start()
+    remote_control = FakeRemoteControlServer().start()
+    search_backend = FakeSearchBackend(latency=0.3)
+
+    sm.MM_API_URL = remote_control.url
+    sm.SEARCH_AVAILABLE = True
+    sm.search_service = SearchService(search_backend)
+    sm.PIPELINE_MODE = not args.serial
+    sm.LANDMARKER_PROCESSES = args.processes
+    sm.FAST_STARTUP = not args.eager_startup
+    sm.ADAPTIVE_QUALITY = not args.fixed_quality
+    sm.CAPTURE_THREAD = not args.sync_capture
+    sm.play_youtube_music = lambda query: f"Opened YouTube Music for: {query}" # No browser
+
+    # Factories: main() builds them (in parallel with FAST_STARTUP, in workers with --processes)
+    cap = partial(replay_capture, args.video, args.width, args.height, fps=args.fps,
+                  open_s=cold.get("camera_open_s", 0.0))
+    hand = face = None
+    fakes = [] # Built in this process (threads mode): --busy-* scales their cost
+    if not args.real_models:
+        first_call_ms = cold.get("first_call_ms", 0.0)
+        # Cost per full frame, scaled by the input actually given (capture size, inference scale)
+        full_pixels = args.width * args.height
+        hand = partial(FakeHandLandmarker, cost_ms=args.landmarker_ms, full_pixels=full_pixels,
+                       load_ms=cold.get("hand_load_ms", 0.0), first_call_ms=first_call_ms)
+        face = partial(FakeFaceLandmarker, cost_ms=args.landmarker_ms, full_pixels=full_pixels,
+                       lips=(LIPS_OUTER, LIPS_INNER), load_ms=cold.get("face_load_ms", 0.0),
+                       first_call_ms=first_call_ms)
+        if not args.processes:
+            hand, face = keep(hand, fakes), keep(face, fakes)
+
+    stop = threading.Event()
+    base = f"http://127.0.0.1:{args.port}"
+    for path in ("/video_feed", "/cursor_stream"):
+        threading.Thread(target=watch_stream, args=(base + path, stop), daemon=True).start()
+
+    voices = []
+    def voice_factory(event_queue):
+        voices.append(ScriptedVoice(event_queue, script=COLD_START_SCRIPT if args.cold_start else DEFAULT_SCRIPT))
+        return voices[-1]
+
+    busy = {}
+    if args.busy_at is not None and not args.real_models and not args.processes:
+        threading.Thread(target=busy_load, args=(fakes, args.busy_at, args.busy_for, args.busy_factor, busy, stop),
+                         daemon=True).start()
+
+    timings.reset()
+    # tracemalloc slows imports ~3x: off for --cold-start, which times the (lazy) imports
+    if not args.cold_start: tracemalloc.start()
+    cpu0 = time.process_time()
+    try:
+        stats = sm.main(cap=cap, voice_factory=voice_factory, hand_landmarker=hand, face_landmarker=face,
+                        llm_client=ollama_server.client, port=args.port, max_frames=args.frames)
+        main_cpu = time.process_time() - cpu0
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    finally:
+        tracemalloc.stop()
+        stop.set()
+        ollama_server.stop()
+        remote_control.stop()
+
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "video": args.video, "frames": args.frames, "width": args.width, "height": args.height,
+            "fps": args.fps, "pipeline": not args.serial, "real_models": args.real_models,
+            "landmarker_ms": args.landmarker_ms, "processes": args.processes,
+            "fast_startup": not args.eager_startup, "cold_start": args.cold_start,
+            "adaptive_quality": not args.fixed_quality, "capture_thread": not args.sync_capture,
+        },
+        # Seconds from the startup module's import (t0) to each milestone
+        "startup": startup_clock.report(),
+        "fps": round(stats["frames"] / max(stats["elapsed_s"], 1e-6), 2),
+        "elapsed_s": round(stats["elapsed_s"], 2),
+        "stages": timings.summary(),
+        # Cores busy on average: main process + landmarker workers, over wall time
+        "cpu": cpu_usage(main_cpu, stats),
+        "memory": {
+            "traced_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "frame_pool_allocated": stats["frame_pool_allocated"],
+        },
+        "counters": {
+            "frames": stats["frames"],
+            "encoded": broadcaster.encoded,
+            "cursor_published": cursor_channel.published,
+            "voice_commands": sum(v.sent for v in voices),
+            "llm_requests": ollama_server.requests,
+            "ui_requests": len(remote_control.requests),
+            "search": sm.search_service.stats(),
+        },
+        "pipeline": stats["pipeline"],
+        "capture": stats["capture"],
+        "face_scheduler": stats["face_scheduler"],
+        "landmarkers": stats["landmarkers"],
+        "ui": stats["ui"],
+        "events": stats["events"],
+        "llm_cache": stats["llm_cache"],
+        "quality": stats["quality"],
+        "busy": busy or None,
+    }
+
+
+def keep(factory, built):
+    """Wrap a landmarker factory so the instances it builds are kept in `built`."""
+    def build():
+        built.append(factory())
+        return built[-1]
+    return build
+
+
+def busy_load(landmarkers, at, duration, factor, window, stop):
+    """
+    Simulated load (another app on the box, thermal throttling): from `at`
+    seconds after the first frame, for `duration` seconds, the landmarkers
+    cost `factor` times as much. The window's times and frame rates go
+    into `window`.
+    """
+    while not timings.counts.get("e2e_frame") and not stop.wait(0.05):
+        pass
+    if stop.wait(at): return
+    costs = [lm.cost_ms for lm in landmarkers]
+    for lm, cost in zip(landmarkers, costs):
+        lm.cost_ms = cost * factor
+    window["start"] = round(time.time(), 2)
+    print(f"🔥 Busy: landmarkers x{factor:g} for {duration:g} s")
+    # Frame rate over each half of the window: while adapting, then settled
+    for half in ("first_half_fps", "second_half_fps"):
+        frames = timings.counts.get("e2e_frame", 0)
+        stop.wait(duration / 2)
+        window[half] = round((timings.counts.get("e2e_frame", 0) - frames) / (duration / 2), 1)
+    for lm, cost in zip(landmarkers, costs):
+        lm.cost_ms = cost
+    window["end"] = round(time.time(), 2)
+    print("🔥 Busy: load gone")
+
+
+def cpu_usage(main_cpu, stats):
+    workers = sum(lm["worker_cpu_s"] for lm in stats["landmarkers"].values())
+    elapsed = max(stats["elapsed_s"], 1e-6)
+    return {"main_s": round(main_cpu, 2), "workers_s": round(workers, 2),
+            "cores": round((main_cpu + workers) / elapsed, 2), "available": os.cpu_count()}
+
+
+def ordered_stages(stages):
+    return [s for s in STAGE_ORDER if s in stages] + sorted(s for s in stages if s not in STAGE_ORDER)
+
+
+def print_results(results):
+    cfg = results["config"]
+    print(f"📊 e2e @ {cfg['width']}x{cfg['height']} ({cfg['video'] or 'synthetic'}), "
+          f"{'pipeline' if cfg['pipeline'] else 'serial'}, commit {results['commit']}")
+    print(f"   {results['counters']['frames']} frames in {results['elapsed_s']} s -> {results['fps']} FPS")
+    marks = {k: v for k, v in results["startup"].items() if k != "t0"}
+    print("   startup: " + ", ".join(f"{k} {v:.2f} s" for k, v in marks.items()))
+    print(f"   {'stage':<16} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    stages = results["stages"]
+    for name in ordered_stages(stages):
+        s = stages[name]
+        print(f"   {name:<16} {s['count']:6d} {s['p50_ms']:9.2f} {s['p95_ms']:9.2f} {s['p99_ms']:9.2f}")
+    cpu = results["cpu"]
+    print(f"   cpu: {cpu['cores']} of {cpu['available']} cores (main {cpu['main_s']} s, "
+          f"landmarker workers {cpu['workers_s']} s)")
+    print(f"   memory: {results['memory']}")
+    print(f"   counters: {results['counters']}")
+    quality = results.get("quality")
+    if quality:
+        print(f"   quality: level {quality['level']}/{quality['rungs']}, {len(quality['changes'])} changes, "
+              f"settings {quality['settings']}")
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Saved {path}")
+
+
+def compare_results(old, new):
+    """Print p50/p95/p99 and FPS deltas between two saved runs."""
+    print(f"📊 {old.get('commit')} -> {new.get('commit')}")
+    def delta(a, b):
+        return f"{a:8.2f} -> {b:8.2f} ({100 * (b - a) / a:+6.1f}%)" if a else f"{a:8.2f} -> {b:8.2f}"
+    print(f"   {'fps':<16} {delta(old['fps'], new['fps'])}")
+    for name in ordered_stages(new["stages"]):
+        if name not in old["stages"]: continue
+        o, n = old["stages"][name], new["stages"][name]
+        for p in ("p50_ms", "p95_ms", "p99_ms"):
+            print(f"   {name + ' ' + p[:3]:<16} {delta(o[p], n[p])}")
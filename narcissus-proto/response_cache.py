@@ -0,0 +1,102 @@
+"""
+Cache of whole assistant turns for repeated voice commands.
+
+An entry is what the model decided for a command in a given mirror state:
+its first answer, the tool calls it made, the tool results it saw and the
+final reply. On a hit the LLM is skipped and the tool calls are replayed
+through the normal tool dispatch; the cached reply is reused only if the
+replayed tools return the same results (otherwise only the summarizing
+call runs again, on the fresh results).
+
+    cache = ResponseCache()
+    key = cache.key("Tell me a joke!", state=("dashboard", "off"))
+"""
+import re
+import time
+from collections import OrderedDict
+from search_cache import DEFAULT_TTL, normalize_query, ttl_for
+
+# Seconds a turn is reused, by the tools it called (the shortest wins).
+# Tools not listed are never cached.
+TOOL_TTL = {
+    "control_makeup": 24 * 60 * 60,
+    "control_hardware": 24 * 60 * 60,
+    "play_youtube_music": 24 * 60 * 60,
+    "search_web": 60 * 60, # Decision only, the reply is checked against fresh results
+}
+CHAT_TTL = 10 * 60 # Turns without tool calls (jokes, small talk)
+
+# Commands that lean on the conversation so far ("tell me more", "do it
+# again") aren't cached; a bare "it" is too common ("what time is it") to count
+CONTEXT_RE = re.compile(r"\b(that|those|them|more|again|else|another|previous|last one|(do|say|repeat) it)\b")
+
+
+def ttl_for_calls(tool_calls, text=""):
+    """
+    TTL of a turn, 0 = don't cache. Chat turns about the time, date, weather
+    or news (search_cache.TTL_RULES) aren't cached: an answer to "what time
+    is it" is wrong a minute later.
+    """
+    if not tool_calls: return CHAT_TTL if ttl_for(text) == DEFAULT_TTL else 0
+    return min(TOOL_TTL.get(name, 0) for name, _ in tool_calls)
+
+
+class ResponseCache:
+    """LRU of assistant turns keyed on (normalized command, *state), each entry with its own TTL."""
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> entry dict, least recently used first
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0 # context-dependent commands
+        self.revalidated = 0 # hits whose tool results changed (reply regenerated)
+        self.evictions = 0
+        self.time_saved = 0.0 # LLM seconds not spent thanks to hits
+
+    def key(self, command, state=()):
+        """Cache key, or None for commands that depend on the conversation."""
+        text = normalize_query(command)
+        if not text or CONTEXT_RE.search(text):
+            self.uncacheable += 1
+            return None
+        return (text,) + tuple(state)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry["expires"] < time.time():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, first_content, tool_calls, tool_results, content, llm_s):
+        """Store a finished turn. tool_calls: [(name, args)], tool_results: [str] in call order."""
+        ttl = ttl_for_calls(tool_calls, key[0])
+        if not ttl or not content: return
+        self._entries[key] = {"first_content": first_content, "tool_calls": tool_calls,
+                              "tool_results": tool_results, "content": content, "llm_s": llm_s,
+                              "expires": time.time() + ttl}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def record_hit(self, entry, llm_s, tool_results, content):
+        """After replaying a hit: account the time saved, keep the reply for the latest results."""
+        self.time_saved += max(entry["llm_s"] - llm_s, 0.0)
+        if tool_results != entry["tool_results"]:
+            self.revalidated += 1
+            entry["tool_results"], entry["content"] = tool_results, content
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "uncacheable": self.uncacheable, "revalidated": self.revalidated,
+                "evictions": self.evictions, "time_saved_s": round(self.time_saved, 2)}
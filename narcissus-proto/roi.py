@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+
+class InferenceRegion:
+    """
+    What part of the frame a landmarker sees, and at what resolution.
+
+    - scale: downscale factor applied before detect_for_video (1.0 = full res)
+    - roi_tracking: crop around the last detection's bounding box (plus
+      `margin`), with a full-frame pass every `reacquire_every` frames or
+      as soon as the target is lost or leaves the crop. The crop is held
+      fixed between full passes: VIDEO-mode landmarkers track from frame to
+      frame in input coordinates, and a crop that moved every frame would
+      shift the image under the tracker
+
+    prepare() builds the model input and remembers the crop; to_full() maps
+    landmarks from crop-normalized back to full-frame-normalized coords, so
+    cursor, zones and lip masks are unaffected by either mode.
+    """
+    def __init__(self, scale=1.0, roi_tracking=False, margin=0.3, reacquire_every=30, min_size=0.25):
+        self.scale = scale
+        self.roi_tracking = roi_tracking
+        self.margin = margin
+        self.reacquire_every = reacquire_every
+        self.min_size = min_size # smallest crop side (normalized)
+
+        self.box = None # last target bbox (x0, y0, x1, y1) normalized
+        self.frames_since_full = 0
+        self.crop = (0.0, 0.0, 1.0, 1.0)
+        self.held = None # ROI crop in use until the next full pass
+
+        # Stats
+        self.full_passes = 0
+        self.roi_passes = 0
+        self.reacquired = 0 # full passes forced by the target leaving the crop
+
+    @property
+    def passthrough(self):
+        return self.scale == 1.0 and not self.roi_tracking
+
+    def _next_crop(self):
+        left = self.held is not None and self.box is not None and not _inside(self.box, self.held)
+        if not self.roi_tracking or self.box is None or self.frames_since_full >= self.reacquire_every or left:
+            self.reacquired += int(left)
+            self.frames_since_full = 0
+            self.full_passes += 1
+            self.held = None
+            return (0.0, 0.0, 1.0, 1.0)
+
+        self.frames_since_full += 1
+        self.roi_passes += 1
+        if self.held is None:
+            x0, y0, x1, y1 = self.box
+            cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+            half_w = max((x1 - x0) * (1 + 2 * self.margin), self.min_size) / 2
+            half_h = max((y1 - y0) * (1 + 2 * self.margin), self.min_size) / 2
+            self.held = (max(cx - half_w, 0.0), max(cy - half_h, 0.0), min(cx + half_w, 1.0), min(cy + half_h, 1.0))
+        return self.held
+
+    def prepare(self, rgb, wrap=True):
+        """RGB frame -> (mp.Image for the landmarker, crop used). wrap=False: a plain RGB array."""
+        h, w = rgb.shape[:2]
+        self.crop = self._next_crop()
+        x0, y0, x1, y1 = self.crop
+        px0, py0 = int(x0 * w), int(y0 * h)
+        px1, py1 = max(int(x1 * w), px0 + 1), max(int(y1 * h), py0 + 1)
+        img = rgb[py0:py1, px0:px1]
+
+        if self.scale != 1.0:
+            size = (max(int(img.shape[1] * self.scale), 1), max(int(img.shape[0] * self.scale), 1))
+            # INTER_LINEAR: INTER_AREA is ~4x slower at non-integer factors, and
+            # the models resize to their own small input size anyway
+            img = cv2.resize(img, size, interpolation=cv2.INTER_LINEAR)
+        # Exact pixel crop, so mapping back is exact too
+        self.crop = (px0 / w, py0 / h, px1 / w, py1 / h)
+        if not wrap: return img, self.crop
+        import mediapipe as mp
+        return mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(img)), self.crop
+
+    def to_full(self, points, crop=None):
+        """Map (N, 2+) crop-normalized points to full-frame-normalized, in place."""
+        x0, y0, x1, y1 = crop or self.crop
+        points[:, 0] = x0 + points[:, 0] * (x1 - x0)
+        points[:, 1] = y0 + points[:, 1] * (y1 - y0)
+        return points
+
+    def update(self, points):
+        """Track the target from full-frame-normalized points (None = lost)."""
+        if points is None or len(points) == 0:
+            self.box = None
+            self.held = None
+            return
+        self.box = (float(points[:, 0].min()), float(points[:, 1].min()),
+                    float(points[:, 0].max()), float(points[:, 1].max()))
+
+
+def _inside(box, crop):
+    """Box clear of the crop's edges: touching one means the target is cut off (frame edges excepted)."""
+    return ((box[0] > crop[0] or crop[0] <= 0.0) and (box[1] > crop[1] or crop[1] <= 0.0)
+            and (box[2] < crop[2] or crop[2] >= 1.0) and (box[3] < crop[3] or crop[3] >= 1.0))
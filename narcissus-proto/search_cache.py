@@ -0,0 +1,173 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Per-entry TTL (seconds) by query type, first match wins
+TTL_RULES = [
+    (re.compile(r"\b(weather|temperature|rain|forecast)\b"), 10 * 60),
+    (re.compile(r"\b(news|headlines?|score|stocks?|price|today|latest)\b"), 15 * 60),
+    (re.compile(r"\b(time|date|now)\b"), 60),
+]
+DEFAULT_TTL = 6 * 60 * 60
+# An expired entry is still served (refreshing behind it) for this long, at
+# most its own TTL; older ones are refetched while the caller waits, or the
+# first weather question of the morning would get yesterday's answer
+MAX_STALE = 60
+
+NO_RESULTS = "No results found."
+
+
+def normalize_query(query):
+    query = re.sub(r"[^a-z0-9 ]+", " ", (query or "").lower())
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def ttl_for(key):
+    for pattern, ttl in TTL_RULES:
+        if pattern.search(key):
+            return ttl
+    return DEFAULT_TTL
+
+
+class DDGSBackend:
+    """DuckDuckGo text search over one reused DDGS session."""
+    def __init__(self, ddgs_class):
+        self.ddgs_class = ddgs_class
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __call__(self, query, max_results=3):
+        with self._lock:
+            if self._client is None:
+                self._client = self.ddgs_class()
+            client = self._client
+        try:
+            return list(client.text(query, max_results=max_results) or [])[:max_results]
+        except Exception:
+            # Drop a broken session, the retry gets a fresh one
+            with self._lock:
+                self._client = None
+            raise
+
+
+class SearchService:
+    """
+    Cached web search for the search_web tool.
+
+    - LRU cache keyed on the normalized query, each entry with its own TTL
+    - misses are fetched on a worker pool; retries back off there, and the
+      caller waits at most `timeout` (the fetch still fills the cache)
+    - an entry expired less than min(ttl, max_stale) ago is served
+      immediately while it refreshes in the background; an older one is a
+      miss. Popular entries are refreshed ahead of expiry
+    - clock: time source (tests move it past the TTLs)
+    """
+    def __init__(self, backend, max_entries=128, timeout=4.0, retries=3, backoff=0.5,
+                 refresh_ahead=True, popular_hits=3, max_stale=MAX_STALE, clock=time.time):
+        self.backend = backend  # (query, max_results) -> [{'title', 'body'}, ...]
+        self.max_stale = max_stale
+        self.clock = clock
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.refresh_ahead = refresh_ahead
+        self.popular_hits = popular_hits
+
+        self._cache = OrderedDict() # key -> {"text", "expires", "ttl", "hits"}
+        self._inflight = {} # key -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search")
+
+        # Stats
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.refreshes = 0
+
+    def search(self, query):
+        key = normalize_query(query)
+        if not key: return NO_RESULTS
+        now = self.clock()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry:
+                self._cache.move_to_end(key)
+                entry["hits"] += 1
+                if now < entry["expires"]:
+                    self.hits += 1
+                    # Refresh-ahead: popular entry in the last 20% of its life
+                    if (self.refresh_ahead and entry["hits"] >= self.popular_hits
+                            and entry["expires"] - now < 0.2 * entry["ttl"]):
+                        self._fetch_async(key, query)
+                    return entry["text"]
+                if now < entry["expires"] + min(entry["ttl"], self.max_stale):
+                    # Just expired: serve stale now, refresh behind it
+                    self.stale_hits += 1
+                    self._fetch_async(key, query)
+                    return entry["text"]
+                # Too old to serve: wait for the fetch like any other miss
+            self.misses += 1
+            future = self._fetch_async(key, query)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except Exception:
+            return NO_RESULTS
+
+    def _fetch_async(self, key, query):
+        # Caller holds self._lock
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._pool.submit(self._fetch, key, query)
+            self._inflight[key] = future
+        return future
+
+    def _fetch(self, key, query):
+        try:
+            delay = self.backoff
+            for attempt in range(self.retries):
+                try:
+                    results = self.backend(query, 3)
+                except Exception:
+                    results = None
+                    self.errors += 1
+                if results:
+                    text = "\n\n".join(f"{r.get('title', 'No Title')}: {r.get('body', 'No Description')}"
+                                       for r in results)
+                    self._store(key, text)
+                    return text
+                if attempt < self.retries - 1:
+                    time.sleep(delay) # On the worker thread, not the caller's
+                    delay *= 2
+            return NO_RESULTS
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _store(self, key, text):
+        ttl = ttl_for(key)
+        with self._lock:
+            old = self._cache.get(key)
+            if old: self.refreshes += 1
+            self._cache[key] = {"text": text, "expires": self.clock() + ttl, "ttl": ttl,
+                                "hits": old["hits"] if old else 0}
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None,
+            "errors": self.errors,
+            "refreshes": self.refreshes,
+        }
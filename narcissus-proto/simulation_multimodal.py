@@ -1,33 +1,83 @@
 import sys
 import os
 import time
-import requests
 import queue
-import re
 import urllib.parse
-import cv2
 import threading
-import ollama
 
 # Add current dir to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from voice_input import VoiceListener
+# First: its import time is the launch reference for the startup timings
+from startup import clock, run_parallel, warm_up
 from gesture_input import HandDetector
-# ddgs import handled inside perform_search
+from frame_packet import FramePool
+from assistant import AssistantWorker
+from conversation_memory import ConversationMemory
+from intent_router import IntentRouter
+from event_scheduler import EventScheduler
+from response_cache import ResponseCache
+from search_cache import SearchService, DDGSBackend
+from face_scheduler import FaceScheduler
+from roi import InferenceRegion
+from perf import timings, register_gauge
+# Slow imports (mediapipe, ollama, requests, DDGS, speech_recognition) are
+# deferred to where they're used or to background warm-up, see main()
 
 # --- CONFIG ---
-SEARCH_AVAILABLE = True
-try:
-    from ddgs import DDGS
-except ImportError:
-    try:
-        from duckduckgo_search import DDGS
-    except ImportError:
-        SEARCH_AVAILABLE = False
-        print("⚠️ DuckDuckGo Search library not found. Search disabled.")
+SEARCH_AVAILABLE = True # set False by load_search() when no DDGS library is installed
 
 import webbrowser
+
+# Run capture / hand / face / publish as separate pipeline stages
+# (see pipeline.py). Set False for the original one-frame-at-a-time loop.
+PIPELINE_MODE = True
+
+# Landmarker input (see roi.py): downscale factor before detection, and
+# ROI tracking = crop around the last hand/face with periodic full-frame passes.
+INFERENCE_SCALE = 1.0
+ROI_TRACKING = False
+
+# Camera (capture.py): an index, "synthetic" or a video file path. Read on
+# its own thread into a small ring, the loop always gets the newest frame
+# (CAPTURE_THREAD False: cv2 read() on the capture stage / main loop).
+CAMERA_SOURCE = 0
+CAMERA_SIZE = (1280, 720)
+CAMERA_FPS = 30
+CAMERA_FOURCC = "MJPG"
+CAPTURE_THREAD = True
+
+# Host the hand and face landmarkers in their own worker processes
+# (landmark_worker.py): inference on separate cores, off the GIL.
+LANDMARKER_PROCESSES = False
+
+# Startup: build the landmarkers, camera and voice input in parallel, warm
+# the landmarkers with a blank frame and preload the LLM in the background
+# (startup.py). False: the original one-after-another startup.
+FAST_STARTUP = True
+# Ollama keep_alive for the chat model: -1 keeps it loaded for good
+LLM_KEEP_ALIVE = -1
+
+# Also publish raw frames to a shared-memory ring (frame_ring.py) for
+# local consumers, alongside the MJPEG stream.
+SHM_FRAME_RING = False
+
+# Reuse whole assistant turns for repeated commands in the same mode /
+# makeup state (response_cache.py, per-tool TTLs)
+LLM_CACHE = True
+
+# Main loop events (event_scheduler.py): commands older than this (seconds)
+# when their turn comes are dropped instead of acted on late
+EVENT_MAX_AGE = {"gesture": 2.0, "voice": 8.0}
+
+# Adaptive quality (quality.py): when the loop falls below TARGET_FPS because
+# vision is too slow, give up capture size, inference scale, face rate, JPEG
+# quality and stream FPS one step at a time; restore them with headroom
+ADAPTIVE_QUALITY = True
+TARGET_FPS = 24
+
+# MagicMirror MMM-Remote-Control API
+MM_API_URL = "http://localhost:8080/api"
 # --- END CONFIG ---
 
 # --- NARCISSUS TOOLS DEFINITION ---
@@ -86,14 +136,19 @@ narcissus_tools = [
         'type': 'function',
         'function': {
             'name': 'control_makeup',
-            'description': 'Apply virtual lipstick colors.',
+            'description': 'Apply virtual makeup: lipstick, blush, eyeshadow or eyeliner.',
             'parameters': {
                 'type': 'object',
                 'properties': {
                     'color': {
                         'type': 'string',
-                        'enum': ['red', 'nude', 'pink', 'purple', 'dark', 'off'],
-                        'description': 'The lipstick color to apply'
+                        'enum': ['red', 'nude', 'pink', 'purple', 'dark', 'peach', 'brown', 'gold', 'black', 'off'],
+                        'description': 'The color to apply; off removes the effect (all makeup if no effect is given)'
+                    },
+                    'effect': {
+                        'type': 'string',
+                        'enum': ['lipstick', 'blush', 'eyeshadow', 'eyeliner'],
+                        'description': 'Which makeup to apply (default lipstick)'
                     }
                 },
                 'required': ['color']
@@ -102,27 +157,57 @@ narcissus_tools = [
     }
 ]
 
+# Cached search (LRU + TTL, background retries) over one reused DDGS session,
+# built by load_search() on first use or during startup warm-up
+search_service = None
+_search_lock = threading.Lock()
+
+def load_search():
+    """Import the DDGS library and build search_service once. Returns it, or None without a library."""
+    global search_service, SEARCH_AVAILABLE
+    with _search_lock:
+        if search_service is None and SEARCH_AVAILABLE:
+            try:
+                from ddgs import DDGS
+            except ImportError:
+                try:
+                    from duckduckgo_search import DDGS
+                except ImportError:
+                    SEARCH_AVAILABLE = False
+                    print("⚠️ DuckDuckGo Search library not found. Search disabled.")
+                    return None
+            search_service = SearchService(DDGSBackend(DDGS))
+        return search_service
+
+# MagicMirror mode switches and alerts: pooled session, state-diffed, sent
+# off the caller's thread (ui_control.py), built by load_ui()
+ui_controller = None
+_ui_lock = threading.Lock()
+
+def load_ui():
+    global ui_controller
+    with _ui_lock:
+        if ui_controller is None:
+            from ui_control import MirrorUI
+            ui_controller = MirrorUI(MM_API_URL)
+        return ui_controller
+
+def close_ui():
+    """Flush pending UI requests and stop the UI thread (load_ui() builds a new one)."""
+    global ui_controller
+    with _ui_lock:
+        if ui_controller is not None: ui_controller.close()
+        ui_controller = None
+
+def warm_services():
+    """Tool-side imports (UI control, search) that nothing on the first-frame path needs."""
+    load_ui()
+    load_search()
+
 def perform_search(query):
-    if not SEARCH_AVAILABLE: return "Online Search not enabled."
-    for attempt in range(3):
-        try:
-            results = []
-            with DDGS() as ddgs:
-                gen = ddgs.text(query, max_results=3)
-                if gen:
-                    count = 0
-                    for r in gen:
-                        title = r.get('title', 'No Title')
-                        body = r.get('body', 'No Description')
-                        results.append(f"{title}: {body}")
-                        count += 1
-                        if count >= 3: break
-            if results: return "\n\n".join(results)
-            if attempt < 2: time.sleep(1)
-        except Exception as e:
-             # handle rename warning or net error
-             pass
-    return "No results found."
+    if not SEARCH_AVAILABLE or load_search() is None: return "Online Search not enabled."
+    with timings.time("search"):
+        return search_service.search(query)
 
 def set_brightness(level):
     try:
@@ -140,29 +225,21 @@ def set_brightness(level):
         return f"Brightness Error: {e}"
 
 def set_ui_state(action, module=None):
-    base_url = "http://localhost:8080/api"
-    params = {"apiKey": "narcissus_secret"}
-    try:
-        if action == "mirror_mode":
-            # Hide widgets, show mirror module with video
-            requests.get(f"{base_url}/module/all/hide", params=params, timeout=1)
-            requests.get(f"{base_url}/module/MMM-NarcissusMirror/show", params=params, timeout=1)
-            requests.get(f"{base_url}/notification/NARCISSUS_SHOW_VIDEO", params=params, timeout=1)
-            return "UI: Mirror Mode (Camera Visible)"
-
-        elif action == "dashboard_mode":
-            # Show widgets, keep mirror module shown (for cursor) but hide video
-            requests.get(f"{base_url}/module/all/show", params=params, timeout=1)
-            requests.get(f"{base_url}/notification/NARCISSUS_HIDE_VIDEO", params=params, timeout=1)
-            return "UI: Dashboard Mode"
-
-        elif action == "alert":
-            requests.post(f"{base_url}/module/alert/showalert", params=params, 
-                          json={"title": "Narcissus", "message": module, "timer": 5000}, timeout=1)
-            return f"Alert displayed: {module}"
-            
-    except Exception as e:
-        return f"UI Control Error: {e}"
+    """Queue a mode switch or alert for MagicMirror (never blocks; errors are logged by the UI thread)."""
+    ui = load_ui()
+    if action == "mirror_mode":
+        # Hide widgets, show mirror module with video (one NARCISSUS_UI notification)
+        ui.set_mode("mirror")
+        return "UI: Mirror Mode (Camera Visible)"
+
+    elif action == "dashboard_mode":
+        # Show widgets, keep mirror module shown (for cursor) but hide video
+        ui.set_mode("dashboard")
+        return "UI: Dashboard Mode"
+
+    elif action == "alert":
+        ui.show_alert(module)
+        return f"Alert displayed: {module}"
 
 def play_youtube_music(query):
     # Opens YouTube Music search
@@ -172,117 +249,269 @@ def play_youtube_music(query):
     return f"Opened YouTube Music for: {query}"
 
 
-def main():
+def run_tool(name, args, ar_app):
+    """
+    Execute one LLM tool call.
+    Returns (tool_res, state) where state may carry 'mode', 'makeup' or
+    'reply' (text that replaces the model's answer).
+    """
+    tool_res = "N/A"
+    state = {}
+    if name == 'control_hardware':
+        setting = args.get('setting')
+        if setting == 'mirror_mode':
+            state['mode'] = "mirror"
+            tool_res = set_ui_state('mirror_mode')
+        elif setting == 'dashboard_mode':
+            state['mode'] = "dashboard"
+            tool_res = set_ui_state('dashboard_mode')
+        elif setting == 'brightness':
+            tool_res = set_brightness(args.get('value', 50))
+    elif name == 'search_web':
+        q = args.get('query')
+        tool_res = perform_search(q)
+    elif name == 'play_youtube_music':
+        q = args.get('query')
+        tool_res = play_youtube_music(q)
+        state['reply'] = f"Playing {q}..."
+    elif name == 'control_makeup':
+        c, effect = args.get('color'), args.get('effect')
+        tool_res = ar_app.set_effect(effect, c) if effect else ar_app.set_color(c)
+        state['makeup'] = True
+    return tool_res, state
+
+
+def main(cap=None, voice_factory=None, hand_landmarker=None, face_landmarker=None,
+         llm_client=None, port=5050, max_frames=None):
+    """
+    Run the mirror. Defaults are the live devices; the offline replay
+    harness (replay.py) passes a recorded/synthetic capture, a scripted
+    voice source, stand-in landmarkers and an Ollama client, and a frame
+    budget (max_frames) after which main() returns a stats dict.
+    cap, the landmarkers and llm_client may be objects or zero-arg
+    factories; factories are built at startup (in parallel with
+    FAST_STARTUP; the LLM client on the assistant thread).
+    """
     print(f"🪞 Narcissus Final (v9 - No Gallery) Online")
     print("   - Voice: Google Cloud")
     print("   - Gestures: Precise Fingertip + Magic Zones")
     print("   - Photos: Disabled")
     
-    event_queue = queue.Queue()
+    # Simple commands ("red lipstick", "brightness 40") bypass the LLM
+    router = IntentRouter(narcissus_tools)
+
+    def event_key(event):
+        """Mode switches (gesture or voice) share a key: only the latest waiting one is acted on."""
+        if event.get('type') == "gesture":
+            return "mode" if event.get('content') in ("mirror_mode", "dashboard_mode") else None
+        if event.get('type') == "voice":
+            match = router.match(event.get('content') or "")
+            if match and match[0] == "control_hardware" and match[1].get('setting') in ("mirror_mode", "dashboard_mode"):
+                return "mode"
+        return None
+
+    # Gestures > voice > assistant results, coalesced and expired (not a FIFO)
+    event_queue = EventScheduler(max_age=EVENT_MAX_AGE, key=event_key)
+    if voice_factory is None:
+        from voice_input import VoiceListener
+        voice_factory = VoiceListener
+    from ar_makeup import ARMakeup, create_face_landmarker
+    from gesture_input import create_hand_landmarker
+    
+    # Init Video Server (NEW): up first, so clients connect while the rest loads
+    from video_server import VideoServer
+    sinks = []
+    if SHM_FRAME_RING:
+        from frame_ring import FrameRingWriter
+        sinks.append(FrameRingWriter())
+        print("🧊 Shared-memory frame ring: narcissus_frames")
+    streamer = VideoServer(host="0.0.0.0", port=port, sinks=sinks)
+    streamer.start()
+    
+    if FAST_STARTUP:
+        threading.Thread(target=warm_services, name="warm_services", daemon=True).start()
+    else:
+        warm_services()
     
-    voice_thread = VoiceListener(event_queue)
+    # Token-budgeted chat history (system prompt + recent turns + summary)
+    memory = ConversationMemory(
+        "You are Narcissus, a smart mirror. "
+        "Output ONLY the text you want to display/speak. "
+        "Do NOT use code. Use tools provided. "
+        "If the user says they switched modes, just acknowledge it. "
+        "Do NOT call control_hardware to switch modes unless the user explicitly ASKS you to switch it."
+    )
+
+    # LLM turns (streaming + tools) run on their own thread. Started before
+    # the vision build: the model load is the longest startup step (ar_app is
+    # only looked up when a tool runs, after voice is listening)
+    assistant = AssistantWorker(event_queue, memory, narcissus_tools,
+                                run_tool=lambda name, args: run_tool(name, args, ar_app),
+                                show_alert=lambda text: set_ui_state("alert", text),
+                                client=llm_client, preload=FAST_STARTUP, keep_alive=LLM_KEEP_ALIVE,
+                                cache=ResponseCache() if LLM_CACHE else None,
+                                cache_state=lambda: (current_mode, tuple(sorted(ar_app.compositor.layers)),
+                                                     ar_app.current_color))
+    assistant.start()
+
+    def build_landmarker(given, create, kind):
+        if given is not None and not callable(given): return given # Ready-made instance
+        if LANDMARKER_PROCESSES:
+            from landmark_worker import RemoteLandmarker
+            landmarker = RemoteLandmarker(given or create, kind)
+        else:
+            landmarker = (given or create)()
+        if FAST_STARTUP:
+            print(f"🔥 {kind} landmarker warmed up in {1000 * warm_up(landmarker):.0f} ms")
+        return landmarker
+    
+    def open_camera():
+        from capture import CameraCapture, open_source
+        if cap is None:
+            source = open_source(CAMERA_SOURCE, *CAMERA_SIZE, fps=CAMERA_FPS, fourcc=CAMERA_FOURCC)
+        else:
+            source = cap() if callable(cap) else cap
+        return CameraCapture(source) if CAPTURE_THREAD else source
+    
+    print("📷 Initializing Camera, Hand Tracking, AR Makeup & Voice...")
+    t0 = time.time()
+    tasks = {
+        "voice": lambda: voice_factory(event_queue),
+        "face": lambda: build_landmarker(face_landmarker, create_face_landmarker, "face"),
+        "hand": lambda: build_landmarker(hand_landmarker, create_hand_landmarker, "hand"),
+        "camera": open_camera,
+    }
+    built = run_parallel(tasks) if FAST_STARTUP else {name: fn() for name, fn in tasks.items()}
+    clock.mark("vision_ready")
+    print(f"📷 Ready in {time.time() - t0:.2f}s ({'parallel' if FAST_STARTUP else 'sequential'})")
+    cap = built["camera"]
+    
+    voice_thread = built["voice"]
     voice_thread.daemon = True
     voice_thread.start()
     
     # Init AR Makeup
-    from ar_makeup import ARMakeup
-    ar_app = ARMakeup()
-    
-    # Init Video Server (NEW)
-    from video_server import VideoServer
-    streamer = VideoServer(host="0.0.0.0", port=5050)
-    streamer.start()
+    # Face detection runs at full rate only when its output is needed
+    face_scheduler = FaceScheduler()
+    ar_app = ARMakeup(landmarker=built["face"], scheduler=face_scheduler,
+                      region=InferenceRegion(scale=INFERENCE_SCALE, roi_tracking=ROI_TRACKING))
     
     # State for Touch Interaction
     touch_timer = 0
     is_touching_lips = False
     
-    print("📷 Initializing Hand Tracking & AR Makeup...")
-    detector = HandDetector()
-    cap = cv2.VideoCapture(0)
+    detector = HandDetector(landmarker=built["hand"],
+                            region=InferenceRegion(scale=INFERENCE_SCALE, roi_tracking=ROI_TRACKING))
     
-    messages = [
-        {
-            'role': 'system', 
-            'content': (
-                "You are Narcissus, a smart mirror. "
-                "Output ONLY the text you want to display/speak. "
-                "Do NOT use code. Use tools provided. "
-                "If the user says they switched modes, just acknowledge it. "
-                "Do NOT call control_hardware to switch modes unless the user explicitly ASKS you to switch it."
-            )
-        }
-    ]
-
     last_gesture = None
     gesture_cooldown = 0
     current_mode = "dashboard" # dashboard, mirror
+
+    def handle_hand_result(gesture, cursor_pos, frame_w, frame_h):
+        """Lip touch + gesture intent for one hand result (runs on the hand stage in pipeline mode)."""
+        nonlocal touch_timer, is_touching_lips, last_gesture, gesture_cooldown
+        face_scheduler.update_cursor(cursor_pos)
+
+        # 3. TOUCH INTERACTION (Lips)
+        if cursor_pos['x'] != -1:
+            # Check collision (Normalized coords 0.0-1.0)
+            if ar_app.check_touch(cursor_pos['x'], cursor_pos['y'], frame_w, frame_h):
+                if not is_touching_lips:
+                    is_touching_lips = True
+                    touch_timer = time.time()
+                elif time.time() - touch_timer > 0.3: # 1 second hold
+                    new_color = ar_app.cycle_color()
+                    print(f"💋 Lip Touch! Changed color to {new_color}")
+                    # No LLM notification - instant visual feedback only
+                    touch_timer = time.time() + 0.5 # Cooldown
+            else:
+                is_touching_lips = False
+                touch_timer = 0
+
+        if gesture and gesture != last_gesture:
+             if time.time() - gesture_cooldown > 1.0:
+                last_gesture = gesture
+                gesture_cooldown = time.time()
+                
+                intent = None
+                
+                # GESTURE MAPPING
+                # Remove Swipes
+                if gesture == "HOLD_LEFT":
+                    intent = "dashboard_mode"
+                elif gesture == "HOLD_RIGHT":
+                    intent = "mirror_mode"
+                        
+                if intent:
+                    print(f"👋 Gesture: {gesture} -> {intent}")
+                    event_queue.put({"type": "gesture", "content": intent, "time": time.time()})
+
+    pipeline = None
+    frame_pool = FramePool()
+    if PIPELINE_MODE:
+        from pipeline import VisionPipeline
+        pipeline = VisionPipeline(cap, detector, ar_app, streamer,
+                                  on_hand_result=handle_hand_result,
+                                  publish_cursor=streamer.publish_cursor)
+        pipeline.start()
+        print("⚙️ Vision Pipeline Mode: capture | hand || face | publish")
+    frames_captured = lambda: (pipeline.pool if pipeline else frame_pool).seq
+
+    quality = None
+    if ADAPTIVE_QUALITY:
+        from quality import QualityController, mirror_knobs, PIPELINE_STAGES, SERIAL_STAGES
+        knobs, base = mirror_knobs(cap, pipeline.pool if pipeline else frame_pool, detector, ar_app,
+                                   face_scheduler, streamer.broadcaster)
+        quality = QualityController(knobs, base, target_fps=TARGET_FPS,
+                                    stages=PIPELINE_STAGES if pipeline else SERIAL_STAGES)
+
+    # Exported on /metrics (read at scrape time only)
+    register_gauge("narcissus_event_queue_depth", event_queue.qsize, "Events waiting for the main loop.")
+    register_gauge("narcissus_assistant_queue_depth", assistant.inbox.qsize, "Voice commands waiting for the LLM.")
+    register_gauge("narcissus_frames_captured_total", frames_captured, "Frames read from the camera.", "counter")
+    if pipeline:
+        for slot in pipeline.slots:
+            register_gauge("narcissus_frames_dropped_total", lambda slot=slot: slot.dropped,
+                           "Items replaced unread in a pipeline slot.", "counter", {"slot": slot.name})
+    start_time = time.time()
     
     try:
-        while True:
-            # A. Vision
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret:
-                    # Mirror frame for intuition
-                    frame = cv2.flip(frame, 1)
-
+        while max_frames is None or frames_captured() < max_frames:
+            face_scheduler.mode = current_mode
+            if quality: quality.update()
+            
+            # A. Vision (serial mode only, the pipeline runs it on its own threads)
+            if pipeline is None and cap.isOpened():
+                # Mirrored + RGB-converted once into pooled buffers
+                with timings.time("capture"):
+                    packet = frame_pool.capture(cap)
+                if packet:
                     # 1. DETECT GESTURES (Hand)
-                    # Pass a COPY to detector so debug lines don't pollute the stream
-                    debug_frame = frame.copy() 
-                    gesture, _, cursor_pos = detector.find_gestures(debug_frame)
+                    # No debug frame: detector only reads the shared mp.Image
+                    with timings.time("hand"):
+                        gesture, _, cursor_pos = detector.find_gestures(None, packet=packet)
                     
                     # 2. AR PROCESSING (Lips)
                     # Apply AR makeup to the CLEAN frame
-                    frame = ar_app.process_frame(frame)
+                    with timings.time("face"):
+                        frame = ar_app.process_frame(packet.bgr, packet=packet)
                     
                     # Stream Frame (Clean + Makeup only)
-                    streamer.update_frame(frame)
+                    with timings.time("publish_frame"):
+                        streamer.update_frame(frame)
+                    timings.record("e2e_frame", time.time() - packet.captured_at)
                     
-                    # 3. TOUCH INTERACTION (Lips)
-                    if cursor_pos['x'] != -1:
-                        # Check collision (Normalized coords 0.0-1.0)
-                        if ar_app.check_touch(cursor_pos['x'], cursor_pos['y'], frame.shape[1], frame.shape[0]):
-                            if not is_touching_lips:
-                                is_touching_lips = True
-                                touch_timer = time.time()
-                            elif time.time() - touch_timer > 0.3: # 1 second hold
-                                new_color = ar_app.cycle_color()
-                                print(f"💋 Lip Touch! Changed color to {new_color}")
-                                # No LLM notification - instant visual feedback only
-                                touch_timer = time.time() + 0.5 # Cooldown
-                        else:
-                            is_touching_lips = False
-                            touch_timer = 0
+                    handle_hand_result(gesture, cursor_pos, frame.shape[1], frame.shape[0])
+                    packet.release()
                     
-                    # Send Cursor
-                    try:
-                        requests.post("http://localhost:8080/api/notification/NARCISSUS_CURSOR", 
-                                      params={"apiKey": "narcissus_secret"},
-                                      json=cursor_pos, timeout=0.05)
-                    except: pass
-                    
-                    if gesture and gesture != last_gesture:
-                         if time.time() - gesture_cooldown > 1.0:
-                            last_gesture = gesture
-                            gesture_cooldown = time.time()
-                            
-                            intent = None
-                            
-                            # GESTURE MAPPING
-                            # Remove Swipes
-                            if gesture == "HOLD_LEFT":
-                                intent = "dashboard_mode"
-                            elif gesture == "HOLD_RIGHT":
-                                intent = "mirror_mode"
-                                    
-                            if intent:
-                                print(f"👋 Gesture: {gesture} -> {intent}")
-                                event_queue.put({"type": "gesture", "content": intent})
+                    # Send Cursor (SSE push to MMM-NarcissusMirror, never blocks)
+                    with timings.time("publish_cursor"):
+                        streamer.publish_cursor(cursor_pos)
             
-            # B. Event
+            # B. Event (pipeline mode: nothing else to do here, so wait for one;
+            # the timeout only bounds how often the loop condition is checked)
             try:
-                event = event_queue.get_nowait()
+                event = event_queue.get(timeout=0.1) if pipeline else event_queue.get_nowait()
                 source = event.get('type')
                 content = event.get('content')
                 suppress_alert = event.get('suppress_alert', False)
@@ -301,73 +530,62 @@ def main():
                         print("✅ Dashboard Mode Activated")
                         continue  # Skip LLM
                 
-                # VOICE: Process normally through LLM
-                user_msg = content
-                messages.append({'role': 'user', 'content': user_msg})
-                
-                # Use llama3.2 for speed
-                print("Thinking...")
-                response = ollama.chat(model='llama3.2', messages=messages, tools=narcissus_tools)
+                # ASSISTANT: Result of a finished LLM turn (already displayed)
+                if source == "assistant":
+                    mode = event.get('state', {}).get('mode')
+                    if mode:
+                        current_mode = mode
+                    continue
                 
-                tool_calls = response.message.tool_calls
-                ai_content = response.message.content
+                # VOICE (fast path): deterministic commands skip the LLM
+                route, route_us = router.timed_route(content)
+                if route:
+                    name, args = route
+                    print(f"⚡ Fast Path: {name} {args} ({route_us:.0f} µs)")
+                    with timings.time("fast_path"):
+                        tool_res, state = run_tool(name, args, ar_app)
+                    if state.get('mode'):
+                        current_mode = state['mode']
+                    elif not state.get('makeup') and not suppress_alert:
+                        set_ui_state("alert", state.get('reply') or tool_res)
+                    continue
                 
-                is_makeup_action = False
-
-                if tool_calls:
-                    for tool in tool_calls:
-                        fn = tool.function
-                        args = fn.arguments
-                        print(f"🤖 AI DECISION: {fn.name} {args}")
-                        
-                        tool_res = "N/A"
-                        if fn.name == 'control_hardware':
-                            setting = args.get('setting')
-                            if setting == 'mirror_mode':
-                                current_mode = "mirror"
-                                tool_res = set_ui_state('mirror_mode')
-                            elif setting == 'dashboard_mode':
-                                current_mode = "dashboard"
-                                tool_res = set_ui_state('dashboard_mode')
-                        elif fn.name == 'search_web':
-                            q = args.get('query')
-                            tool_res = perform_search(q)
-                        elif fn.name == 'play_youtube_music':
-                            q = args.get('query')
-                            tool_res = play_youtube_music(q)
-                            ai_content = f"Playing {q}..."
-                        elif fn.name == 'control_makeup':
-                            c = args.get('color')
-                            tool_res = ar_app.set_color(c)
-                            is_makeup_action = True
-
-                        messages.append({'role': 'tool', 'content': str(tool_res)})
-                    
-                    if not ai_content: 
-                        final_res = ollama.chat(model='llama3.2', messages=messages)
-                        ai_content = final_res.message.content
-                    messages.append({'role': 'assistant', 'content': ai_content})
-                else:
-                    messages.append({'role': 'assistant', 'content': ai_content})
-                
-                print(f"🪞 NARCISSUS: {ai_content}")
-                
-                # CLEAN TEXT
-                clean_text = ai_content
-                match = re.search(r'alert\s*\(\s*[\'"](.*?)[\'"]\s*\)', clean_text, re.DOTALL)
-                if match: clean_text = match.group(1)
-                
-                if len(clean_text) > 5 and not is_makeup_action and not suppress_alert:
-                    set_ui_state("alert", clean_text)
+                # VOICE: Hand off to the assistant worker, vision keeps running
+                assistant.submit(content, suppress_alert=suppress_alert)
 
             except queue.Empty:
                 pass
-            time.sleep(0.01)
+            if pipeline is None: time.sleep(0.01)
 
     except KeyboardInterrupt:
         print("\nExiting...")
-        voice_thread.stop()
-        if cap.isOpened(): cap.release()
+
+    stats = {
+        "frames": frames_captured(),
+        "elapsed_s": time.time() - start_time,
+        "pipeline": pipeline.stats() if pipeline else None,
+        "face_scheduler": face_scheduler.stats(),
+        "frame_pool_allocated": (pipeline.pool if pipeline else frame_pool).allocated,
+        "landmarkers": {name: lm.stats() for name, lm in (("hand", detector.landmarker), ("face", ar_app.landmarker))
+                        if hasattr(lm, "stats")},
+        "capture": cap.stats() if hasattr(cap, "stats") else None,
+        "ui": load_ui().stats(),
+        "events": event_queue.stats(),
+        "llm_cache": assistant.cache.stats() if assistant.cache else None,
+        "quality": quality.stats() if quality else None,
+    }
+    assistant.stop()
+    if pipeline:
+        print(f"⚙️ Pipeline Stats: {pipeline.stats()}")
+        pipeline.stop()
+    voice_thread.stop()
+    for landmarker in (detector.landmarker, ar_app.landmarker):
+        if hasattr(landmarker, "close"): landmarker.close()
+    for sink in sinks:
+        sink.close()
+    close_ui()
+    if cap.isOpened(): cap.release()
+    return stats
 
 if __name__ == "__main__":
     main()
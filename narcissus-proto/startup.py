@@ -0,0 +1,59 @@
+"""
+Startup sequencing for the mirror (FAST_STARTUP in simulation_multimodal.py).
+
+- clock: launch -> milestone times ("vision_ready", "first_frame",
+  "llm_ready", "first_answer", ...), printed as they happen and returned
+  by report() for the replay/startup benchmark
+- run_parallel(): build independent pieces (landmarkers, camera) at once
+- warm_up(): one detection on a blank frame, so the first camera frame
+  doesn't pay for graph setup
+
+Import this module first: its import time is the launch reference.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+T0 = time.time()
+
+# Timestamp the warm-up detection uses; real frames start after it (VIDEO
+# mode landmarkers need strictly increasing timestamps)
+WARMUP_TIMESTAMP_MS = 0
+
+
+class StartupClock:
+    """First-occurrence timestamps of named startup milestones, relative to launch."""
+    def __init__(self, t0=T0):
+        self.t0 = t0
+        self.marks = {} # name -> seconds since t0
+
+    def mark(self, name):
+        if name in self.marks: return
+        self.marks[name] = time.time() - self.t0
+        print(f"🚀 {name}: {self.marks[name]:.2f} s after launch")
+
+    def report(self):
+        return {"t0": self.t0, **{name: round(s, 3) for name, s in self.marks.items()}}
+
+
+clock = StartupClock()
+
+
+def run_parallel(tasks):
+    """{name: () -> value} -> {name: value}, all started at once. The first error is raised."""
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="startup") as pool:
+        futures = {name: pool.submit(fn) for name, fn in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def warm_up(landmarker, shape=(480, 640, 3)):
+    """Run one detection on a black frame (model graph + delegate setup happen on the first call)."""
+    t0 = time.perf_counter()
+    frame = np.zeros(shape, dtype=np.uint8)
+    if getattr(landmarker, "accepts_arrays", False):
+        image = frame
+    else:
+        import mediapipe as mp
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
+    landmarker.detect_for_video(image, WARMUP_TIMESTAMP_MS)
+    return time.perf_counter() - t0
@@ -0,0 +1,103 @@
+import queue
+import time
+import pytest
+from assistant import AssistantWorker
+from conversation_memory import ConversationMemory
+from fakes import FakeOllamaServer, FakeSearchBackend
+from response_cache import ResponseCache
+from search_cache import SearchService, ttl_for
+
+pytest.importorskip("ollama")
+
+
+@pytest.fixture
+def make_worker():
+    started = []
+
+    def make(reply, run_tool=lambda name, args: ("N/A", {}), token_delay=0.01, cache=None):
+        server = FakeOllamaServer(reply=reply, token_delay=token_delay).start()
+        alerts, results = [], queue.Queue()
+        worker = AssistantWorker(results, ConversationMemory("test"), tools=[], run_tool=run_tool,
+                                 show_alert=alerts.append, client=server.client(),
+                                 cache=cache, cache_state=lambda: ("dashboard",))
+        worker.start()
+        started.append((worker, server))
+        return worker, results, alerts, server
+
+    yield make
+    for worker, server in started:
+        worker.stop()
+        server.stop()
+
+
+def test_reply_streams_off_the_caller_thread(make_worker):
+    words = " ".join(f"word{i}" for i in range(20))
+    worker, results, alerts, _ = make_worker(lambda messages, tools: (words, []), token_delay=0.02)
+    worker.PARTIAL_ALERT_INTERVAL = 0.0
+
+    t0 = time.perf_counter()
+    worker.submit("tell me a story")
+    assert time.perf_counter() - t0 < 0.01 # submit() never waits for the model
+
+    result = results.get(timeout=5)
+    assert result["type"] == "assistant"
+    assert result["content"].strip() == words
+    # Partial text went to the alert UI while streaming, then the full reply
+    assert any(alert.endswith(" …") for alert in alerts)
+    assert alerts[-1].strip() == words
+
+
+def test_tool_calls_run_then_reply_is_summarized(make_worker):
+    def reply(messages, tools):
+        if messages[-1]["role"] == "tool":
+            return "It is sunny in Paris.", []
+        return "", [{"name": "search_web", "arguments": {"query": "weather paris"}}]
+
+    calls = []
+    def run_tool(name, args):
+        calls.append((name, args))
+        return "Paris: sunny, 21C", {}
+
+    worker, results, alerts, _ = make_worker(reply, run_tool)
+    worker.submit("what's the weather in paris")
+    result = results.get(timeout=5)
+    assert calls == [("search_web", {"query": "weather paris"})]
+    assert result["content"].strip() == "It is sunny in Paris."
+
+
+def test_makeup_tool_state_reaches_main_loop_without_alert(make_worker):
+    reply = lambda messages, tools: ("", [{"name": "control_makeup", "arguments": {"color": "red"}}])
+    worker, results, alerts, _ = make_worker(reply, lambda name, args: ("Applying red lipstick.",
+                                                                     {"makeup": True, "reply": "Done"}))
+    worker.submit("make my lips red")
+    result = results.get(timeout=5)
+    assert result["state"]["makeup"] is True
+    assert alerts == [] # Makeup shows on the mirror itself
+
+
+def test_cached_search_reply_is_regenerated_once_results_expire(make_worker):
+    now = [1_000_000.0]
+    backend = FakeSearchBackend(latency=0.01)
+    search = SearchService(backend, backoff=0.01, clock=lambda: now[0])
+
+    def reply(messages, tools):
+        if messages[-1]["role"] == "tool":
+            return "Summary: " + messages[-1]["content"], []
+        return "", [{"name": "search_web", "arguments": {"query": "weather paris"}}]
+
+    cache = ResponseCache()
+    worker, results, _, server = make_worker(reply, lambda name, args: (search.search(args["query"]), {}),
+                                             cache=cache)
+    ask = lambda: (worker.submit("what's the weather in paris"), results.get(timeout=5))[1]["content"]
+
+    first = ask()
+    assert ask() == first # same results: the cached summary, no LLM call
+    assert server.requests == 2 and cache.stats()["hits"] == 1
+
+    # Past the search TTL (and its grace), well inside the reply's 1 h search_web TTL
+    backend.edition = "later"
+    now[0] += ttl_for("weather paris") + search.max_stale + 60
+    assert "(later)" in ask() # cache hit, fresh results, reply regenerated from them
+    assert server.requests == 3
+    st = cache.stats()
+    assert st["hits"] == 2 and st["revalidated"] == 1
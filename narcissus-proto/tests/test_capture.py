@@ -0,0 +1,54 @@
+"""Camera sources and the CameraCapture grabber thread (newest frame wins)."""
+import time
+
+import numpy as np
+import pytest
+
+from capture import CameraCapture, SimulatedCamera, SyntheticSource
+
+FPS = 30.0
+
+
+def test_simulated_camera_needs_frames():
+    with pytest.raises(TypeError):
+        SimulatedCamera(64, 48)
+
+
+def frame_ages(cap, reads, work_s):
+    """A loop slower than the camera: read, then `work_s` of processing."""
+    ages = []
+    for _ in range(reads):
+        ret, frame = cap.read()
+        assert ret and frame.shape == (48, 64, 3)
+        ages.append(time.time() - cap.frame_time)
+        time.sleep(work_s)
+    return np.array(ages[3:]) # past the driver queue filling up
+
+
+def test_slow_reader_gets_newest_frame():
+    interval = 1 / FPS
+    stale = frame_ages(SyntheticSource(64, 48, fps=FPS), 12, 3 * interval)
+    cap = CameraCapture(SyntheticSource(64, 48, fps=FPS))
+    try:
+        fresh = frame_ages(cap, 12, 3 * interval)
+    finally:
+        cap.release()
+    # Direct reads hand out the oldest of the queued driver buffers
+    assert np.median(stale) > 2 * interval
+    assert np.median(fresh) < 1.5 * interval
+    assert cap.stats()["dropped"] > 0
+
+
+def test_fast_reader_waits_for_the_next_frame():
+    cap = CameraCapture(SyntheticSource(64, 48, fps=FPS))
+    try:
+        cap.read()
+        t0 = time.perf_counter()
+        seqs = 0
+        while time.perf_counter() - t0 < 0.5:
+            ret, _ = cap.read()
+            seqs += ret
+    finally:
+        cap.release()
+    # Never the same frame twice: about one read per camera frame
+    assert seqs <= 0.5 * FPS + 2
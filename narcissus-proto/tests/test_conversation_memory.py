@@ -0,0 +1,43 @@
+"""ConversationMemory: the prompt stays under budget without compacting on every turn."""
+from conversation_memory import ConversationMemory
+
+SEARCH_RESULT = "Some Title: " + "lorem ipsum dolor sit amet " * 70 # ~2 KB, like perform_search
+
+
+def run_turns(memory, turns, tool_every=1):
+    peak = 0
+    for i in range(turns):
+        memory.append({'role': 'user', 'content': f"what is the news number {i}"})
+        if i % tool_every == 0:
+            memory.append({'role': 'tool', 'content': SEARCH_RESULT})
+        memory.append({'role': 'assistant', 'content': "Here is what I found about that topic today."})
+        peak = max(peak, memory.prompt_tokens())
+    return peak
+
+
+def test_search_every_turn_stays_under_budget():
+    memory = ConversationMemory("You are Narcissus, a smart mirror.")
+    peak = run_turns(memory, 200)
+    assert peak <= memory.token_budget
+    # Two 2 KB results fill half the budget: every other turn at most, not every turn
+    assert memory.compactions <= 200 // 2
+
+
+def test_turn_in_progress_keeps_its_tool_output():
+    memory = ConversationMemory("You are Narcissus, a smart mirror.")
+    run_turns(memory, 20)
+    memory.append({'role': 'user', 'content': "and the weather?"})
+    memory.append({'role': 'tool', 'content': SEARCH_RESULT})
+    compactions = memory.compactions
+    memory.append({'role': 'tool', 'content': SEARCH_RESULT}) # a second result: over budget
+    assert memory.compactions == compactions + 1
+    assert memory.messages()[-1]['content'] == SEARCH_RESULT # the model answers from all of it
+    assert memory.messages()[-2]['content'] == SEARCH_RESULT
+    assert memory.prompt_tokens() <= memory.token_budget
+
+
+def test_small_turns_rarely_compact():
+    memory = ConversationMemory("You are Narcissus, a smart mirror.")
+    peak = run_turns(memory, 200, tool_every=3)
+    assert peak <= memory.token_budget
+    assert memory.compactions <= 200 // 5
@@ -0,0 +1,64 @@
+import json
+import socket
+import threading
+import time
+import urllib.request
+from video_server import CursorChannel, VideoServer
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_unchanged_position_is_not_published():
+    channel = CursorChannel()
+    channel.publish({'x': 0.5, 'y': 0.5})
+    channel.publish({'x': 0.5001, 'y': 0.5}) # Same after rounding
+    assert channel.published == 1
+    channel.publish({'x': 0.6, 'y': 0.5})
+    assert channel.published == 2
+
+
+def test_subscriber_gets_latest_position_rate_limited():
+    port = free_port()
+    server = VideoServer(host="127.0.0.1", port=port)
+    server.start()
+    events = []
+
+    def subscriber():
+        # Stand-in for MMM-NarcissusMirror's EventSource
+        for _ in range(50):
+            try:
+                stream = urllib.request.urlopen(f"http://127.0.0.1:{port}/cursor_stream", timeout=5)
+                break
+            except OSError:
+                time.sleep(0.1)
+        try:
+            for line in stream:
+                if line.startswith(b"data: "):
+                    payload = json.loads(line[6:])
+                    events.append((time.time() * 1000 - payload["t"], payload))
+        except OSError:
+            pass # Idle stream timed out after the test
+    threading.Thread(target=subscriber, daemon=True).start()
+    deadline = time.time() + 5
+    while server.cursor_channel.clients == 0 and time.time() < deadline:
+        time.sleep(0.05)
+    assert server.cursor_channel.clients == 1
+
+    # 30 moves in ~50 ms: far faster than the 30 Hz limit
+    for i in range(30):
+        server.publish_cursor({'x': 0.1 + 0.02 * i, 'y': 0.5})
+        time.sleep(0.002)
+    time.sleep(0.5)
+
+    assert 1 <= len(events) < 30
+    assert events[-1][1]["x"] == round(0.1 + 0.02 * 29, 3) # Newest wins
+    assert max(latency for latency, _ in events) < 500
+    # Idle hand: nothing more is sent
+    sent = len(events)
+    server.publish_cursor({'x': events[-1][1]["x"], 'y': 0.5})
+    time.sleep(0.2)
+    assert len(events) == sent
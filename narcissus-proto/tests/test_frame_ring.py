@@ -0,0 +1,66 @@
+"""Shared-memory frame ring: a reader in another process keeps up with a camera-rate writer."""
+import json
+import subprocess
+import sys
+import time
+import uuid
+
+import numpy as np
+
+import frame_ring
+from frame_ring import FrameRingReader, FrameRingWriter
+
+FPS = 30
+FRAMES = 90
+
+
+def stamped(frame, seq):
+    """Frames carry their seq in the first 8 bytes so the reader can spot torn reads."""
+    frame.reshape(-1)[:8].view(np.int64)[0] = seq
+    return frame
+
+
+def test_same_process_roundtrip_is_zero_copy():
+    name = f"narcissus_test_{uuid.uuid4().hex[:8]}"
+    writer, reader = FrameRingWriter(name=name, slots=4), FrameRingReader(name)
+    frame = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    try:
+        writer.update_frame(stamped(frame, 1))
+        assert reader.attach(timeout=1.0)
+        seq, ts_ns, view = reader.latest()
+        assert seq == 1 and np.array_equal(view, frame)
+        assert view.base is not None and not view.flags.owndata
+        assert reader.latest() is None # nothing new
+        for seq in range(2, 6): # wrap around slot 1
+            writer.update_frame(stamped(frame, seq))
+        assert not reader.valid(1) and reader.valid(5)
+        del view
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_process_keeps_up_at_full_frame_rate():
+    name = f"narcissus_test_{uuid.uuid4().hex[:8]}"
+    writer = FrameRingWriter(name=name)
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    # The reader attaches once the writer is already running at camera rate
+    reader = subprocess.Popen([sys.executable, frame_ring.__file__, "--name", name, "--frames", str(FRAMES),
+                               "--json"], stdout=subprocess.PIPE, text=True)
+    try:
+        t_start = time.perf_counter()
+        for i in range(FRAMES * 4):
+            if reader.poll() is not None: break
+            writer.update_frame(stamped(frame, writer.seq + 1))
+            time.sleep(max(t_start + (i + 1) / FPS - time.perf_counter(), 0))
+        out, _ = reader.communicate(timeout=10)
+    finally:
+        if reader.poll() is None: reader.kill()
+        writer.close()
+
+    assert reader.returncode == 0
+    r = json.loads(out)
+    assert r["read"] == FRAMES
+    assert r["missed"] == 0 and r["corrupt"] == 0
+    assert r["fps"] >= 0.9 * FPS
+    assert np.percentile(r["latency_ms"], 99) < 1000 / FPS
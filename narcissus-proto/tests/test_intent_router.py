@@ -0,0 +1,54 @@
+import time
+import pytest
+from benchmark import ROUTING_CORPUS
+from intent_router import IntentRouter
+from simulation_multimodal import narcissus_tools
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter(narcissus_tools)
+
+
+@pytest.mark.parametrize("text,expected", ROUTING_CORPUS)
+def test_routing_corpus(router, text, expected):
+    assert router.route(text) == expected
+
+
+@pytest.mark.parametrize("text", ["put on red lipstick", "put on some blush", "play a game with me",
+                                  "play twenty questions", "play some eyeliner"])
+def test_makeup_and_games_never_reach_youtube(router, text):
+    match = router.route(text)
+    assert match is None or match[0] != 'play_youtube_music'
+
+
+def test_routes_in_microseconds(router):
+    t0 = time.perf_counter()
+    for _ in range(20):
+        for text, _ in ROUTING_CORPUS:
+            router.match(text)
+    per_call_us = (time.perf_counter() - t0) * 1e6 / (20 * len(ROUTING_CORPUS))
+    assert per_call_us < 200
+
+
+def test_no_phrase_is_ambiguous(router):
+    assert router.ambiguous == set()
+
+
+@pytest.mark.parametrize("text,left", [
+    ("lipstick off", {"blush"}), ("remove lipstick", {"blush"}), ("take off the lipstick", {"blush"}),
+    ("no lipstick", {"blush"}), ("turn off lipstick", {"blush"}), ("lips off", {"blush"}),
+    ("makeup off", set()), ("remove makeup", set()), ("no makeup", set()),
+])
+def test_lipstick_off_keeps_other_effects(router, text, left):
+    from ar_makeup import ARMakeup
+    from fakes import FakeFaceLandmarker
+    ar_app = ARMakeup(landmarker=FakeFaceLandmarker(cost_ms=0))
+    ar_app.set_color("red")
+    ar_app.set_effect("blush")
+    tool, args = router.route(text)
+    assert tool == 'control_makeup'
+    # What simulation_multimodal.run_tool does with the args
+    effect = args.get('effect')
+    ar_app.set_effect(effect, args['color']) if effect else ar_app.set_color(args['color'])
+    assert set(ar_app.compositor.layers) == left
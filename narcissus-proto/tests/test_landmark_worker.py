@@ -0,0 +1,44 @@
+"""RemoteLandmarker supervision: a dead worker is restarted without stalling the caller."""
+import time
+from functools import partial
+
+import numpy as np
+import pytest
+
+from fakes import FakeHandLandmarker
+from landmark_worker import RemoteLandmarker
+
+LOAD_MS = 1500.0
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def hand():
+    landmarker = RemoteLandmarker(partial(FakeHandLandmarker, cost_ms=1.0, load_ms=LOAD_MS), "hand")
+    yield landmarker
+    landmarker.close()
+
+
+def test_first_call_after_start_has_the_model(hand):
+    assert len(hand.detect_for_video(FRAME, 0).hand_landmarks) == 1
+
+
+def test_restart_does_not_wait_for_the_model_load(hand):
+    assert hand.detect_for_video(FRAME, 0).hand_landmarks
+    hand.process.kill()
+    hand.process.join()
+
+    slowest, ts = 0.0, 0
+    while True:
+        ts += 33
+        t0 = time.perf_counter()
+        result = hand.detect_for_video(FRAME, ts)
+        slowest = max(slowest, time.perf_counter() - t0)
+        if result.hand_landmarks: break
+        assert ts < 30_000, "worker never came back"
+        time.sleep(0.033)
+    # Blocking restarts stalled one call for the whole model load
+    assert slowest < 0.5 * LOAD_MS / 1000
+    st = hand.stats()
+    assert st["restarts"] == 1
+    assert st["skipped"] >= 1 # answered empty while the new worker loaded
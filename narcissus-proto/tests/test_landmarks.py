@@ -0,0 +1,63 @@
+"""Landmarks container, analytic lip hit-test and zones against the original loop / raster versions."""
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmark import synthetic_lips
+from fakes import FakeHandLandmarker
+from gesture_input import HandDetector
+from landmarks import Landmarks, LIPS_OUTER, LIPS_INNER, lip_hit
+
+
+def mp_landmarks(n=478, seed=0):
+    rng = np.random.default_rng(seed)
+    return [SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in rng.random((n, 3), dtype=np.float32)]
+
+
+def test_landmarks_match_per_point_loops():
+    raw = mp_landmarks()
+    lm = Landmarks.from_mp(raw)
+    w, h = 1280, 720
+    assert lm.points.shape == (478, 3)
+    for indices in (LIPS_OUTER, LIPS_INNER):
+        # The original ARMakeup.get_points loop
+        looped = np.array([(int(raw[i].x * w), int(raw[i].y * h)) for i in indices], dtype=np.int32)
+        assert np.array_equal(lm.to_pixels(w, h, indices), looped)
+    xs, ys = [p.x for p in raw], [p.y for p in raw]
+    assert lm.bbox() == pytest.approx((min(xs), min(ys), max(xs), max(ys)))
+
+
+@pytest.mark.parametrize("w,h", [(640, 480), (1280, 720)])
+def test_lip_hit_matches_raster_mask(w, h):
+    outer, inner = synthetic_lips(w, h)
+    # The original check_touch: a full-frame mask, outer filled, inner cleared
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.fillPoly(mask, [outer], 255)
+    cv2.fillPoly(mask, [inner], 0)
+
+    x0, y0 = outer.min(axis=0) - 10
+    x1, y1 = outer.max(axis=0) + 10
+    outer_f, inner_f = outer.astype(np.float32), inner.astype(np.float32)
+    hits = checked = 0
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            # Rasterization owns the boundary pixels: compare away from the contours
+            near = min(abs(cv2.pointPolygonTest(c, (float(x), float(y)), True)) for c in (outer_f, inner_f))
+            if near < 1.5: continue
+            hit = lip_hit(float(x), float(y), outer_f, inner_f)
+            assert hit == (mask[y, x] > 0), (x, y)
+            hits += hit
+            checked += 1
+    assert hits > 0 and checked > hits
+
+
+@pytest.mark.parametrize("x,zone", [
+    (0.0, "LEFT_ZONE"), (0.1999, "LEFT_ZONE"), (0.2, None), (0.5, None),
+    (0.8, None), (0.8001, "RIGHT_ZONE"), (1.0, "RIGHT_ZONE"),
+])
+def test_zone_edges_match_original(x, zone):
+    detector = HandDetector(landmarker=FakeHandLandmarker(cost_ms=0))
+    # Original: x < 0.2 is LEFT, x > 0.8 is RIGHT
+    assert detector.zone(x) == zone
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from ar_makeup import ARMakeup
+from benchmark import legacy_render_lips, synthetic_face, synthetic_frame
+
+
+@pytest.mark.parametrize("w,h", [(640, 480), (1280, 720), (1920, 1080)])
+def test_roi_fixed_point_matches_float_render(w, h):
+    ar_app = ARMakeup(landmarker=object())
+    ar_app.set_color("red")
+    frame, pts = synthetic_frame(w, h), synthetic_face(w, h)
+    ref = legacy_render_lips(frame, pts[ar_app.LIPS_OUTER], pts[ar_app.LIPS_INNER],
+                             ar_app.current_color, ar_app.lipstick_opacity)
+    out = ar_app.compositor.render(frame.copy(), pts)
+    # Fixed-point rounding only
+    assert np.abs(out.astype(np.int16) - ref).max() <= 1
+
+
+def test_render_touches_only_the_lip_box():
+    ar_app = ARMakeup(landmarker=object())
+    ar_app.set_color("red")
+    frame, pts = synthetic_frame(1280, 720), synthetic_face(1280, 720)
+    out = ar_app.compositor.render(frame.copy(), pts)
+    x0, y0, x1, y1 = ar_app.compositor.effects["lipstick"].box(pts, int(np.ptp(pts[:, 0])), 1280, 720)
+    outside = np.ones(frame.shape[:2], dtype=bool)
+    outside[y0:y1, x0:x1] = False
+    assert np.array_equal(out[outside], frame[outside])
@@ -0,0 +1,66 @@
+"""MakeupCompositor against one full-resolution blend per effect (benchmark.sequential_blend)."""
+import numpy as np
+import pytest
+
+import ar_makeup
+from ar_makeup import ARMakeup, Effect, MakeupCompositor
+from benchmark import sequential_blend, synthetic_face, synthetic_frame
+from landmarks import CHEEK_LEFT, CHEEK_RIGHT
+
+ALL = ["lipstick", "blush", "eyeshadow", "eyeliner"]
+# Max level difference per channel. Only downscaled masks (blur kernels of 22+ px,
+# i.e. blush from 720p up) differ from the full-resolution reference.
+MAX_DIFF = {(640, 360): 1, (640, 480): 1, (1280, 720): 4, (1920, 1080): 8}
+
+
+def compositor(effects):
+    ar_app = ARMakeup(landmarker=object())
+    for effect in effects:
+        ar_app.set_effect(effect)
+    return ar_app.compositor
+
+
+@pytest.mark.parametrize("w,h", list(MAX_DIFF))
+@pytest.mark.parametrize("effects", [ALL[:1], ALL[:2], ALL[2:], ALL])
+def test_matches_per_effect_blend(w, h, effects):
+    frame, pts = synthetic_frame(w, h), synthetic_face(w, h)
+    comp = compositor(effects)
+    out = comp.render(frame.copy(), pts)
+    ref = sequential_blend(frame.copy(), pts, comp)
+    assert np.abs(out.astype(np.int16) - ref).max() <= MAX_DIFF[(w, h)]
+
+
+def test_only_layer_boxes_are_touched():
+    w, h = 1280, 720
+    frame, pts = synthetic_frame(w, h), synthetic_face(w, h)
+    comp = compositor(ALL)
+    out = comp.render(frame.copy(), pts)
+    face_w = int(np.ptp(pts[:, 0]))
+    outside = np.ones((h, w), dtype=bool)
+    for name in ALL:
+        x0, y0, x1, y1 = comp.effects[name].box(pts, face_w, w, h)
+        outside[y0:y1, x0:x1] = False
+    assert np.array_equal(out[outside], frame[outside])
+
+
+def test_stacked_layers_share_one_pass(monkeypatch):
+    # Three layers on the same cheeks: the union is a third of their boxes added up
+    effects = {f"layer{i}": Effect(f"layer{i}", fills=[CHEEK_LEFT, CHEEK_RIGHT], hull=True, blur=9) for i in range(3)}
+    comp = MakeupCompositor(effects)
+    for i, name in enumerate(effects):
+        comp.set_layer(name, (60 * i, 200, 30), 0.4)
+    w, h = 1280, 720
+    frame, pts = synthetic_frame(w, h), synthetic_face(w, h)
+    blends = []
+    monkeypatch.setattr(ar_makeup, "blend_color", lambda *a: blends.append(a))
+    out = comp.render(frame.copy(), pts)
+    assert blends == [] # composited over the union, not per layer
+    assert np.abs(out.astype(np.int16) - sequential_blend(frame.copy(), pts, comp)).max() <= 1
+
+
+def test_clearing_one_effect_keeps_the_others():
+    comp = compositor(ALL)
+    comp.clear("lipstick")
+    assert list(comp.layers) == ALL[1:]
+    comp.clear()
+    assert comp.layers == {}
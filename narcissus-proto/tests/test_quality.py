@@ -0,0 +1,99 @@
+"""QualityController on a simulated mirror: degrade in ladder order to the target, restore last-first."""
+import pytest
+
+from perf import timings
+from quality import LADDER, PIPELINE_STAGES, QualityController
+
+TARGET = 24.0
+CAMERA_FPS = 30.0
+
+
+class SimMirror:
+    """
+    Vision loop cost model: hand/face cost scale with the pixels they see
+    (capture fraction^2 x inference scale^2), face also with its rate, encode
+    with JPEG quality. In pipeline mode the slowest stage sets the pace.
+    """
+    def __init__(self, load_ms, base):
+        self.load_ms = load_ms
+        self.settings = dict(base)
+        self.knobs = {name: (lambda value, name=name: self.settings.__setitem__(name, value)) for name in base}
+
+    def costs_ms(self):
+        s = self.settings
+        pixels = s["capture"] ** 2 * s["inference_scale"] ** 2
+        return {"hand": self.load_ms * pixels, "face": 0.8 * self.load_ms * pixels * s["face_hz"] / CAMERA_FPS,
+                "publish_frame": 1.0, "encode": 6.0 * s["jpeg_quality"] / 95}
+
+    def fps(self):
+        return min(CAMERA_FPS, 1000 / max(self.costs_ms().values()))
+
+    def run_second(self):
+        """One second of loop iterations into perf.timings."""
+        costs = self.costs_ms()
+        for _ in range(int(self.fps())):
+            timings.record("e2e_frame", 1 / self.fps())
+            for stage, ms in costs.items():
+                timings.record(stage, ms / 1000)
+
+
+BASE = {"capture": 1.0, "inference_scale": 1.0, "face_hz": 30, "jpeg_quality": 95, "stream_fps": None}
+
+
+@pytest.fixture(autouse=True)
+def clean_timings():
+    timings.reset()
+    yield
+    timings.reset()
+
+
+def drive(controller, sim, seconds, t):
+    for _ in range(seconds):
+        sim.run_second()
+        t += 1.0
+        controller.update(t)
+    return t
+
+
+def controller_for(sim, base=BASE, **kwargs):
+    return QualityController(sim.knobs, base, target_fps=TARGET, stages=PIPELINE_STAGES, settle_s=0.0, **kwargs)
+
+
+def test_converges_on_target_under_load_and_restores():
+    sim = SimMirror(load_ms=250.0, base=BASE) # 4 FPS at full quality
+    quality = controller_for(sim)
+    t = drive(quality, sim, 20, 0.0)
+
+    downs = [(c["knob"], c["to"]) for c in quality.changes]
+    assert len(downs) == 3 # capture 0.75, 0.5, then inference scale 0.75
+    assert downs == [(k, f"{v:g}") for k, v in LADDER[:len(downs)]] # in ladder order
+    assert sim.fps() >= TARGET * (1 - quality.tolerance)
+    level = quality.level
+    t = drive(quality, sim, 10, t)
+    assert quality.level == level # settled, no oscillation
+
+    # Load goes away: everything comes back, last change first
+    sim.load_ms = 15.0
+    drive(quality, sim, 60, t)
+    assert quality.level == 0
+    assert sim.settings == BASE
+    ups = [(c["knob"], c["to"]) for c in quality.changes[len(downs):]]
+    assert ups == [("inference_scale", "1"), ("capture", "0.75"), ("capture", "1")]
+
+
+def test_skips_rungs_not_below_base():
+    base = dict(BASE, inference_scale=0.5, jpeg_quality=60)
+    quality = controller_for(SimMirror(load_ms=100.0, base=base), base=base)
+    assert ("inference_scale", 0.75) not in quality.ladder
+    assert ("inference_scale", 0.5) not in quality.ladder
+    assert not any(knob == "jpeg_quality" for knob, _ in quality.ladder)
+    assert ("stream_fps", 20) in quality.ladder # None (unlimited) is above everything
+
+
+def test_slow_camera_alone_keeps_quality():
+    sim = SimMirror(load_ms=5.0, base=BASE)
+    sim.fps = lambda: 15.0 # the camera, not the vision stages, is slow
+    quality = controller_for(sim)
+    drive(quality, sim, 20, 0.0)
+    assert quality.changes == []
+    assert quality.fps == pytest.approx(15.0)
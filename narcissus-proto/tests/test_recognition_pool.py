@@ -0,0 +1,77 @@
+"""RecognitionPool with a stub recognizer: commands come out in utterance order, none lost."""
+import time
+
+from recognition import RecognitionPool
+
+
+class SlowRecognizer:
+    """The "audio" is (transcript, seconds to recognize it)."""
+    def __call__(self, audio):
+        text, seconds = audio
+        time.sleep(seconds)
+        return text
+
+
+def pool_with(**kwargs):
+    delivered = []
+    return RecognitionPool(delivered.append, SlowRecognizer(), **kwargs), delivered
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_slow_older_command_is_delivered_first():
+    pool, delivered = pool_with(workers=2)
+    try:
+        pool.submit(("mirror red lipstick", 0.5))
+        pool.submit(("mirror what's the weather", 0.1))
+        time.sleep(0.3)
+        assert delivered == [] # the weather question waits for the lipstick
+        assert wait_for(lambda: len(delivered) == 2)
+        assert delivered == ["red lipstick", "what's the weather"]
+        assert pool.stats()["cancelled"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_ignored_utterance_does_not_hold_later_commands():
+    pool, delivered = pool_with(workers=2)
+    try:
+        pool.submit(("just talking to myself", 0.2))
+        pool.submit(("mirror blush", 0.05))
+        assert wait_for(lambda: delivered == ["blush"])
+        st = pool.stats()
+        assert st["ignored"] == 1 and st["cancelled"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_held_command_superseded_by_the_same_command():
+    pool, delivered = pool_with(workers=3)
+    try:
+        pool.submit(("mirror what's the weather", 0.4))
+        pool.submit(("mirror red lipstick", 0.05))
+        pool.submit(("Mirror, Red lipstick", 0.1)) # said again while the first was held
+        assert wait_for(lambda: delivered == ["what's the weather", "red lipstick"] and not pool.stats()["held"])
+        assert pool.stats()["cancelled"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_stuck_utterance_holds_newer_commands_at_most_max_age():
+    pool, delivered = pool_with(workers=2, max_age=0.3)
+    try:
+        t0 = time.time()
+        pool.submit(("mirror dashboard", 2.0)) # the recognizer hangs on this one
+        pool.submit(("mirror blush", 0.05))
+        assert wait_for(lambda: delivered == ["blush"])
+        assert time.time() - t0 < 1.0
+        assert wait_for(lambda: pool.stats()["pending"] == 0)
+        assert delivered == ["blush"] # the late result is dropped, not delivered out of order
+        assert pool.stats()["cancelled"] == 1
+    finally:
+        pool.shutdown()
@@ -0,0 +1,53 @@
+"""ResponseCache: what is stored, for how long, and what never is."""
+import pytest
+
+from response_cache import CHAT_TTL, ResponseCache, ttl_for_calls
+
+
+def store(cache, command, tool_calls=(), content="Sure."):
+    key = cache.key(command, state=("dashboard", "off"))
+    if key is not None:
+        cache.put(key, content if not tool_calls else None, list(tool_calls), [], content, llm_s=1.0)
+    return key
+
+
+@pytest.mark.parametrize("command", [
+    "What time is it?", "what's the date today", "What time is it in Lagos?",
+    "what's the weather like", "any news", "what's happening now",
+])
+def test_time_sensitive_chat_is_not_cached(command):
+    cache = ResponseCache()
+    key = store(cache, command)
+    assert key is not None
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_small_talk_is_cached():
+    cache = ResponseCache()
+    key = store(cache, "Tell me a joke!")
+    assert cache.get(key)["content"] == "Sure."
+    assert ttl_for_calls([], "tell me a joke") == CHAT_TTL
+
+
+def test_tool_turns_keep_their_tool_ttl():
+    # The search_web reply is checked against fresh results on a hit, so it can stay
+    cache = ResponseCache()
+    key = store(cache, "what's the weather in paris", tool_calls=[("search_web", {"query": "weather paris"})])
+    assert cache.get(key) is not None
+    assert ttl_for_calls([("search_web", {})], "weather in paris") == 60 * 60
+
+
+def test_context_commands_have_no_key():
+    cache = ResponseCache()
+    assert cache.key("tell me more") is None
+    assert cache.key("do it again") is None
+    assert cache.stats()["uncacheable"] == 2
+
+
+def test_expired_entries_are_dropped():
+    cache = ResponseCache()
+    key = store(cache, "tell me a joke")
+    cache._entries[key]["expires"] = 0.0
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
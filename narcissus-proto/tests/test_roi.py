@@ -0,0 +1,88 @@
+"""InferenceRegion: landmarks mapped back from the crop match the full frame, the crop holds still."""
+import numpy as np
+import pytest
+
+from roi import InferenceRegion
+
+W, H = 1280, 720
+SIDE = 80 # target square, px
+TOL_PX = 3.0 # landmark error after mapping back (scale 0.5 rounds to ~2 px)
+
+
+def frame_with_target(x, y):
+    frame = np.zeros((H, W, 3), dtype=np.uint8)
+    frame[y:y + SIDE, x:x + SIDE] = 255
+    return frame
+
+
+def landmark(img):
+    """Stand-in landmarker: the target's corners, normalized to the image it was given."""
+    ys, xs = np.nonzero(img[..., 0] > 127)
+    if len(xs) == 0: return None
+    h, w = img.shape[:2]
+    return np.array([[xs.min() / w, ys.min() / h], [(xs.max() + 1) / w, (ys.max() + 1) / h]], dtype=np.float32)
+
+
+def truth(x, y):
+    return np.array([[x / W, y / H], [(x + SIDE) / W, (y + SIDE) / H]], dtype=np.float32)
+
+
+def track(region, path):
+    """Run the region over target positions; yields (crop, mapped points, true points)."""
+    for x, y in path:
+        img, crop = region.prepare(frame_with_target(x, y)[..., ::-1], wrap=False)
+        pts = landmark(img)
+        if pts is not None: region.to_full(pts, crop)
+        region.update(pts)
+        yield crop, pts, truth(x, y)
+
+
+def error_px(pts, ref):
+    return float(np.abs((pts - ref) * (W, H)).max())
+
+
+@pytest.mark.parametrize("scale", [1.0, 0.5])
+def test_mapped_landmarks_match_full_frame_as_roi_moves(scale):
+    region = InferenceRegion(scale, roi_tracking=True, reacquire_every=10)
+    path = [(200 + 6 * i, 150 + 3 * i) for i in range(60)]
+    prev = None
+    for crop, pts, ref in track(region, path):
+        assert pts is not None # tracking never lost
+        assert error_px(pts, ref) <= TOL_PX
+        if prev is not None: # no jump beyond the target's own motion
+            assert error_px(pts - prev[0], ref - prev[1]) <= 2 * TOL_PX
+        prev = (pts.copy(), ref)
+    assert region.roi_passes > region.full_passes > 0
+
+
+def test_crop_held_between_full_passes():
+    region = InferenceRegion(0.5, roi_tracking=True, reacquire_every=30)
+    crops = [crop for crop, _, _ in track(region, [(300 + 2 * i, 200 + i) for i in range(29)])]
+    assert crops[0] == (0.0, 0.0, 1.0, 1.0)
+    assert len(set(crops[1:])) == 1 # one ROI crop, fixed until the next full pass
+
+
+def test_target_leaving_crop_reacquires():
+    region = InferenceRegion(0.5, roi_tracking=True, reacquire_every=100)
+    path = [(100 + 25 * i, 300) for i in range(40)]
+    clipped = 0
+    for crop, pts, ref in track(region, path):
+        assert pts is not None # re-acquired before the target is lost
+        if (ref[0] >= crop[:2]).all() and (ref[1] <= crop[2:]).all():
+            assert error_px(pts, ref) <= TOL_PX
+        else:
+            clipped += 1 # straddling the crop edge: the next pass is full frame
+    assert region.reacquired == clipped > 0
+
+
+def test_reset_after_lost_target():
+    region = InferenceRegion(0.5, roi_tracking=True, reacquire_every=100)
+    list(track(region, [(400, 300)] * 5))
+    # Lost: the next pass is full frame, then the target is found where it reappeared
+    region.update(None)
+    crop, pts, ref = next(track(region, [(1000, 500)]))
+    assert crop == (0.0, 0.0, 1.0, 1.0)
+    assert error_px(pts, ref) <= TOL_PX
+    crop, pts, ref = next(track(region, [(1004, 502)]))
+    assert crop != (0.0, 0.0, 1.0, 1.0)
+    assert error_px(pts, ref) <= TOL_PX
@@ -0,0 +1,68 @@
+"""SearchService TTLs with a moved clock: fresh hits, a short stale grace, then a real refetch."""
+import time
+
+from fakes import FakeSearchBackend
+from search_cache import SearchService, ttl_for
+
+DAY = 24 * 60 * 60
+
+
+class Clock:
+    def __init__(self, t=1_000_000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def service(latency=0.01):
+    backend, clock = FakeSearchBackend(latency=latency), Clock()
+    return SearchService(backend, backoff=0.01, clock=clock), backend, clock
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_fresh_entry_is_a_hit():
+    search, backend, clock = service()
+    first = search.search("weather in paris")
+    clock.t += ttl_for("weather in paris") / 2
+    assert search.search("Weather in Paris?") == first
+    assert backend.calls == 1
+    assert search.stats()["hits"] == 1
+
+
+def test_next_day_gets_todays_answer():
+    search, backend, clock = service()
+    search.search("weather in paris")
+    backend.edition = "tuesday"
+    clock.t += DAY
+    # A day-old entry is not served, the caller waits for the new one
+    assert "(tuesday)" in search.search("weather in paris")
+    assert backend.calls == 2
+    st = search.stats()
+    assert st["stale_hits"] == 0 and st["misses"] == 2
+
+
+def test_just_expired_entry_is_served_while_it_refreshes():
+    search, backend, clock = service()
+    old = search.search("latest news")
+    backend.edition = "update"
+    clock.t += ttl_for("latest news") + search.max_stale / 2
+    assert search.search("latest news") == old # within the grace window
+    assert search.stats()["stale_hits"] == 1
+    assert wait_for(lambda: backend.calls == 2 and not search._inflight)
+    assert "(update)" in search.search("latest news")
+
+
+def test_grace_is_at_most_the_ttl():
+    search, backend, clock = service()
+    search.max_stale = 10 * 60
+    search.search("what time is it in lagos") # 60 s TTL
+    backend.edition = "later"
+    clock.t += 2 * 60 + 1 # past ttl + min(ttl, max_stale)
+    assert "(later)" in search.search("what time is it in lagos")
@@ -0,0 +1,72 @@
+"""StreamingVAD on WAV fixtures: speech comes through, noise and blips don't."""
+import numpy as np
+import pytest
+
+from benchmark import synthetic_audio, synthetic_speech
+from vad import PCMRing, StreamingVAD, segment_wav, write_wav
+
+RATE = 16000
+
+
+def fixture(tmp_path, kind, seed=0):
+    pcm, expected = synthetic_audio(kind, RATE, np.random.default_rng(seed))
+    path = str(tmp_path / f"{kind}.wav")
+    write_wav(path, pcm, RATE)
+    return path, expected
+
+
+@pytest.mark.parametrize("kind", ["speech", "hair_dryer", "speech_over_dryer", "short_blips", "knocks"])
+def test_wav_fixture_segments(tmp_path, kind):
+    path, expected = fixture(tmp_path, kind)
+    segments, vad = segment_wav(path)
+    assert len(segments) == expected
+    assert vad.stats()["segments"] == expected
+
+
+def test_utterances_cover_the_speech(tmp_path):
+    path, _ = fixture(tmp_path, "speech") # 2 s and 1.5 s of speech
+    segments, vad = segment_wav(path)
+    lengths = [len(s) / RATE for s in segments]
+    assert lengths[0] == pytest.approx(2.0, abs=0.4)
+    assert lengths[1] == pytest.approx(1.5, abs=0.4)
+
+
+def test_short_blips_are_counted_as_dropped(tmp_path):
+    path, _ = fixture(tmp_path, "short_blips") # four 0.2 s "hm"s
+    segments, vad = segment_wav(path)
+    assert segments == []
+    assert vad.stats()["dropped_short"] == 4
+
+
+@pytest.mark.parametrize("chunk", [160, 1024, 4096, 16000])
+def test_chunk_size_does_not_matter(tmp_path, chunk):
+    path, _ = fixture(tmp_path, "speech")
+    reference, _ = segment_wav(path, chunk=1024)
+    segments, _ = segment_wav(path, chunk=chunk)
+    assert len(segments) == len(reference)
+    for got, ref in zip(segments, reference):
+        assert np.array_equal(got, ref)
+
+
+def test_segment_is_the_input_audio():
+    rng = np.random.default_rng(1)
+    quiet = lambda: rng.normal(0, 30, RATE).astype(np.int16)
+    pcm = np.concatenate([quiet(), synthetic_speech(1.0, RATE, rng).astype(np.int16), quiet(), quiet()])
+    vad = StreamingVAD(rate=RATE)
+    segments = vad.process(pcm) + vad.flush()
+    assert len(segments) == 1
+    # Samples come back unchanged (preroll included), not resampled or scaled
+    start = np.flatnonzero(np.all(np.lib.stride_tricks.sliding_window_view(pcm, 64) == segments[0][:64], axis=1))
+    assert len(start) == 1
+    assert np.array_equal(pcm[start[0]:start[0] + len(segments[0])], segments[0])
+
+
+def test_pcm_ring_wraps():
+    ring = PCMRing(8)
+    ring.write(np.arange(5, dtype=np.int16))
+    ring.write(np.arange(5, 11, dtype=np.int16))
+    assert ring.end == 11
+    assert ring.read(3, 11).tolist() == list(range(3, 11))
+    assert ring.read(0, 11).tolist() == list(range(3, 11)) # older samples are gone
+    ring.write(np.arange(100, 120, dtype=np.int16)) # longer than the ring
+    assert ring.read(0, ring.end).tolist() == list(range(112, 120))
@@ -0,0 +1,117 @@
+"""
+MagicMirror UI control for mode switches and alerts (MMM-Remote-Control API).
+
+    ui = MirrorUI("http://localhost:8080/api")
+    ui.set_mode("mirror") # returns at once, sent on the UI thread
+    ui.show_alert("Hello")
+
+- one keep-alive requests.Session for every call
+- a mode switch is a single NARCISSUS_UI notification; MMM-NarcissusMirror.js
+  hides/shows the other modules and the video feed itself
+- asking for the mode already requested sends nothing (for `resync_s`, in
+  case MagicMirror reloaded meanwhile)
+- requests not sent yet coalesce: a newer mode or alert replaces the older one
+"""
+import threading
+import time
+import requests
+from perf import timings, register_gauge
+
+UI_NOTIFICATION = "NARCISSUS_UI"
+
+
+class MirrorUI:
+    """Asynchronous, state-diffed MagicMirror UI controller (one sender thread)."""
+    def __init__(self, base_url, api_key="narcissus_secret", timeout=1.0, resync_s=60.0, alert_ms=5000):
+        self.base_url = base_url
+        self.params = {"apiKey": api_key}
+        self.timeout = timeout
+        self.resync_s = resync_s
+        self.alert_ms = alert_ms
+        self.session = requests.Session() # Pooled keep-alive connection
+        self._cond = threading.Condition()
+        self._pending = {} # "mode" / "alert" -> (value, requested_at), newest wins
+        self.requested_mode = None # last mode handed to the sender (None: unknown)
+        self.requested_at = 0.0
+        self.mode = None # last mode MagicMirror confirmed
+        self.running = True
+
+        # Stats
+        self.sent = 0 # HTTP requests
+        self.skipped = 0 # mode already requested
+        self.coalesced = 0 # replaced before they were sent
+        self.errors = 0
+
+        for result, fn in (("sent", lambda: self.sent), ("skipped", lambda: self.skipped),
+                           ("coalesced", lambda: self.coalesced), ("error", lambda: self.errors)):
+            register_gauge("narcissus_ui_requests_total", fn, "MagicMirror UI requests by outcome.",
+                           "counter", {"result": result})
+        self._thread = threading.Thread(target=self._run, name="mirror_ui", daemon=True)
+        self._thread.start()
+
+    # --- Requests (any thread, never block) ---
+    def set_mode(self, mode):
+        """Ask for "mirror" or "dashboard". Returns False when it was already requested (nothing sent)."""
+        with self._cond:
+            if mode == self.requested_mode and time.time() - self.requested_at < self.resync_s:
+                self.skipped += 1
+                return False
+            self.requested_mode, self.requested_at = mode, time.time()
+            self._queue("mode", mode)
+        return True
+
+    def show_alert(self, message):
+        with self._cond:
+            self._queue("alert", message)
+
+    def _queue(self, kind, value):
+        # Caller holds self._cond
+        if kind in self._pending: self.coalesced += 1
+        self._pending[kind] = (value, time.time())
+        self._cond.notify()
+
+    # --- Sender thread ---
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.running and not self._pending:
+                    self._cond.wait()
+                if not self._pending: return # Stopped, nothing left to send
+                batch, self._pending = self._pending, {}
+            # Mode first: an alert must not be hidden by the switch after it
+            for kind in ("mode", "alert"):
+                if kind in batch: self._send(kind, *batch[kind])
+
+    def _send(self, kind, value, requested_at):
+        if kind == "mode":
+            url = f"{self.base_url}/notification/{UI_NOTIFICATION}"
+            body = {"mode": value}
+        else:
+            url = f"{self.base_url}/module/alert/showalert"
+            body = {"title": "Narcissus", "message": value, "timer": self.alert_ms}
+        try:
+            self.session.post(url, params=self.params, json=body, timeout=self.timeout).raise_for_status()
+        except Exception as e:
+            self.errors += 1
+            print(f"🖥️ UI Control Error: {e}")
+            if kind == "mode":
+                with self._cond:
+                    # Unknown again: the next request for it is sent
+                    if self.requested_mode == value: self.requested_mode = None
+            return
+        self.sent += 1
+        if kind == "mode": self.mode = value
+        # Request -> MagicMirror acknowledged (includes waiting behind other sends)
+        timings.record(f"ui_{kind}", time.time() - requested_at)
+
+    def close(self):
+        """Send what is still pending, then stop the sender."""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        self._thread.join(timeout=2 * self.timeout)
+        self.session.close()
+
+    def stats(self):
+        return {"mode": self.mode, "sent": self.sent, "skipped": self.skipped, "coalesced": self.coalesced,
+                "errors": self.errors, "pending": len(self._pending)}
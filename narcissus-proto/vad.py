@@ -0,0 +1,208 @@
+"""
+Streaming voice-activity detection for the voice front end.
+
+Mono int16 PCM goes in, in chunks of any size; complete utterances come out
+as int16 arrays ready for the recognizer. Everything else (hair dryer,
+fan, clicks, door slams) is dropped before it costs a recognition request.
+
+    vad = StreamingVAD()
+    for segment in vad.process(pcm_chunk): recognize(segment)
+
+    python vad.py fixture.wav    # segment a WAV file instead of the microphone
+"""
+import sys
+import wave
+import numpy as np
+
+
+class PCMRing:
+    """Preallocated int16 ring addressed by absolute sample index."""
+    def __init__(self, capacity):
+        self.buf = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.end = 0 # absolute index one past the newest sample
+
+    def write(self, samples):
+        n = len(samples)
+        if n > self.capacity:
+            # Only the newest `capacity` samples survive anyway
+            self.end += n - self.capacity
+            samples, n = samples[-self.capacity:], self.capacity
+        i = self.end % self.capacity
+        first = min(n, self.capacity - i)
+        self.buf[i:i + first] = samples[:first]
+        self.buf[:n - first] = samples[first:]
+        self.end += n
+
+    def read(self, start, stop):
+        """Copy of samples [start, stop); start is clamped to what is still buffered."""
+        start = max(start, self.end - self.capacity, 0)
+        idx = np.arange(start, stop) % self.capacity
+        return self.buf[idx]
+
+
+class StreamingVAD:
+    """
+    Frame-level speech detector + utterance segmenter.
+
+    A 30 ms frame counts as speech when most of its energy is in the voice
+    band (300-3400 Hz), its spectrum is peaky (low spectral flatness) and it
+    is `margin_db` above the adaptive noise floor. Steady broadband noise
+    fails the spectral tests even before the floor catches up with it, and
+    only frames that don't look like voice move the floor.
+    An utterance opens after `start_frames` speech frames in a row (with
+    `preroll_s` of audio before it) and closes after `pause_s` of non-speech.
+    Segments shorter than `min_speech_s` of speech, or whose frames are
+    mostly non-speech, are dropped.
+    """
+    def __init__(self, rate=16000, frame_ms=30, margin_db=4.0, max_flatness=0.45, min_band_ratio=0.6,
+                 start_frames=3, pause_s=0.8, preroll_s=0.3, min_speech_s=0.3, min_voiced_ratio=0.3,
+                 max_segment_s=10.0):
+        self.rate = rate
+        self.frame_len = rate * frame_ms // 1000
+        self.margin_db = margin_db
+        self.max_flatness = max_flatness
+        self.min_band_ratio = min_band_ratio
+        self.start_frames = start_frames
+        self.pause_frames = int(pause_s * 1000 / frame_ms)
+        self.preroll = int(preroll_s * rate)
+        self.min_speech_frames = int(min_speech_s * 1000 / frame_ms)
+        self.min_voiced_ratio = min_voiced_ratio
+        self.max_segment = int(max_segment_s * rate)
+
+        # Per-frame analysis constants
+        self.window = np.hanning(self.frame_len).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_len, 1.0 / rate)
+        self.band = (freqs >= 300) & (freqs <= 3400)
+
+        self.ring = PCMRing(int((max_segment_s + preroll_s + 1) * rate))
+        self._partial = np.zeros(0, dtype=np.int16) # samples short of a whole frame
+        self.noise_db = None
+        self.run = 0 # consecutive speech frames while idle
+        self.segment_start = None # absolute sample index, None when idle
+        self.voiced = 0
+        self.silence = 0
+
+        # Stats
+        self.frames = 0
+        self.speech_frames = 0
+        self.segments = 0 # sent on to the recognizer
+        self.dropped_short = 0
+        self.dropped_nonspeech = 0
+
+    def classify(self, frames):
+        """(n, frame_len) int16 -> speech bool per frame. Features are vectorized over frames."""
+        x = frames.astype(np.float32)
+        level = 10 * np.log10(np.mean(x * x, axis=1) + 1.0)
+        spec = np.abs(np.fft.rfft(x * self.window, axis=1)) ** 2 + 1e-3
+        band = spec[:, self.band]
+        band_ratio = band.sum(axis=1) / spec.sum(axis=1)
+        flatness = np.exp(np.mean(np.log(band), axis=1)) / np.mean(band, axis=1)
+
+        voice_like = (flatness < self.max_flatness) & (band_ratio > self.min_band_ratio)
+        speech = np.empty(len(frames), dtype=bool)
+        for i, db in enumerate(level):
+            if self.noise_db is None: self.noise_db = db
+            speech[i] = voice_like[i] and db > self.noise_db + self.margin_db
+            if not voice_like[i] or db < self.noise_db:
+                # Falls fast, rises slowly: steady noise becomes the floor within a few seconds
+                rate = 0.3 if db < self.noise_db else 0.02
+                self.noise_db += rate * (db - self.noise_db)
+        return speech
+
+    def process(self, chunk):
+        """Feed int16 samples. Returns the list of utterances completed by this chunk."""
+        pcm = np.concatenate((self._partial, chunk)) if len(self._partial) else np.asarray(chunk, dtype=np.int16)
+        n = len(pcm) // self.frame_len
+        self._partial = pcm[n * self.frame_len:].copy()
+        if n == 0: return []
+
+        base = self.ring.end
+        self.ring.write(pcm[:n * self.frame_len])
+        speech = self.classify(pcm[:n * self.frame_len].reshape(n, self.frame_len))
+        self.frames += n
+        self.speech_frames += int(speech.sum())
+
+        out = []
+        for i, is_speech in enumerate(speech):
+            frame_end = base + (i + 1) * self.frame_len
+            if self.segment_start is None:
+                self.run = self.run + 1 if is_speech else 0
+                if self.run >= self.start_frames:
+                    self.segment_start = max(frame_end - self.run * self.frame_len - self.preroll, 0)
+                    self.voiced, self.silence, self.run = self.run, 0, 0
+                continue
+
+            if is_speech:
+                self.voiced += 1
+                self.silence = 0
+            else:
+                self.silence += 1
+            if self.silence >= self.pause_frames or frame_end - self.segment_start >= self.max_segment:
+                segment = self._close(frame_end)
+                if segment is not None: out.append(segment)
+        return out
+
+    def _close(self, end):
+        start, self.segment_start = self.segment_start, None
+        # Trailing pause is not part of the utterance
+        end -= self.silence * self.frame_len
+        frames = max((end - start) // self.frame_len, 1)
+        if self.voiced < self.min_speech_frames:
+            self.dropped_short += 1
+            return None
+        if self.voiced / frames < self.min_voiced_ratio:
+            self.dropped_nonspeech += 1
+            return None
+        self.segments += 1
+        return self.ring.read(start, end)
+
+    def flush(self):
+        """Close an utterance still open at end of stream (e.g. end of a WAV file)."""
+        if self.segment_start is None: return []
+        segment = self._close(self.ring.end)
+        return [segment] if segment is not None else []
+
+    def stats(self):
+        return {"frames": self.frames, "speech_frames": self.speech_frames, "segments": self.segments,
+                "dropped_short": self.dropped_short, "dropped_nonspeech": self.dropped_nonspeech,
+                "noise_db": round(float(self.noise_db), 1) if self.noise_db is not None else None}
+
+
+def read_wav(path):
+    """(int16 mono samples, sample rate) from a 16-bit PCM WAV file (channels are averaged)."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate, channels = f.getframerate(), f.getnchannels()
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return pcm, rate
+
+
+def write_wav(path, pcm, rate=16000):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.asarray(pcm, dtype=np.int16).tobytes())
+
+
+def segment_wav(path, vad=None, chunk=1024):
+    """Stream a WAV file through a StreamingVAD in mic-sized chunks. Returns (segments, vad)."""
+    pcm, rate = read_wav(path)
+    vad = vad or StreamingVAD(rate=rate)
+    if vad.rate != rate:
+        raise ValueError(f"{path}: {rate} Hz, VAD expects {vad.rate} Hz")
+    segments = []
+    for i in range(0, len(pcm), chunk):
+        segments += vad.process(pcm[i:i + chunk])
+    return segments + vad.flush(), vad
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        segments, vad = segment_wav(path)
+        lengths = ", ".join(f"{len(s) / vad.rate:.2f}s" for s in segments)
+        print(f"🎙️ {path}: {len(segments)} utterances [{lengths}] {vad.stats()}")
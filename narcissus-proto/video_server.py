@@ -1,44 +1,218 @@
 from flask import Flask, Response
 import threading
-import cv2
+import json
 import time
-
-# Global reference to the output frame
-output_frame = None
-lock = threading.Lock()
+import cv2
+import numpy as np
+from perf import timings, register_gauge, prometheus_text
+from startup import clock
 
 app = Flask(__name__)
 
-def generate():
-    global output_frame, lock
-    while True:
-        with lock:
-            if output_frame is None:
-                continue
-            
-            # Encode frame
-            (flag, encodedImage) = cv2.imencode(".jpg", output_frame)
-            
+
+class FrameBroadcaster:
+    """
+    Encode-once, fan-out MJPEG source.
+
+    update_frame() copies the frame into a free buffer (outside any lock)
+    and hands it to a single encoder thread. Each new frame is JPEG-encoded
+    exactly once and tagged with a sequence number; stream clients block on
+    a condition until a newer sequence exists, so a slow client just skips
+    frames without holding back the others.
+    """
+    def __init__(self, jpeg_quality=95, max_fps=None):
+        self.jpeg_quality = jpeg_quality
+        self.max_fps = max_fps # Stream rate cap, None = every frame (both set by quality.py)
+        self._next_due = 0.0
+
+        # Triple buffering: writer fills `_back`, swaps it with `_pending`,
+        # encoder swaps `_pending` with `_front` and encodes that.
+        self._back = None
+        self._pending = None
+        self._front = None
+        self._has_pending = False
+        self._raw_cond = threading.Condition()
+
+        # Latest encoded frame
+        self.jpeg = None
+        self.seq = 0
+        self._jpeg_cond = threading.Condition()
+
+        self.clients = 0
+        self.encoded = 0
+        self.thread = threading.Thread(target=self._encode_loop, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def update_frame(self, frame):
+        # Nobody watching: skip the copy and the encode entirely
+        if self.clients == 0: return
+        if self.max_fps:
+            now = time.perf_counter()
+            if now < self._next_due: return
+            # Paced like a camera: a late frame doesn't earn a burst of catch-up frames
+            self._next_due = max(self._next_due + 1.0 / self.max_fps, now - 1.0 / self.max_fps)
+
+        back = self._back
+        if back is None or back.shape != frame.shape:
+            back = np.empty_like(frame)
+        np.copyto(back, frame)
+
+        with self._raw_cond:
+            self._back, self._pending = self._pending, back
+            self._has_pending = True
+            self._raw_cond.notify()
+
+    def _encode_loop(self):
+        while True:
+            with self._raw_cond:
+                while not self._has_pending:
+                    self._raw_cond.wait()
+                self._front, self._pending = self._pending, self._front
+                self._has_pending = False
+                frame = self._front
+
+            t0 = time.perf_counter()
+            flag, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            timings.record("encode", time.perf_counter() - t0)
             if not flag: continue
-            
-        # Yield byte stream
-        yield(b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + 
-              bytearray(encodedImage) + b'\r\n')
-        # Cap FPS to avoid overwhelming network
-        time.sleep(0.016)
+
+            with self._jpeg_cond:
+                self.jpeg = encoded.tobytes()
+                self.seq += 1
+                self.encoded += 1
+                self._jpeg_cond.notify_all()
+            if self.encoded == 1: clock.mark("first_frame")
+
+    def wait_for_frame(self, last_seq, timeout=1.0):
+        """Block until a frame newer than `last_seq` exists. Returns (seq, jpeg)."""
+        with self._jpeg_cond:
+            self._jpeg_cond.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.jpeg
+
+    def client_connected(self):
+        with self._jpeg_cond:
+            self.clients += 1
+
+    def client_disconnected(self):
+        with self._jpeg_cond:
+            self.clients -= 1
+
+
+broadcaster = FrameBroadcaster()
+
+def generate():
+    broadcaster.client_connected()
+    try:
+        seq = 0
+        while True:
+            new_seq, jpeg = broadcaster.wait_for_frame(seq)
+            if new_seq == seq or jpeg is None: continue
+            seq = new_seq
+
+            # Yield byte stream (shared JPEG bytes, no per-client copy)
+            yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n'
+                   b'X-Frame-Seq: ' + str(seq).encode() + b'\r\n\r\n')
+            yield jpeg
+            yield b'\r\n'
+    finally:
+        broadcaster.client_disconnected()
 
 @app.route("/video_feed")
 def video_feed():
     return Response(generate(), mimetype = "multipart/x-mixed-replace; boundary=frame")
 
+
+class CursorChannel:
+    """
+    Latest-position cursor push channel (Server-Sent Events).
+
+    publish() only bumps the sequence when the position actually changed,
+    so an idle hand sends nothing. Each subscriber is rate-limited to
+    `max_hz` and always gets the newest position, never a backlog.
+    """
+    def __init__(self, max_hz=30):
+        self.min_interval = 1.0 / max_hz
+        self._cond = threading.Condition()
+        self.payload = None
+        self.seq = 0
+        self._last_pos = None
+
+        # Stats
+        self.published = 0
+        self.sent = 0
+        self.clients = 0
+
+    def publish(self, cursor_pos):
+        pos = (round(cursor_pos['x'], 3), round(cursor_pos['y'], 3))
+        if pos == self._last_pos: return
+        with self._cond:
+            self._last_pos = pos
+            self.seq += 1
+            self.published += 1
+            # t: publish time (ms) so subscribers can measure latency
+            self.payload = json.dumps({"x": pos[0], "y": pos[1], "seq": self.seq,
+                                       "t": round(time.time() * 1000, 1)})
+            self._cond.notify_all()
+
+    def wait_for_update(self, last_seq, timeout=15.0):
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.payload
+
+
+cursor_channel = CursorChannel()
+
+def generate_cursor():
+    with cursor_channel._cond:
+        cursor_channel.clients += 1
+    try:
+        seq = 0
+        while True:
+            new_seq, payload = cursor_channel.wait_for_update(seq)
+            if new_seq == seq:
+                yield b": keep-alive\n\n"
+                continue
+            seq = new_seq
+            cursor_channel.sent += 1
+            yield f"id: {seq}\ndata: {payload}\n\n".encode()
+            # Rate limit: moves during this pause collapse into the latest one
+            time.sleep(cursor_channel.min_interval)
+    finally:
+        with cursor_channel._cond:
+            cursor_channel.clients -= 1
+
+@app.route("/cursor_stream")
+def cursor_stream():
+    # The MagicMirror page (:8080) subscribes cross-origin
+    headers = {"Cache-Control": "no-cache", "Access-Control-Allow-Origin": "*"}
+    return Response(generate_cursor(), mimetype="text/event-stream", headers=headers)
+
+
+register_gauge("narcissus_stream_clients", lambda: broadcaster.clients, "Connected stream clients.", labels={"stream": "video"})
+register_gauge("narcissus_stream_clients", lambda: cursor_channel.clients, "Connected stream clients.", labels={"stream": "cursor"})
+register_gauge("narcissus_frames_encoded_total", lambda: broadcaster.encoded, "JPEG frames encoded.", "counter")
+register_gauge("narcissus_cursor_updates_total", lambda: cursor_channel.published, "Cursor positions published.", "counter")
+
+@app.route("/metrics")
+def metrics():
+    # Prometheus text format: stage latency histograms + gauges from perf.py
+    return Response(prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+
 class VideoServer:
-    def __init__(self, host="0.0.0.0", port=5050):
+    def __init__(self, host="0.0.0.0", port=5050, sinks=()):
         self.host = host
         self.port = port
+        self.broadcaster = broadcaster
+        self.cursor_channel = cursor_channel
+        # Extra raw-frame outputs with update_frame(frame), e.g. frame_ring.FrameRingWriter
+        self.sinks = list(sinks)
         self.thread = threading.Thread(target=self.run, daemon=True)
-    
+
     def run(self):
-        print(f"🎥 Starting Video Stream at http://{self.host}:{self.port}/video_feed")
+        print(f"🎥 Starting Video Stream at http://{self.host}:{self.port}/video_feed (cursor: /cursor_stream)")
         # Disable Flask logging
         import logging
         log = logging.getLogger('werkzeug')
@@ -46,9 +220,13 @@ class VideoServer:
         app.run(host=self.host, port=self.port, debug=False, threaded=True, use_reloader=False)
 
     def start(self):
+        self.broadcaster.start()
         self.thread.start()
 
     def update_frame(self, frame):
-        global output_frame, lock
-        with lock:
-            output_frame = frame.copy()
+        self.broadcaster.update_frame(frame)
+        for sink in self.sinks:
+            sink.update_frame(frame)
+
+    def publish_cursor(self, cursor_pos):
+        self.cursor_channel.publish(cursor_pos)
@@ -1,15 +1,49 @@
 import speech_recognition as sr
 from threading import Thread
 import time
+import numpy as np
+from perf import register_gauge
+from recognition import RecognitionPool
+from vad import StreamingVAD
+
+
+class GoogleRecognizer:
+    """Google Speech Recognition (Cloud) backend: (audio) -> text, '' when nothing was understood."""
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def __call__(self, audio):
+        try:
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return "" # Silence is golden
+
 
 class VoiceListener(Thread):
-    def __init__(self, event_queue):
+    def __init__(self, event_queue, recognize=None, workers=2, use_vad=True):
         super().__init__()
         self.event_queue = event_queue
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        # Streaming VAD front end (vad.py): only likely speech reaches the
+        # recognizer. use_vad=False: speech_recognition's energy threshold.
+        self.vad = StreamingVAD() if use_vad else None
+        if use_vad:
+            self.microphone = sr.Microphone(sample_rate=self.vad.rate, chunk_size=self.vad.frame_len)
+        else:
+            self.microphone = sr.Microphone()
         self.stop_listening = None
-        
+        self.running = True
+        # Revert to Google Speech Recognition (Cloud) per user preference
+        # It handles noise/accents differently than local Whisper
+        self.recognitions = RecognitionPool(self.on_command, recognize or GoogleRecognizer(self.recognizer),
+                                            workers=workers)
+        if self.vad is not None:
+            vad = self.vad
+            for result, fn in (("recognized", lambda: vad.segments), ("dropped_short", lambda: vad.dropped_short),
+                               ("dropped_nonspeech", lambda: vad.dropped_nonspeech)):
+                register_gauge("narcissus_vad_segments_total", fn, "Utterance segments by VAD outcome.",
+                               "counter", {"result": result})
+
     def start_background_listening(self):
         print("🎤 Voice Listener Initializing...")
         try:
@@ -17,10 +51,10 @@ class VoiceListener(Thread):
                 self.recognizer.adjust_for_ambient_noise(source)
                 self.recognizer.pause_threshold = 0.8 # Snappier response (was 1.2)
                 self.recognizer.energy_threshold = 120 # minimum audio energy
-            
+
             # Starts a background thread
             self.stop_listening = self.recognizer.listen_in_background(
-                self.microphone, 
+                self.microphone,
                 self.callback,
                 phrase_time_limit=None # Don't cut off hard
             )
@@ -28,52 +62,40 @@ class VoiceListener(Thread):
         except Exception as e:
             print(f"🎤 Voice Init Error: {e}")
 
-    def callback(self, recognizer, audio):
+    def listen_with_vad(self):
+        print("🎤 Voice Listener Initializing (VAD)...")
         try:
-            # Revert to Google Speech Recognition (Cloud) per user preference
-            # It handles noise/accents differently than local Whisper
-            text = recognizer.recognize_google(audio).lower().strip()
-            
-            if text:
-                print(f"🗣️ Heard (Google): '{text}'")
-                
-                # WAKE WORD Logic
-                # Only process if addressed directly
-                clean_text = text.lower().strip()
-                # Remove punctuation from start
-                clean_text = clean_text.lstrip(".,-! ")
-                
-                WAKE_WORDS = ["narcissus", "hey narcissus", "mirror", "hey mirror", "smart mirror"]
-                
-                detected_trigger = None
-                for trigger in WAKE_WORDS:
-                    if clean_text.startswith(trigger):
-                        detected_trigger = trigger
-                        break
-                
-                if detected_trigger:
-                    # Strip trigger and send command
-                    command = clean_text[len(detected_trigger):].strip().lstrip(".,-! ")
-                    if command:
-                        print(f"🚀 Wake Word '{detected_trigger}' detected! Command: '{command}'")
-                        self.event_queue.put({"type": "voice", "content": command})
-                    else:
-                        print(f"⚠️ Wake Word '{detected_trigger}' detected, but no command followed.")
-                else:
-                     print(f"💤 Ignored (No Wake Word): '{text}'")
-                
-        except sr.UnknownValueError:
-            pass # Silence is golden
-        except sr.RequestError as e:
-            print(f"🎤 Voice API Error: {e}")
+            with self.microphone as source:
+                print("🎤 Listening for commands...")
+                while self.running:
+                    # One 30 ms frame per read, segmented as it streams in
+                    pcm = np.frombuffer(source.stream.read(source.CHUNK), dtype=np.int16)
+                    for segment in self.vad.process(pcm):
+                        self.recognitions.submit(sr.AudioData(segment.tobytes(), self.vad.rate, 2))
+        except Exception as e:
+            print(f"🎤 Voice Init Error: {e}")
+        print(f"🎤 VAD: {self.vad.stats()} | recognition: {self.recognitions.stats()}")
+
+    def callback(self, recognizer, audio):
+        # Runs on the listening thread: hand the phrase to a recognition
+        # worker and go straight back to listening
+        self.recognitions.submit(audio)
+
+    def on_command(self, command):
+        self.event_queue.put({"type": "voice", "content": command, "time": time.time()})
 
     def run(self):
-        # Thread run method just keeps the object alive, 
+        if self.vad is not None:
+            self.listen_with_vad()
+            return
+        # Thread run method just keeps the object alive,
         # but listen_in_background handles the actual work.
         self.start_background_listening()
-        while True:
+        while self.running:
             time.sleep(1)
-            
+
     def stop(self):
+        self.running = False
         if self.stop_listening:
             self.stop_listening(wait_for_stop=False)
+        self.recognitions.shutdown()